@@ -0,0 +1,12 @@
+"""
+Offline benchmarks of the listeners and commands.
+
+Discord and Mongo are replaced by in-memory stand-ins, see benchmarks.fakes,
+so the results measure the bot's own code. Run with `python -m benchmarks`.
+"""
+import os
+
+# bot.constants requires these, the stand-ins never connect anywhere.
+os.environ.setdefault("DISCORD_TOKEN", "benchmark")
+os.environ.setdefault("DATABASE_URI", "mongodb://localhost")
+os.environ.setdefault("DATABASE_NAME", "benchmark")
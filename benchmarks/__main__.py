@@ -0,0 +1,111 @@
+"""Run the benchmarks and compare them to the stored baseline."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import pathlib
+import sys
+
+from loguru import logger
+
+from benchmarks import (
+    bench_birthdays,
+    bench_prompts,
+    bench_roles,
+    bench_search,
+    bench_twitch,
+    harness,
+)
+
+BASELINE = pathlib.Path(__file__).parent / "baseline.json"
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse the command line.
+
+    Returns:
+        argparse.Namespace: The arguments.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "-k",
+        dest="pattern",
+        default="",
+        help="only run benchmarks with this in their name",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="store the results as the new baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="allowed slowdown before failing, as a fraction (default 0.25)",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=pathlib.Path,
+        default=BASELINE,
+        help="baseline file (default benchmarks/baseline.json)",
+    )
+    return parser.parse_args()
+
+
+async def main() -> int:
+    """
+    Run the benchmarks.
+
+    Returns:
+        int: The exit code, 1 if anything regressed.
+    """
+    args = parse_args()
+    # the listeners log every sync, which would be timed as well.
+    logger.disable("bot")
+
+    benchmarks = [
+        benchmark
+        for module in (
+            bench_roles,
+            bench_birthdays,
+            bench_prompts,
+            bench_search,
+            bench_twitch,
+        )
+        for benchmark in module.benchmarks()
+        if args.pattern in benchmark.name
+    ]
+    baseline = harness.load_baseline(args.baseline)
+
+    results: list[harness.Result] = []
+    found: list[str] = []
+    for benchmark in benchmarks:
+        result = await harness.measure(benchmark)
+        results.append(result)
+        print(result.describe())
+
+        if result.name in baseline:
+            found.extend(
+                harness.regressions(
+                    result, baseline[result.name], args.threshold
+                )
+            )
+
+    if args.save:
+        harness.save_baseline(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if found:
+        print(f"\nRegressed by more than {args.threshold:.0%}:")
+        print("\n".join(found))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,119 @@
+"""Benchmarks of the birthday announcements."""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from benchmarks import fakes
+from benchmarks.harness import Benchmark
+from bot import outbox, timeline
+from bot.modules import birthday
+
+if TYPE_CHECKING:
+    from bot import storage
+
+SIZES = (1_000, 10_000, 100_000)
+# share of the users whose birthday is due when the check runs.
+DUE = 0.01
+
+
+def check_benchmark(backend: str, amount: int) -> Benchmark:
+    """
+    Announce the birthdays that are due among all users.
+
+    Args:
+        backend (str): Storage backend, see fakes.open_storage.
+        amount (int): Amount of users with a birthday.
+
+    Returns:
+        Benchmark: The benchmark.
+    """
+    # seeded, so every run measures the same data.
+    rng = random.Random(amount)  # noqa: S311, DUO102
+    now = datetime.now(timezone.utc)
+
+    documents = []
+    for discord_id in range(1, amount + 1):
+        if rng.random() < DUE:
+            date = now - timedelta(hours=1)
+        else:
+            # at least a day out, so nothing becomes due between runs.
+            date = now + timedelta(seconds=rng.randint(86400, 365 * 86400))
+        documents.append(
+            {
+                "discord_id": discord_id,
+                "date": date,
+                "month": date.month,
+                "day": date.day,
+                "timezone": "UTC",
+            }
+        )
+
+    async def setup() -> tuple[
+        fakes.FakeScheduler,
+        outbox.Outbox,
+        storage.Storage,
+        timeline.BirthdayTimeline,
+    ]:
+        store = await fakes.open_storage(
+            backend, birthdays=map(dict, documents)
+        )
+        birthdays = timeline.BirthdayTimeline()
+        await birthdays.load(store.birthdays)
+        return (
+            fakes.FakeScheduler(),
+            outbox.Outbox(fakes.FakeRest()),  # type: ignore
+            store,
+            birthdays,
+        )
+
+    async def run(
+        state: tuple[
+            fakes.FakeScheduler,
+            outbox.Outbox,
+            storage.Storage,
+            timeline.BirthdayTimeline,
+        ]
+    ) -> None:
+        scheduler, messages, store, birthdays = state
+        await birthday.check_birthdays(
+            scheduler,  # type: ignore
+            messages,
+            store.birthdays,
+            birthdays,
+        )
+
+    async def teardown(
+        state: tuple[
+            fakes.FakeScheduler,
+            outbox.Outbox,
+            storage.Storage,
+            timeline.BirthdayTimeline,
+        ]
+    ) -> None:
+        await state[1].close()
+        await fakes.close_storage(state[2])
+
+    return Benchmark(
+        f"check_birthdays[{backend},{amount}]",
+        setup,
+        run,
+        repeat=10,
+        teardown=teardown,
+    )
+
+
+def benchmarks() -> list[Benchmark]:
+    """
+    Get the birthday benchmarks.
+
+    Returns:
+        list[Benchmark]: The benchmarks.
+    """
+    return [
+        check_benchmark(backend, amount)
+        for backend in fakes.BACKENDS
+        for amount in SIZES
+    ]
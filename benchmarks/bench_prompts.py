@@ -0,0 +1,95 @@
+"""Benchmarks of confirmation prompts."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import hikari
+
+from benchmarks import fakes
+from benchmarks.harness import Benchmark
+from bot import interactions, utils
+
+if TYPE_CHECKING:
+    from typing import Any
+
+SIZES = (100, 1_000)
+
+
+def prompts_benchmark(amount: int) -> Benchmark:
+    """
+    Open many confirmation prompts at once, then confirm all of them.
+
+    Args:
+        amount (int): Amount of prompts open at the same time.
+
+    Returns:
+        Benchmark: The benchmark.
+    """
+
+    async def setup() -> tuple[fakes.FakeContext, interactions.ComponentRouter]:
+        router = interactions.ComponentRouter()
+        ctx = fakes.FakeContext(fakes.FakeRest())
+        ctx.client.dependencies[interactions.ComponentRouter] = router
+        return ctx, router
+
+    async def run(
+        state: tuple[fakes.FakeContext, interactions.ComponentRouter]
+    ) -> None:
+        ctx, router = state
+        opened: list[tuple[int, str]] = []
+        all_opened = asyncio.Event()
+
+        def on_respond(
+            message: fakes.FakeMessage, kwargs: dict[str, Any]
+        ) -> None:
+            confirm = kwargs["component"].components[0]
+            opened.append((message.id, confirm.custom_id))
+            if len(opened) == amount:
+                all_opened.set()
+
+        ctx.on_respond = on_respond
+        prompts = [
+            asyncio.create_task(
+                utils.confirmation_embed(
+                    ctx,  # type: ignore
+                    callback=asyncio.sleep(0),
+                    embed=hikari.Embed(title="Benchmark"),
+                    confirm_button=utils.ButtonInfo(
+                        "Confirm", hikari.ButtonStyle.SUCCESS
+                    ),
+                )
+            )
+            for _ in range(amount)
+        ]
+
+        # a prompt registers with the router straight after responding.
+        await all_opened.wait()
+        for message_id, custom_id in opened:
+            interaction = fakes.component_interaction(
+                ctx.rest, custom_id, message_id
+            )
+            await router.on_interaction(
+                SimpleNamespace(interaction=interaction)  # type: ignore
+            )
+        await asyncio.gather(*prompts)
+
+    return Benchmark(
+        f"confirmation_embed[{amount}]",
+        setup,
+        run,
+        repeat=20,
+        operations=amount,
+    )
+
+
+def benchmarks() -> list[Benchmark]:
+    """
+    Get the prompt benchmarks.
+
+    Returns:
+        list[Benchmark]: The benchmarks.
+    """
+    return list(map(prompts_benchmark, SIZES))
@@ -0,0 +1,181 @@
+"""Benchmarks of the role info listeners and command."""
+
+from __future__ import annotations
+
+import itertools
+import random
+from typing import TYPE_CHECKING
+
+import hikari
+
+from benchmarks import fakes
+from benchmarks.harness import Benchmark
+from bot import caches, search
+from bot.modules import role_info
+
+if TYPE_CHECKING:
+    from bot import storage
+
+SYNC_SIZES = (100, 1_000, 10_000)
+COMMAND_ROLES = 10_000
+COMMAND_USES = 5_000
+
+
+def _roles(amount: int) -> dict[int, fakes.FakeRole]:
+    """
+    Create the roles of a guild.
+
+    Args:
+        amount (int): Amount of roles.
+
+    Returns:
+        dict[int, fakes.FakeRole]: The roles, keyed by id.
+    """
+    return {
+        role_id: fakes.FakeRole(
+            role_id, f"role {role_id}", hikari.Color(role_id % 0xFFFFFF)
+        )
+        for role_id in range(1, amount + 1)
+    }
+
+
+def _document(role: fakes.FakeRole) -> dict[str, object]:
+    """
+    Create the stored document of a role.
+
+    Args:
+        role (fakes.FakeRole): The role.
+
+    Returns:
+        dict[str, object]: The document.
+    """
+    return {
+        "role_id": role.id,
+        "name": role.name,
+        "color": role.color.raw_hex_code,
+        "description": role_info.DEFAULT_DESCRIPTION,
+    }
+
+
+def sync_benchmark(backend: str, amount: int) -> Benchmark:
+    """
+    Sync a guild with a db that drifted from it.
+
+    5% of the roles are new, 10% were renamed and 5% of the documents belong
+    to deleted roles.
+
+    Args:
+        backend (str): Storage backend, see fakes.open_storage.
+        amount (int): Amount of roles in the guild.
+
+    Returns:
+        Benchmark: The benchmark.
+    """
+    # seeded, so every run measures the same data.
+    rng = random.Random(amount)  # noqa: S311, DUO102
+    roles = _roles(amount)
+    stored = list(roles.values())[: amount - amount // 20]
+
+    documents = [_document(role) for role in stored]
+    for document in rng.sample(documents, amount // 10):
+        document["name"] = "old name"
+    documents.extend(
+        _document(fakes.FakeRole(role_id, "deleted", hikari.Color(0)))
+        for role_id in range(amount + 1, amount + 1 + amount // 20)
+    )
+
+    async def setup() -> tuple[fakes.FakeBot, storage.Storage]:
+        store = await fakes.open_storage(backend, roles=map(dict, documents))
+        return fakes.FakeBot(fakes.FakeRest(fakes.FakeGuild(roles))), store
+
+    async def run(state: tuple[fakes.FakeBot, storage.Storage]) -> None:
+        bot, store = state
+        await role_info.sync_roles(
+            None,  # type: ignore
+            bot=bot,  # type: ignore
+            role_info=store.roles,
+            cache=caches.RoleInfoCache(),
+            index=search.RoleIndex(),
+        )
+
+    async def teardown(state: tuple[fakes.FakeBot, storage.Storage]) -> None:
+        await fakes.close_storage(state[1])
+
+    return Benchmark(
+        f"sync_roles[{backend},{amount}]",
+        setup,
+        run,
+        repeat=20,
+        teardown=teardown,
+    )
+
+
+def command_benchmark(backend: str) -> Benchmark:
+    """
+    Look up roles picked with a Zipf distribution, like popular roles are.
+
+    The cache starts empty and keeps its default size, so this includes the
+    misses falling back to the db.
+
+    Args:
+        backend (str): Storage backend, see fakes.open_storage.
+
+    Returns:
+        Benchmark: The benchmark.
+    """
+    rng = random.Random(COMMAND_ROLES)  # noqa: S311, DUO102
+    roles = list(_roles(COMMAND_ROLES).values())
+    weights = itertools.accumulate(
+        1 / rank for rank in range(1, len(roles) + 1)
+    )
+    # one more for the allocation run.
+    picks = rng.choices(roles, cum_weights=list(weights), k=COMMAND_USES + 1)
+
+    cache = caches.RoleInfoCache()
+    ctx = fakes.FakeContext(fakes.FakeRest())
+    # the storage is shared by every run, it is created in the first setup.
+    stores: list[storage.Storage] = []
+
+    async def setup() -> fakes.FakeRole:
+        if not stores:
+            stores.append(
+                await fakes.open_storage(backend, roles=map(_document, roles))
+            )
+        return picks.pop()
+
+    async def run(role: fakes.FakeRole) -> None:
+        await role_info.command_role.callback(
+            ctx,  # type: ignore
+            role,  # type: ignore
+            role_info=stores[0].roles,
+            cache=cache,
+        )
+
+    async def teardown(role: fakes.FakeRole) -> None:
+        if not picks:
+            await fakes.close_storage(stores.pop())
+
+    return Benchmark(
+        f"command_role[{backend}]",
+        setup,
+        run,
+        repeat=COMMAND_USES,
+        teardown=teardown,
+    )
+
+
+def benchmarks() -> list[Benchmark]:
+    """
+    Get the role info benchmarks.
+
+    Returns:
+        list[Benchmark]: The benchmarks.
+    """
+    return [
+        *(
+            sync_benchmark(backend, amount)
+            for backend in fakes.BACKENDS
+            for amount in SYNC_SIZES
+        ),
+        *map(command_benchmark, fakes.BACKENDS),
+    ]
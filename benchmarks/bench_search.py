@@ -0,0 +1,181 @@
+"""Benchmarks of the role search index."""
+
+from __future__ import annotations
+
+import random
+
+from benchmarks.harness import Benchmark
+from bot import constants, search
+
+SIZES = (1_000, 10_000)
+QUERIES = 1_000
+VOCABULARY = [
+    "apex",
+    "valorant",
+    "minecraft",
+    "chess",
+    "music",
+    "art",
+    "anime",
+    "coding",
+    "python",
+    "rust",
+    "java",
+    "europe",
+    "america",
+    "asia",
+    "oceania",
+    "africa",
+    "red",
+    "blue",
+    "green",
+    "yellow",
+    "purple",
+    "night",
+    "owl",
+    "early",
+    "bird",
+    "streamer",
+    "artist",
+    "writer",
+    "gamer",
+    "tournament",
+    "league",
+    "ranked",
+    "casual",
+    "support",
+    "tank",
+    "healer",
+    "sniper",
+    "builder",
+    "speedrun",
+    "retro",
+    "indie",
+    "pixel",
+]
+
+
+def _documents(
+    rng: random.Random, amount: int  # noqa: DUO102
+) -> list[dict[str, object]]:
+    """
+    Create role documents with names and descriptions of common words.
+
+    Every fourth role keeps the default description, like in a real guild.
+
+    Args:
+        rng (random.Random): Random source.
+        amount (int): Amount of roles.
+
+    Returns:
+        list[dict[str, object]]: The documents.
+    """
+    documents: list[dict[str, object]] = []
+    for role_id in range(1, amount + 1):
+        name = " ".join(rng.sample(VOCABULARY, rng.randint(1, 3)))
+        description = (
+            constants.DEFAULT_ROLE_DESCRIPTION
+            if role_id % 4 == 0
+            else "For " + " ".join(rng.choices(VOCABULARY, k=8)) + " fans."
+        )
+        documents.append(
+            {
+                "role_id": role_id,
+                "name": f"{name} {role_id}",
+                "color": "#000000",
+                "description": description,
+            }
+        )
+    return documents
+
+
+def _queries(
+    rng: random.Random, documents: list[dict[str, object]]  # noqa: DUO102
+) -> list[str]:
+    """
+    Create the queries of users typing role names, keystroke by keystroke.
+
+    One in ten words has a typo, which only the trigram fallback finds.
+
+    Args:
+        rng (random.Random): Random source.
+        documents (list[dict[str, object]]): Documents of the roles.
+
+    Returns:
+        list[str]: The queries.
+    """
+    queries: list[str] = []
+    while len(queries) < QUERIES:
+        name = str(rng.choice(documents)["name"])
+        if rng.random() < 0.1:
+            position = rng.randrange(len(name))
+            name = name[:position] + "x" + name[position + 1 :]
+        queries.extend(name[:end] for end in range(1, len(name) + 1))
+    return queries[:QUERIES]
+
+
+def build_benchmark(amount: int) -> Benchmark:
+    """
+    Build the index of every role, as on start.
+
+    Args:
+        amount (int): Amount of roles.
+
+    Returns:
+        Benchmark: The benchmark.
+    """
+    # seeded, so every run measures the same data.
+    documents = _documents(random.Random(amount), amount)  # noqa: S311, DUO102
+
+    async def setup() -> search.RoleIndex:
+        return search.RoleIndex()
+
+    async def run(index: search.RoleIndex) -> None:
+        index.rebuild(documents)  # type: ignore
+
+    return Benchmark(f"role_index_build[{amount}]", setup, run, repeat=10)
+
+
+def search_benchmark(amount: int) -> Benchmark:
+    """
+    Answer queries typed keystroke by keystroke.
+
+    Args:
+        amount (int): Amount of roles.
+
+    Returns:
+        Benchmark: The benchmark.
+    """
+    rng = random.Random(amount)  # noqa: S311, DUO102
+    documents = _documents(rng, amount)
+    queries = _queries(rng, documents)
+    index = search.RoleIndex()
+    index.rebuild(documents)  # type: ignore
+
+    async def setup() -> search.RoleIndex:
+        return index
+
+    async def run(index: search.RoleIndex) -> None:
+        for query in queries:
+            index.search(query)
+
+    return Benchmark(
+        f"role_search[{amount}]",
+        setup,
+        run,
+        repeat=10,
+        operations=len(queries),
+    )
+
+
+def benchmarks() -> list[Benchmark]:
+    """
+    Get the role search benchmarks.
+
+    Returns:
+        list[Benchmark]: The benchmarks.
+    """
+    return [
+        *map(build_benchmark, SIZES),
+        *map(search_benchmark, SIZES),
+    ]
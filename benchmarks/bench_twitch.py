@@ -0,0 +1,179 @@
+"""Benchmarks of the Twitch client, against the local stub server."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from benchmarks import fakes
+from benchmarks.harness import Benchmark
+from benchmarks.twitch_stub import TwitchStub, fake_user
+from bot import http_client, live, outbox, twitch
+
+if TYPE_CHECKING:
+    from bot import storage
+
+LOOKUPS = 1_000
+# lookups repeat logins, like several users asking for the same streamer.
+DISTINCT_LOGINS = 300
+# round trip time of the stub, roughly that of the real api.
+LATENCY = 0.02
+POLL_SIZES = (1_000, 10_000)
+# share of the channels that went live since the last poll.
+LIVE = 0.05
+# the stub accepts any application, it is used as both id and secret.
+STUB_APPLICATION = "benchmark"
+
+
+@dataclass
+class TwitchState:
+    """Stub server and a client pointed at it."""
+
+    stub: TwitchStub
+    http: http_client.HttpClient
+    client: twitch.TwitchClient
+
+
+async def start_stub() -> TwitchState:
+    """
+    Start a stub server and create a client pointed at it.
+
+    Returns:
+        TwitchState: The server and client, stop them with stop_stub.
+    """
+    stub = TwitchStub(LATENCY)
+    url = await stub.start()
+    http = http_client.HttpClient()
+    client = twitch.TwitchClient(
+        http,
+        client_id=STUB_APPLICATION,
+        client_secret=STUB_APPLICATION,
+        api_url=f"{url}/helix",
+        auth_url=f"{url}/oauth2",
+    )
+    return TwitchState(stub, http, client)
+
+
+async def stop_stub(state: TwitchState) -> None:
+    """
+    Close the client and stop the stub server.
+
+    Args:
+        state (TwitchState): The server and client.
+    """
+    await state.client.close()
+    await state.http.close()
+    await state.stub.stop()
+
+
+def lookups_benchmark(warm: bool) -> Benchmark:
+    """
+    Look up many users at once.
+
+    Args:
+        warm (bool): If every user is cached before the run.
+
+    Returns:
+        Benchmark: The benchmark.
+    """
+    # seeded, so every run measures the same data.
+    rng = random.Random(LOOKUPS)  # noqa: S311, DUO102
+    logins = [
+        f"streamer{rng.randrange(DISTINCT_LOGINS)}" for _ in range(LOOKUPS)
+    ]
+
+    async def setup() -> TwitchState:
+        state = await start_stub()
+        if warm:
+            await state.client.get_users(logins)
+        return state
+
+    async def run(state: TwitchState) -> None:
+        await asyncio.gather(*map(state.client.get_user, logins))
+
+    return Benchmark(
+        f"twitch_lookups[{'warm' if warm else 'cold'}]",
+        setup,
+        run,
+        repeat=10,
+        operations=LOOKUPS,
+        teardown=stop_stub,
+    )
+
+
+def poll_benchmark(amount: int) -> Benchmark:
+    """
+    Poll every registered channel once, while some went live.
+
+    Args:
+        amount (int): Amount of registered channels.
+
+    Returns:
+        Benchmark: The benchmark.
+    """
+    rng = random.Random(amount)  # noqa: S311, DUO102
+    logins = [f"streamer{index}" for index in range(amount)]
+    documents = [
+        {
+            "user_id": fake_user(login)["id"],
+            "login": login,
+            "discord_id": index,
+            "stream_id": None,
+        }
+        for index, login in enumerate(logins, 1)
+    ]
+
+    async def setup() -> tuple[TwitchState, storage.Storage, live.LivePoller]:
+        state = await start_stub()
+        for login in rng.sample(logins, int(amount * LIVE)):
+            state.stub.go_live(login)
+
+        store = await fakes.open_storage(
+            "memory", twitch_channels=map(dict, documents)
+        )
+        poller = live.LivePoller(
+            state.client,
+            store.twitch_channels,
+            outbox.Outbox(fakes.FakeRest()),  # type: ignore
+            channel_id=1,
+        )
+        await poller.load()
+        return state, store, poller
+
+    async def run(
+        state: tuple[TwitchState, storage.Storage, live.LivePoller]
+    ) -> None:
+        await state[2].poll()
+
+    async def teardown(
+        state: tuple[TwitchState, storage.Storage, live.LivePoller]
+    ) -> None:
+        stub_state, store, poller = state
+        await poller.messages.close()
+        await fakes.close_storage(store)
+        await stop_stub(stub_state)
+
+    return Benchmark(
+        f"twitch_poll[{amount}]",
+        setup,
+        run,
+        repeat=5,
+        operations=amount,
+        teardown=teardown,
+    )
+
+
+def benchmarks() -> list[Benchmark]:
+    """
+    Get the Twitch benchmarks.
+
+    Returns:
+        list[Benchmark]: The benchmarks.
+    """
+    return [
+        lookups_benchmark(warm=False),
+        lookups_benchmark(warm=True),
+        *map(poll_benchmark, POLL_SIZES),
+    ]
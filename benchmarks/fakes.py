@@ -0,0 +1,774 @@
+"""In-memory stand-ins for Mongo and Discord."""
+
+from __future__ import annotations
+
+import itertools
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import hikari
+from bson import ObjectId
+from hikari.impl import special_endpoints
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateOne
+
+from bot import storage
+from bot.storage.mongo import (
+    MongoBirthdayRepository,
+    MongoRoleInfoRepository,
+    MongoTwitchChannelRepository,
+)
+
+if TYPE_CHECKING:
+    from typing import Any, AsyncIterator, Callable, Iterable, Mapping
+
+    Document = dict[str, Any]
+    Predicate = Callable[[Document], bool]
+
+
+_COMPARISONS: dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+}
+# the pymongo operations bulk_write applies.
+_WRITE_OPERATIONS = (InsertOne, UpdateOne, ReplaceOne, DeleteOne, DeleteMany)
+
+
+def _compile_condition(key: str, condition: Any) -> Predicate:
+    """
+    Turn the condition on a single field into a predicate.
+
+    Args:
+        key (str): Name of the field.
+        condition (Any): A value to equal, or a dict of operators.
+
+    Returns:
+        Predicate: Checks if a document matches the condition.
+
+    Raises:
+        NotImplementedError: The condition uses an unsupported operator.
+    """
+    if not isinstance(condition, dict):
+        return lambda document: document.get(key) == condition
+
+    checks: list[Predicate] = []
+    for operator, operand in condition.items():
+        if operator != "$in" and operator not in _COMPARISONS:
+            raise NotImplementedError(f"Unsupported operator {operator!r}")
+
+        if operator == "$in":
+            checks.append(
+                lambda document, options=set(operand): document.get(key)
+                in options
+            )
+        else:
+            compare = _COMPARISONS[operator]
+            checks.append(
+                lambda document, compare=compare, operand=operand: compare(
+                    document.get(key), operand
+                )
+            )
+
+    return lambda document: all(check(document) for check in checks)
+
+
+def compile_query(query: Mapping[str, Any] | None) -> Predicate:
+    """
+    Turn a Mongo query into a predicate.
+
+    Only the subset of the query language used by the bot is supported.
+
+    Args:
+        query (Mapping[str, Any] | None): The query, None matches everything.
+
+    Returns:
+        Predicate: Checks if a document matches the query.
+    """
+    checks = [
+        _compile_condition(key, condition)
+        for key, condition in (query or {}).items()
+    ]
+    return lambda document: all(check(document) for check in checks)
+
+
+def _project(
+    document: Document, projection: Mapping[str, Any] | None
+) -> Document:
+    """
+    Copy a document, keeping only the projected fields.
+
+    Args:
+        document (Document): The stored document.
+        projection (Mapping[str, Any] | None): Fields to keep, None keeps all.
+
+    Returns:
+        Document: The copy handed to the caller.
+    """
+    if projection is None:
+        return dict(document)
+
+    # like Mongo, _id is included unless it is excluded explicitly.
+    include_id = projection.get("_id", True)
+    fields = {
+        key: include for key, include in projection.items() if key != "_id"
+    }
+
+    if fields and any(fields.values()):
+        copy = {key: document[key] for key in fields if key in document}
+    else:
+        copy = {
+            key: value
+            for key, value in document.items()
+            if key != "_id" and key not in fields
+        }
+
+    if include_id:
+        copy["_id"] = document["_id"]
+    return copy
+
+
+class MemoryCursor:
+    """The part of AsyncIOMotorCursor the bot uses."""
+
+    def __init__(self, documents: Iterable[Document]) -> None:
+        """
+        Create a cursor over documents that are already projected.
+
+        Args:
+            documents (Iterable[Document]): The documents.
+        """
+        self._documents = documents
+        self._limit = 0
+
+    def limit(self, limit: int) -> MemoryCursor:
+        """
+        Limit the amount of documents returned.
+
+        Args:
+            limit (int): The limit, 0 is no limit.
+
+        Returns:
+            MemoryCursor: This cursor.
+        """
+        self._limit = limit
+        return self
+
+    async def __aiter__(self) -> AsyncIterator[Document]:
+        """
+        Iterate over the documents.
+
+        Yields:
+            Document: A document.
+        """
+        documents = self._documents
+        if self._limit:
+            documents = itertools.islice(documents, self._limit)
+
+        # yield from is not allowed in an async generator.
+        for document in documents:  # noqa: SIM104
+            yield document
+
+    async def to_list(self, length: int | None) -> list[Document]:
+        """
+        Get the documents in a list.
+
+        Args:
+            length (int | None): Max amount of documents, None for all.
+
+        Returns:
+            list[Document]: The documents.
+        """
+        if length is not None:
+            self.limit(length)
+        return [document async for document in self]
+
+
+@dataclass
+class BulkWriteResult:
+    """Counts of a bulk write."""
+
+    inserted_count: int = 0
+    modified_count: int = 0
+    deleted_count: int = 0
+
+
+class MemoryCollection:
+    """
+    The part of AsyncIOMotorCollection the bot uses, stored in a dict.
+
+    Documents are keyed by _id, like Mongo every read returns copies. Fields
+    named in unique are indexed, so equality and $in lookups on them do not
+    scan the collection, like the indexes declared in bot.indexes.
+    """
+
+    def __init__(
+        self, documents: Iterable[Document] = (), unique: Iterable[str] = ()
+    ) -> None:
+        """
+        Create a collection.
+
+        Args:
+            documents (Iterable[Document]): Documents to store, they get an
+                _id if they have none. Defaults to ().
+            unique (Iterable[str]): Fields with a unique index. Defaults to ().
+        """
+        self._documents: dict[Any, Document] = {}
+        self._indexes: dict[str, dict[Any, Any]] = {key: {} for key in unique}
+        for document in documents:
+            self._store(document)
+
+    def __len__(self) -> int:
+        """
+        Get the amount of documents.
+
+        Returns:
+            int: The amount of documents.
+        """
+        return len(self._documents)
+
+    def _candidates(
+        self, query: Mapping[str, Any] | None
+    ) -> Iterable[Document]:
+        """
+        Get the documents that could match, using an index when possible.
+
+        Args:
+            query (Mapping[str, Any] | None): The query.
+
+        Returns:
+            Iterable[Document]: Stored documents, not copies.
+        """
+        query = query or {}
+        _id = query.get("_id")
+        if _id is not None and not isinstance(_id, dict):
+            return [self._documents[_id]] if _id in self._documents else []
+
+        for key, index in self._indexes.items():
+            condition = query.get(key)
+            if condition is None:
+                continue
+
+            if isinstance(condition, dict):
+                if "$in" not in condition:
+                    continue
+                values = condition["$in"]
+            else:
+                values = [condition]
+
+            ids = (index.get(value) for value in dict.fromkeys(values))
+            return [self._documents[_id] for _id in ids if _id is not None]
+
+        return list(self._documents.values())
+
+    def _matching(self, query: Mapping[str, Any] | None) -> list[Document]:
+        """
+        Get the stored documents matching a query.
+
+        Args:
+            query (Mapping[str, Any] | None): The query.
+
+        Returns:
+            list[Document]: Stored documents, not copies.
+        """
+        predicate = compile_query(query)
+        return [
+            document
+            for document in self._candidates(query)
+            if predicate(document)
+        ]
+
+    def _store(self, document: Document) -> None:
+        """
+        Store a document, giving it an _id if it has none.
+
+        Args:
+            document (Document): The document, gets the _id like in pymongo.
+        """
+        document.setdefault("_id", ObjectId())
+        stored = dict(document)
+        self._documents[stored["_id"]] = stored
+        for key, index in self._indexes.items():
+            if key in stored:
+                index[stored[key]] = stored["_id"]
+
+    def _update(self, document: Document, update: Mapping[str, Any]) -> None:
+        """
+        Apply a $set update to a stored document.
+
+        Args:
+            document (Document): The stored document.
+            update (Mapping[str, Any]): The update.
+
+        Raises:
+            NotImplementedError: The update is not a $set.
+        """
+        if set(update) != {"$set"}:
+            raise NotImplementedError("Only $set updates are supported")
+
+        for key, value in update["$set"].items():
+            if key in self._indexes:
+                self._indexes[key].pop(document.get(key), None)
+                self._indexes[key][value] = document["_id"]
+            document[key] = value
+
+    def _delete(self, document: Document) -> None:
+        """
+        Remove a stored document.
+
+        Args:
+            document (Document): The stored document.
+        """
+        del self._documents[document["_id"]]
+        for key, index in self._indexes.items():
+            index.pop(document.get(key), None)
+
+    def find(
+        self,
+        query: Mapping[str, Any] | None = None,
+        projection: Mapping[str, Any] | None = None,
+    ) -> MemoryCursor:
+        """
+        Find the documents matching a query.
+
+        Args:
+            query (Mapping[str, Any] | None): The query. Defaults to None.
+            projection (Mapping[str, Any] | None): Fields to return.
+                Defaults to None, which returns all fields.
+
+        Returns:
+            MemoryCursor: Cursor over copies of the documents.
+        """
+        return MemoryCursor(
+            _project(document, projection) for document in self._matching(query)
+        )
+
+    async def find_one(
+        self,
+        query: Mapping[str, Any] | None = None,
+        projection: Mapping[str, Any] | None = None,
+    ) -> Document | None:
+        """
+        Find the first document matching a query.
+
+        Args:
+            query (Mapping[str, Any] | None): The query. Defaults to None.
+            projection (Mapping[str, Any] | None): Fields to return.
+                Defaults to None, which returns all fields.
+
+        Returns:
+            Document | None: A copy of the document, None if nothing matches.
+        """
+        documents = self._matching(query)
+        return _project(documents[0], projection) if documents else None
+
+    async def insert_one(self, document: Document) -> None:
+        """
+        Insert a document.
+
+        Args:
+            document (Document): The document, gets an _id like in pymongo.
+        """
+        self._store(document)
+
+    async def insert_many(self, documents: Iterable[Document]) -> None:
+        """
+        Insert documents.
+
+        Args:
+            documents (Iterable[Document]): The documents.
+        """
+        for document in documents:
+            self._store(document)
+
+    async def update_one(
+        self, query: Mapping[str, Any], update: Mapping[str, Any]
+    ) -> None:
+        """
+        Update the first document matching a query.
+
+        Args:
+            query (Mapping[str, Any]): The query.
+            update (Mapping[str, Any]): A $set update.
+        """
+        documents = self._matching(query)
+        if documents:
+            self._update(documents[0], update)
+
+    async def delete_one(self, query: Mapping[str, Any]) -> None:
+        """
+        Delete the first document matching a query.
+
+        Args:
+            query (Mapping[str, Any]): The query.
+        """
+        documents = self._matching(query)
+        if documents:
+            self._delete(documents[0])
+
+    async def delete_many(self, query: Mapping[str, Any]) -> None:
+        """
+        Delete every document matching a query.
+
+        Args:
+            query (Mapping[str, Any]): The query.
+        """
+        for document in self._matching(query):
+            self._delete(document)
+
+    async def bulk_write(
+        self, operations: Iterable[Any], ordered: bool = True
+    ) -> BulkWriteResult:
+        """
+        Apply pymongo write operations in order.
+
+        Args:
+            operations (Iterable[Any]): InsertOne, UpdateOne, ReplaceOne,
+                DeleteOne and DeleteMany operations.
+            ordered (bool): Ignored, nothing fails in memory. Defaults to True.
+
+        Returns:
+            BulkWriteResult: What was written.
+
+        Raises:
+            NotImplementedError: An operation is not supported.
+        """
+        result = BulkWriteResult()
+        for operation in operations:
+            if not isinstance(operation, _WRITE_OPERATIONS):
+                raise NotImplementedError(
+                    f"Unsupported operation {operation!r}"
+                )
+
+            # pymongo keeps the arguments of operations in private fields.
+            if isinstance(operation, InsertOne):
+                self._store(operation._doc)
+                result.inserted_count += 1
+            elif isinstance(operation, UpdateOne):
+                documents = self._matching(operation._filter)
+                if documents:
+                    self._update(documents[0], operation._doc)
+                    result.modified_count += 1
+            elif isinstance(operation, ReplaceOne):
+                documents = self._matching(operation._filter)
+                if documents:
+                    self._delete(documents[0])
+                self._store(dict(operation._doc))
+                result.modified_count += 1
+            else:
+                documents = self._matching(operation._filter)
+                if isinstance(operation, DeleteOne):
+                    documents = documents[:1]
+                for document in documents:
+                    self._delete(document)
+                result.deleted_count += len(documents)
+
+        return result
+
+
+class MemoryStorage(storage.Storage):
+    """The Mongo repositories, on in-memory collections."""
+
+    def __init__(
+        self,
+        roles: Iterable[Document] = (),
+        birthdays: Iterable[Document] = (),
+        twitch_channels: Iterable[Document] = (),
+    ) -> None:
+        """
+        Create the storage.
+
+        Args:
+            roles (Iterable[Document]): Role info documents to store.
+                Defaults to ().
+            birthdays (Iterable[Document]): Birthday documents to store.
+                Defaults to ().
+            twitch_channels (Iterable[Document]): Twitch channel documents
+                to store. Defaults to ().
+        """
+        self.roles = MongoRoleInfoRepository(
+            MemoryCollection(roles, unique=("role_id",))  # type: ignore
+        )
+        self.birthdays = MongoBirthdayRepository(
+            MemoryCollection(birthdays, unique=("discord_id",))  # type: ignore
+        )
+        self.twitch_channels = MongoTwitchChannelRepository(
+            MemoryCollection(twitch_channels, unique=("user_id",))  # type: ignore
+        )
+
+    async def prepare(self) -> None:
+        """Do nothing, there is nothing to prepare."""
+
+    async def ping(self) -> None:
+        """Do nothing, memory is always there."""
+
+    async def close(self) -> None:
+        """Do nothing, there is nothing to close."""
+
+
+BACKENDS = ("memory", "sqlite")
+
+
+async def open_storage(
+    backend: str,
+    roles: Iterable[Document] = (),
+    birthdays: Iterable[Document] = (),
+    twitch_channels: Iterable[Document] = (),
+) -> storage.Storage:
+    """
+    Create a storage filled with documents.
+
+    Args:
+        backend (str): "memory", or "sqlite" for a SQLite file in a
+            temporary directory.
+        roles (Iterable[Document]): Role info documents to store.
+            Defaults to ().
+        birthdays (Iterable[Document]): Birthday documents to store.
+            Defaults to ().
+        twitch_channels (Iterable[Document]): Twitch channel documents to
+            store. Defaults to ().
+
+    Returns:
+        storage.Storage: The storage, close it with close_storage.
+    """
+    if backend == "memory":
+        return MemoryStorage(roles, birthdays, twitch_channels)
+
+    directory = tempfile.mkdtemp(prefix="bot-benchmark-")
+    store = storage.SQLiteStorage(os.path.join(directory, "bot.sqlite3"))
+    await store.prepare()
+    await store.roles.upsert_many(list(roles))  # type: ignore
+    await store.birthdays.upsert_many(list(birthdays))  # type: ignore
+    await store.twitch_channels.upsert_many(
+        list(twitch_channels)  # type: ignore
+    )
+    return store
+
+
+async def close_storage(store: storage.Storage) -> None:
+    """
+    Close a storage and delete its files.
+
+    Args:
+        store (storage.Storage): Storage created by open_storage.
+    """
+    await store.close()
+    if isinstance(store, storage.SQLiteStorage):
+        directory = os.path.dirname(store.path)
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+@dataclass(frozen=True)
+class FakeMessage:
+    """A sent message, only the id is used."""
+
+    id: int  # noqa: A003
+
+
+@dataclass(frozen=True)
+class FakeRole:
+    """The part of hikari.Role the bot uses."""
+
+    id: int  # noqa: A003
+    name: str
+    color: hikari.Color
+
+
+@dataclass(frozen=True)
+class FakeGuild:
+    """The part of hikari.RESTGuild the bot uses."""
+
+    roles: dict[int, FakeRole]
+
+    def get_roles(self) -> dict[int, FakeRole]:
+        """
+        Get the roles of the guild.
+
+        Returns:
+            dict[int, FakeRole]: The roles, keyed by id.
+        """
+        return self.roles
+
+
+@dataclass
+class FakeRest:
+    """The part of hikari.impl.RESTClientImpl the bot uses, counting calls."""
+
+    guild: FakeGuild = field(default_factory=lambda: FakeGuild({}))
+    calls: int = 0
+    _ids: Iterable[int] = field(default_factory=lambda: itertools.count(1))
+
+    def build_action_row(self) -> special_endpoints.ActionRowBuilder:
+        """
+        Create a real action row builder, building is part of the work.
+
+        Returns:
+            special_endpoints.ActionRowBuilder: The builder.
+        """
+        return special_endpoints.ActionRowBuilder()
+
+    async def fetch_guild(self, guild: int) -> FakeGuild:
+        """
+        Get the guild.
+
+        Args:
+            guild (int): Ignored, there is only one guild.
+
+        Returns:
+            FakeGuild: The guild.
+        """
+        self.calls += 1
+        return self.guild
+
+    async def create_message(
+        self, channel: int, *args: Any, **kwargs: Any
+    ) -> FakeMessage:
+        """
+        Pretend to send a message.
+
+        Args:
+            channel (int): Ignored.
+            *args (Any): Ignored.
+            **kwargs (Any): Ignored.
+
+        Returns:
+            FakeMessage: The message, with a new id.
+        """
+        self.calls += 1
+        return FakeMessage(next(self._ids))  # type: ignore
+
+    async def create_interaction_response(
+        self, *args: Any, **kwargs: Any
+    ) -> None:
+        """
+        Pretend to respond to an interaction.
+
+        Args:
+            *args (Any): Ignored.
+            **kwargs (Any): Ignored.
+        """
+        self.calls += 1
+
+
+@dataclass
+class FakeBot:
+    """The part of hikari.GatewayBot the bot uses."""
+
+    rest: FakeRest
+
+
+@dataclass
+class FakeScheduler:
+    """The part of AsyncIOScheduler the bot uses, jobs never run."""
+
+    jobs: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def add_job(self, func: Any, trigger: str, **kwargs: Any) -> None:
+        """
+        Store a job by id.
+
+        Args:
+            func (Any): Ignored.
+            trigger (str): Ignored.
+            **kwargs (Any): Arguments of the job, including the id.
+        """
+        self.jobs[kwargs["id"]] = kwargs
+
+    def get_job(self, job_id: str) -> dict[str, Any] | None:
+        """
+        Get a job.
+
+        Args:
+            job_id (str): Id of the job.
+
+        Returns:
+            dict[str, Any] | None: Arguments of the job, None if there is none.
+        """
+        return self.jobs.get(job_id)
+
+    def remove_job(self, job_id: str) -> None:
+        """
+        Remove a job.
+
+        Args:
+            job_id (str): Id of the job.
+        """
+        del self.jobs[job_id]
+
+
+@dataclass
+class FakeClient:
+    """The part of tanjun.Client the helpers use."""
+
+    dependencies: dict[type, Any] = field(default_factory=dict)
+
+    def get_type_dependency(self, type_: type) -> Any:
+        """
+        Get a registered dependency.
+
+        Args:
+            type_ (type): Type the dependency is registered as.
+
+        Returns:
+            Any: The dependency.
+        """
+        return self.dependencies[type_]
+
+
+@dataclass
+class FakeContext:
+    """The part of tanjun.SlashContext the commands use."""
+
+    rest: FakeRest
+    client: FakeClient = field(default_factory=FakeClient)
+    channel_id: int = 0
+    triggering_name: str = "benchmark"
+    responses: int = 0
+    on_respond: Callable[[FakeMessage, dict[str, Any]], None] | None = None
+
+    async def respond(self, *args: Any, **kwargs: Any) -> FakeMessage:
+        """
+        Pretend to respond.
+
+        Args:
+            *args (Any): Ignored.
+            **kwargs (Any): Passed to on_respond, with the response.
+
+        Returns:
+            FakeMessage: The response, with a new id.
+        """
+        self.responses += 1
+        message = await self.rest.create_message(0)
+        if self.on_respond is not None:
+            self.on_respond(message, kwargs)
+        return message
+
+
+def component_interaction(
+    rest: FakeRest, custom_id: str, message_id: int
+) -> hikari.ComponentInteraction:
+    """
+    Create a button press, the router only accepts real interactions.
+
+    Args:
+        rest (FakeRest): Rest client the response is sent with.
+        custom_id (str): Custom id of the pressed button.
+        message_id (int): Id of the message the button is on.
+
+    Returns:
+        hikari.ComponentInteraction: The interaction, only the fields used by
+            the bot are set.
+    """
+    interaction = object.__new__(hikari.ComponentInteraction)
+    interaction.app = FakeBot(rest)  # type: ignore
+    interaction.id = hikari.Snowflake(message_id)
+    interaction.token = "benchmark"  # noqa: S105
+    interaction.custom_id = custom_id
+    interaction.message = FakeMessage(message_id)  # type: ignore
+    return interaction
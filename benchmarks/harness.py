@@ -0,0 +1,185 @@
+"""Running benchmarks and comparing them to a baseline."""
+
+from __future__ import annotations
+
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+from bot.tracing import percentile
+
+if TYPE_CHECKING:
+    import pathlib
+    from typing import Any, Awaitable, Callable, Iterable
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """
+    A piece of work to time.
+
+    setup runs before every run and teardown after it, neither is timed, so
+    each run can get fresh state. A single run can do several operations,
+    like answering a batch of prompts, the throughput is reported per
+    operation.
+    """
+
+    name: str
+    setup: Callable[[], Awaitable[Any]]
+    run: Callable[[Any], Awaitable[None]]
+    repeat: int
+    operations: int = 1
+    teardown: Callable[[Any], Awaitable[None]] | None = None
+
+
+@dataclass(frozen=True)
+class Result:
+    """Measurements of a benchmark, times in seconds and memory in bytes."""
+
+    name: str
+    ops_per_second: float
+    p50: float
+    p95: float
+    p99: float
+    peak_memory: int
+
+    def describe(self) -> str:
+        """
+        Get a single line summary.
+
+        Returns:
+            str: The summary.
+        """
+        return (
+            f"{self.name:<32} {self.ops_per_second:>12.1f} ops/s  "
+            f"p50 {self.p50 * 1000:>9.3f} ms  "
+            f"p95 {self.p95 * 1000:>9.3f} ms  "
+            f"p99 {self.p99 * 1000:>9.3f} ms  "
+            f"peak {self.peak_memory / 1024:>10.1f} KiB"
+        )
+
+
+async def measure(benchmark: Benchmark) -> Result:
+    """
+    Time every run of a benchmark, then measure the allocations of one more.
+
+    The allocations are measured separately, tracemalloc slows down the code
+    it traces.
+
+    Args:
+        benchmark (Benchmark): The benchmark.
+
+    Returns:
+        Result: The measurements.
+    """
+    durations: list[float] = []
+    for _ in range(benchmark.repeat):
+        state = await benchmark.setup()
+        gc.collect()
+
+        start = time.perf_counter()
+        await benchmark.run(state)
+        durations.append(time.perf_counter() - start)
+
+        if benchmark.teardown is not None:
+            await benchmark.teardown(state)
+
+    state = await benchmark.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await benchmark.run(state)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        if benchmark.teardown is not None:
+            await benchmark.teardown(state)
+
+    return Result(
+        name=benchmark.name,
+        ops_per_second=benchmark.operations * len(durations) / sum(durations),
+        p50=percentile(durations, 0.5),
+        p95=percentile(durations, 0.95),
+        p99=percentile(durations, 0.99),
+        peak_memory=peak_memory,
+    )
+
+
+def load_baseline(path: pathlib.Path) -> dict[str, Result]:
+    """
+    Load stored results.
+
+    Args:
+        path (pathlib.Path): The JSON file.
+
+    Returns:
+        dict[str, Result]: The results by name, empty if there is no file.
+    """
+    if not path.exists():
+        return {}
+
+    with path.open() as file:
+        return {name: Result(**data) for name, data in json.load(file).items()}
+
+
+def save_baseline(path: pathlib.Path, results: Iterable[Result]) -> None:
+    """
+    Store results, replacing stored results with the same name.
+
+    Args:
+        path (pathlib.Path): The JSON file.
+        results (Iterable[Result]): The results.
+    """
+    baseline = load_baseline(path)
+    baseline.update((result.name, result) for result in results)
+
+    with path.open("w") as file:
+        json.dump(
+            {name: asdict(result) for name, result in sorted(baseline.items())},
+            file,
+            indent=4,
+        )
+        file.write("\n")
+
+
+def regressions(
+    result: Result, baseline: Result, threshold: float
+) -> list[str]:
+    """
+    Compare a result to its baseline.
+
+    Args:
+        result (Result): The new result.
+        baseline (Result): The stored result.
+        threshold (float): Allowed change, as a fraction like 0.25.
+
+    Returns:
+        list[str]: A description of every measurement that got worse by more
+            than the threshold.
+    """
+    found: list[str] = []
+
+    if result.ops_per_second < baseline.ops_per_second * (1 - threshold):
+        found.append(
+            f"{result.name}: {result.ops_per_second:.1f} ops/s, "
+            f"baseline {baseline.ops_per_second:.1f} ops/s"
+        )
+
+    for field in ("p50", "p95", "p99"):
+        new, old = getattr(result, field), getattr(baseline, field)
+        if new > old * (1 + threshold):
+            found.append(
+                f"{result.name}: {field} {new * 1000:.3f} ms, "
+                f"baseline {old * 1000:.3f} ms"
+            )
+
+    if result.peak_memory > baseline.peak_memory * (1 + threshold):
+        found.append(
+            f"{result.name}: peak {result.peak_memory / 1024:.1f} KiB, "
+            f"baseline {baseline.peak_memory / 1024:.1f} KiB"
+        )
+
+    return found
@@ -0,0 +1,346 @@
+"""
+Local stand-in for the Twitch oauth and helix apis.
+
+    python -m benchmarks.twitch_stub --port 8081
+
+Then run the bot with TWITCH_API_URL=http://127.0.0.1:8081/helix and
+TWITCH_AUTH_URL=http://127.0.0.1:8081/oauth2. Every login exists, except
+logins starting with "missing". Users go live and offline with
+TwitchStub.go_live and go_offline, or at random with --live-chance.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import random
+import secrets
+import time
+import zlib
+
+from aiohttp import web
+
+MAX_IDS = 100
+TOKEN_LIFETIME = 3600
+# points of the rate limit bucket, refilled every minute.
+RATE_LIMIT = 800
+
+
+def fake_user(login: str) -> dict[str, object]:
+    """
+    Create the user of a login, the same every time.
+
+    Args:
+        login (str): The login.
+
+    Returns:
+        dict[str, object]: The user, as helix returns it.
+    """
+    seed = zlib.crc32(login.encode())
+    return {
+        "id": str(seed),
+        "login": login,
+        "display_name": login.capitalize(),
+        "type": "",
+        "broadcaster_type": ("", "affiliate", "partner")[seed % 3],
+        "description": f"Streams as {login}.",
+        "profile_image_url": "",
+        "offline_image_url": "",
+        "view_count": seed % 100_000,
+        "created_at": "2016-12-14T20:32:28Z",
+    }
+
+
+def fake_stream(user_id: str, login: str, stream_id: str) -> dict[str, object]:
+    """
+    Create a live stream of a user.
+
+    Args:
+        user_id (str): Twitch id of the user.
+        login (str): Login of the user.
+        stream_id (str): Id of the stream.
+
+    Returns:
+        dict[str, object]: The stream, as helix returns it.
+    """
+    return {
+        "id": stream_id,
+        "user_id": user_id,
+        "user_login": login,
+        "user_name": login.capitalize(),
+        "game_id": "509658",
+        "game_name": "Just Chatting",
+        "type": "live",
+        "title": f"{login} is streaming",
+        "viewer_count": int(user_id) % 1000,
+        "started_at": "2021-11-01T18:00:00Z",
+        "language": "en",
+        "thumbnail_url": "https://static-cdn.jtvnw.net/previews-ttv/"
+        f"live_user_{login}-{{width}}x{{height}}.jpg",
+    }
+
+
+class TwitchStub:
+    """Http server answering like Twitch, counting the requests."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """
+        Create the server, it is not listening yet.
+
+        Args:
+            latency (float): Seconds every answer is delayed. Defaults to 0.
+        """
+        self.latency = latency
+        self.tokens: set[str] = set()
+        self.user_requests = 0
+        self.stream_requests = 0
+        # user id -> (login, stream id) of the users that are live.
+        self.streams: dict[str, tuple[str, str]] = {}
+        self._stream_ids = itertools.count(1)
+        self._bucket = RATE_LIMIT
+        self._bucket_reset = 0.0
+
+        app = web.Application()
+        app.router.add_post("/oauth2/token", self.handle_token)
+        app.router.add_get("/helix/users", self.handle_users)
+        app.router.add_get("/helix/streams", self.handle_streams)
+        self._runner = web.AppRunner(app, access_log=None)
+
+    def go_live(self, login: str) -> str:
+        """
+        Start a new stream of a user.
+
+        Args:
+            login (str): Login of the user.
+
+        Returns:
+            str: Twitch id of the user.
+        """
+        user_id = str(fake_user(login)["id"])
+        self.streams[user_id] = (login, str(next(self._stream_ids)))
+        return user_id
+
+    def go_offline(self, login: str) -> None:
+        """
+        End the stream of a user.
+
+        Args:
+            login (str): Login of the user.
+        """
+        self.streams.pop(str(fake_user(login)["id"]), None)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Start listening.
+
+        Args:
+            host (str): Address to bind to. Defaults to "127.0.0.1".
+            port (int): Port to bind to. Defaults to 0, any free port.
+
+        Returns:
+            str: Base url of the server.
+        """
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        return f"http://{bound_host}:{bound_port}"
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        await self._runner.cleanup()
+
+    async def handle_token(self, request: web.Request) -> web.Response:
+        """
+        Hand out an app access token.
+
+        Args:
+            request (web.Request): The request.
+
+        Returns:
+            web.Response: The token.
+        """
+        await asyncio.sleep(self.latency)
+        if request.query.get("grant_type") != "client_credentials":
+            return web.json_response({"message": "bad grant"}, status=400)
+
+        token = secrets.token_hex(15)
+        self.tokens.add(token)
+        return web.json_response(
+            {
+                "access_token": token,
+                "expires_in": TOKEN_LIFETIME,
+                "token_type": "bearer",  # noqa: S105
+            }
+        )
+
+    async def handle_users(self, request: web.Request) -> web.Response:
+        """
+        Get users by login.
+
+        Args:
+            request (web.Request): The request.
+
+        Returns:
+            web.Response: The users that exist.
+        """
+        await asyncio.sleep(self.latency)
+        self.user_requests += 1
+
+        logins = request.query.getall("login", [])
+        error = self._check(request, logins)
+        if error is not None:
+            return error
+
+        return self._json(
+            [
+                fake_user(login)
+                for login in logins
+                if not login.startswith("missing")
+            ]
+        )
+
+    async def handle_streams(self, request: web.Request) -> web.Response:
+        """
+        Get the live streams of users by id.
+
+        Args:
+            request (web.Request): The request.
+
+        Returns:
+            web.Response: The streams of the users that are live.
+        """
+        await asyncio.sleep(self.latency)
+        self.stream_requests += 1
+
+        user_ids = request.query.getall("user_id", [])
+        error = self._check(request, user_ids)
+        if error is not None:
+            return error
+
+        return self._json(
+            [
+                fake_stream(user_id, *self.streams[user_id])
+                for user_id in user_ids
+                if user_id in self.streams
+            ]
+        )
+
+    def _check(
+        self, request: web.Request, ids: list[str]
+    ) -> web.Response | None:
+        """
+        Check the token, the amount of ids and the rate limit of a request.
+
+        Args:
+            request (web.Request): The request.
+            ids (list[str]): The ids or logins the request asks for.
+
+        Returns:
+            web.Response | None: The error response, None if it is fine.
+        """
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if token not in self.tokens:
+            return web.json_response({"message": "Invalid token"}, status=401)
+
+        if len(ids) > MAX_IDS:
+            return web.json_response({"message": "Too many ids"}, status=400)
+
+        return None if self._take_point() else self._json([], status=429)
+
+    def _take_point(self) -> bool:
+        """
+        Take a point from the rate limit bucket, refilling it every minute.
+
+        Returns:
+            bool: If there was a point left.
+        """
+        now = time.time()
+        if now >= self._bucket_reset:
+            self._bucket = RATE_LIMIT
+            self._bucket_reset = now + 60
+        if self._bucket == 0:
+            return False
+        self._bucket -= 1
+        return True
+
+    def _json(
+        self, data: list[dict[str, object]], status: int = 200
+    ) -> web.Response:
+        """
+        Answer with data and the rate limit headers.
+
+        Args:
+            data (list[dict[str, object]]): The data.
+            status (int): Status of the response. Defaults to 200.
+
+        Returns:
+            web.Response: The response.
+        """
+        return web.json_response(
+            {"data": data},
+            status=status,
+            headers={
+                "Ratelimit-Limit": str(RATE_LIMIT),
+                "Ratelimit-Remaining": str(self._bucket),
+                "Ratelimit-Reset": str(int(self._bucket_reset)),
+            },
+        )
+
+    async def flip(
+        self, logins: list[str], chance: float, period: float
+    ) -> None:
+        """
+        Randomly start and end streams of users, forever.
+
+        Args:
+            logins (list[str]): Logins of the users.
+            chance (float): Chance a user changes state each period.
+            period (float): Seconds between changes.
+        """
+        while True:
+            for login in logins:
+                if random.random() < chance:  # noqa: S311, DUO102
+                    if str(fake_user(login)["id"]) in self.streams:
+                        self.go_offline(login)
+                    else:
+                        self.go_live(login)
+            await asyncio.sleep(period)
+
+
+async def main() -> None:
+    """Parse the command line and serve until interrupted."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.twitch_stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds to delay answers"
+    )
+    parser.add_argument(
+        "--live-chance",
+        type=float,
+        default=0.0,
+        help="chance each of the --live-logins changes state every minute",
+    )
+    parser.add_argument(
+        "--live-logins",
+        default="",
+        help="comma separated logins that go live and offline",
+    )
+    args = parser.parse_args()
+
+    stub = TwitchStub(args.latency)
+    url = await stub.start(args.host, args.port)
+    print(f"Twitch stub listening on {url}")
+    logins = [login for login in args.live_logins.split(",") if login]
+    try:
+        if logins and args.live_chance:
+            await stub.flip(logins, args.live_chance, 60)
+        else:
+            await asyncio.Event().wait()
+    finally:
+        await stub.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
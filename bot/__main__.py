@@ -1,12 +1,13 @@
 """Start the bot."""
 
-import dns.resolver
-
-from bot import constants
+from bot import constants, dns_cache, logs
 from bot.bot import create_bot
 
-dns.resolver.default_resolver = dns.resolver.Resolver(configure=False)
-dns.resolver.default_resolver.nameservers = constants.DNS_SERVERS
+logs.install()
+dns_cache.install()
 
 if __name__ == "__main__":
-    create_bot().run()
+    create_bot().run(
+        shard_ids=frozenset(constants.Sharding.SHARD_IDS) or None,
+        shard_count=constants.Sharding.SHARD_COUNT,
+    )
@@ -1,10 +1,13 @@
 """Bot core."""
+import asyncio
 import functools
 
 import hikari
 import tanjun
 
-from bot import constants, injectors
+from bot import constants, gateway, injectors, metrics, profiling
+from bot.profiling import profiler
+from bot.tracing import tracer
 
 tanjun.as_slash_command = functools.partial(
     tanjun.as_slash_command, default_to_ephemeral=constants.HIDE_MESSAGES
@@ -18,13 +21,49 @@ def create_bot() -> hikari.GatewayBot:
     Returns:
         hikari.GatewayBot: The bot instance created.
     """
-    intents = hikari.Intents.ALL
+    profiler.mark("imports")
+    modules = gateway.import_modules()
+    intents, cache = gateway.resolve_profile(constants.GATEWAY_PROFILE, modules)
 
-    bot = hikari.GatewayBot(constants.TOKEN, intents=intents)
+    bot = hikari.GatewayBot(
+        constants.TOKEN,
+        intents=intents,
+        cache_settings=hikari.CacheSettings(components=cache),
+    )
+    # with several workers, only the primary one declares the commands.
     client = tanjun.Client.from_gateway_bot(
-        bot, set_global_commands=constants.GUILD_ID
-    ).load_modules(*constants.Paths.modules.glob("*.py"))
+        bot,
+        set_global_commands=(
+            constants.GUILD_ID if constants.Sharding.PRIMARY else False
+        ),
+    )
+    for module in modules:
+        with profiler.phase(f"load: {module.__name__.rsplit('.', 1)[-1]}"):
+            client.load_modules(module.__name__)
 
     injectors.register_injectors(client)
+    client.set_type_dependency(profiling.StartupProfiler, profiler)
+    client.set_hooks(
+        tanjun.AnyHooks()
+        .set_pre_execution(tracer.start)
+        .set_post_execution(tracer.finish)
+        .set_on_success(metrics.count_command)
+    )
+
+    counter = gateway.EventCounter()
+    client.set_type_dependency(gateway.EventCounter, counter)
+    bot.subscribe(hikari.Event, counter.on_event)
+
+    metrics.EVENTS.callback = lambda: (
+        ((name,), count) for name, count in counter.counts.items()
+    )
+    metrics.GATEWAY_LATENCY.callback = lambda: [((), bot.heartbeat_latency)]
+    metrics.install_rate_limit_handler()
+
+    async def on_started(event: hikari.StartedEvent) -> None:
+        profiler.mark_ready()
+        asyncio.create_task(gateway.report_profile(intents, cache, counter))
+
+    bot.subscribe(hikari.StartedEvent, on_started)
 
     return bot
@@ -0,0 +1,254 @@
+"""In-memory caches for data stored in the db or fetched from apis."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Generic, Hashable, TypeVar
+
+from bot import constants
+
+if TYPE_CHECKING:
+    from bot.storage import RoleInfoRepository
+    from bot.types import RoleInfoDocument
+
+K = TypeVar("K", bound=Hashable)  # noqa: VNE001
+V = TypeVar("V")  # noqa: VNE001
+
+
+class RoleInfoCache:
+    """
+    Bounded LRU cache of role info documents, keyed by role id.
+
+    The cache is write-through: the role listeners write to the db and then
+    update the cache, so lookups only hit the db on a miss.
+    """
+
+    def __init__(self, max_size: int = constants.ROLE_INFO_CACHE_SIZE) -> None:
+        """
+        Create an empty cache.
+
+        Args:
+            max_size (int): Most documents to keep before evicting.
+                Defaults to constants.ROLE_INFO_CACHE_SIZE.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._documents: OrderedDict[int, RoleInfoDocument] = OrderedDict()
+
+    def __len__(self) -> int:
+        """
+        Get the amount of cached documents.
+
+        Returns:
+            int: The amount of cached documents.
+        """
+        return len(self._documents)
+
+    def __contains__(self, role_id: object) -> bool:
+        """
+        Check if a role is cached, without counting a hit or miss.
+
+        Args:
+            role_id (object): Id of the role to check.
+
+        Returns:
+            bool: If the role is cached.
+        """
+        return role_id in self._documents
+
+    def get(self, role_id: int) -> RoleInfoDocument | None:
+        """
+        Get a cached document.
+
+        Args:
+            role_id (int): Id of the role to get.
+
+        Returns:
+            RoleInfoDocument | None: The document, or None on a miss.
+        """
+        document = self._documents.get(role_id)
+        if document is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._documents.move_to_end(role_id)
+        return document
+
+    def set(self, document: RoleInfoDocument) -> None:  # noqa: A003
+        """
+        Add or replace a document, evicting the least recently used if full.
+
+        Args:
+            document (RoleInfoDocument): The document to cache.
+        """
+        role_id = document["role_id"]
+        self._documents[role_id] = document
+        self._documents.move_to_end(role_id)
+
+        while len(self._documents) > self.max_size:
+            self._documents.popitem(last=False)
+
+    def update(self, role_id: int, *, name: str, color: str) -> None:
+        """
+        Update the name and color of a cached document, if it is cached.
+
+        Args:
+            role_id (int): Id of the role to update.
+            name (str): The new name.
+            color (str): The new color, as a hex code.
+        """
+        document = self._documents.get(role_id)
+        if document is not None:
+            document["name"] = name
+            document["color"] = color
+
+    def remove(self, role_id: int) -> None:
+        """
+        Remove a document from the cache, if it is cached.
+
+        Args:
+            role_id (int): Id of the role to remove.
+        """
+        self._documents.pop(role_id, None)
+
+    def clear(self) -> None:
+        """Remove all documents and reset the hit/miss counts."""
+        self._documents.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Get the fraction of lookups served from the cache.
+
+        Returns:
+            float: Hits divided by lookups, 0 if there has been no lookups.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    async def load(self, repository: RoleInfoRepository) -> None:
+        """
+        Replace the cache content with the documents in the db.
+
+        Args:
+            repository (RoleInfoRepository): Db to load the documents from.
+        """
+        self.clear()
+        async for document in repository.documents():
+            if len(self) >= self.max_size:
+                break
+            self.set(document)
+
+    async def fetch(
+        self, repository: RoleInfoRepository, role_id: int
+    ) -> RoleInfoDocument | None:
+        """
+        Get a document from the cache, falling back to the db on a miss.
+
+        Args:
+            repository (RoleInfoRepository): Db to get the document from on a miss.
+            role_id (int): Id of the role to get.
+
+        Returns:
+            RoleInfoDocument | None: The document, or None if it is not in the db.
+        """
+        document = self.get(role_id)
+        if document is None:
+            document = await repository.get(role_id)
+            if document is not None:
+                self.set(document)
+
+        return document
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded LRU cache whose entries expire a while after being set."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """
+        Create an empty cache.
+
+        Args:
+            max_size (int): Most entries to keep before evicting.
+            ttl (float): Default seconds an entry stays valid.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # key -> (expiry on the monotonic clock, value).
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """
+        Get the amount of entries, expired ones included until evicted.
+
+        Returns:
+            int: The amount of entries.
+        """
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        """
+        Check if a key has a valid entry, without counting a hit or miss.
+
+        Args:
+            key (object): The key.
+
+        Returns:
+            bool: If the key has a valid entry.
+        """
+        entry = self._entries.get(key)  # type: ignore
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: K) -> tuple[bool, V | None]:
+        """
+        Get a valid entry.
+
+        Args:
+            key (K): The key.
+
+        Returns:
+            tuple[bool, V | None]: If there was a valid entry and its value,
+                a found value can be None if None was set.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return True, entry[1]
+
+    def set(  # noqa: A003
+        self, key: K, value: V, ttl: float | None = None
+    ) -> None:
+        """
+        Add or replace an entry, evicting the least recently used if full.
+
+        Args:
+            key (K): The key.
+            value (V): The value.
+            ttl (float | None): Seconds the entry stays valid.
+                Defaults to None, which uses the cache's ttl.
+        """
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the hit/miss counts."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
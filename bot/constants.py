@@ -21,6 +21,10 @@ DNS_SERVERS = [
     # Cloudflare
     "1.1.1.1",
 ]
+# Answers are cached for at least this many seconds, longer if their TTL is,
+# so reconnects and SRV rescans reuse the SRV and TXT records of the db.
+DNS_CACHE_TTL = float(os.getenv("DNS_CACHE_TTL", 300))
+DNS_CACHE_SIZE = 256
 
 
 def load_required(key: str) -> str:
@@ -44,8 +48,12 @@ def load_required(key: str) -> str:
 
 TOKEN = load_required("DISCORD_TOKEN")
 
-DATABASE_URI = load_required("DATABASE_URI")
-DATABASE_NAME = load_required("DATABASE_NAME")
+# "mongo" stores data in DATABASE_URI, "sqlite" in the file at SQLITE_PATH.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+# only required by the mongo backend, storage.create_storage checks them.
+DATABASE_URI = os.getenv("DATABASE_URI", "")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "bot.sqlite3")
 
 # Testing unhides all messages.
 # WARNING: DO NOT ENABLE IN PROD
@@ -55,11 +63,39 @@ HIDE_MESSAGES = not TESTING
 # Default to real server
 BOT_OWNER_ID = int(os.getenv("BOT_OWNER_ID", 366331361583169537))
 ADMIN_ROLE_ID = int(os.getenv("ADMIN_ROLE_ID", 797573934848802817))
+# Members of any of these roles may use admin commands, comma separated.
+ADMIN_ROLE_IDS = frozenset(
+    int(id_)
+    for id_ in os.getenv("ADMIN_ROLE_IDS", str(ADMIN_ROLE_ID)).split(",")
+    if id_
+)
 
 GUILD_ID = int(os.getenv("GUILD_ID", 797571990176661504))
 LOG_CHANNEL_ID = int(os.getenv("LOG_CHANNEL_ID", 876494154354528316))
 BIRTHDAY_CHANNEL_ID = int(os.getenv("BIRTHDAY_CHANNEL_ID", 801157827145760768))
 
+# Time zone of birthdays registered without one.
+DEFAULT_TIMEZONE = os.getenv("DEFAULT_TIMEZONE", "UTC")
+
+# "minimal" only requests the intents of the events the modules listen to,
+# "all" requests every intent and caches everything.
+GATEWAY_PROFILE = os.getenv("GATEWAY_PROFILE", "minimal")
+
+# Port of the metrics and health check server, 0 disables it.
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+
+# Commands slower than this many seconds are logged with their arguments,
+# percentiles are kept over the last PERF_WINDOW invocations of each command.
+SLOW_COMMAND_THRESHOLD = float(os.getenv("SLOW_COMMAND_THRESHOLD", 1.5))
+PERF_WINDOW = int(os.getenv("PERF_WINDOW", 500))
+
+# Description of roles nobody described yet.
+DEFAULT_ROLE_DESCRIPTION = "No description provided yet."
+
+# Discord caps a guild at 250 roles, so the default holds every role.
+ROLE_INFO_CACHE_SIZE = int(os.getenv("ROLE_INFO_CACHE_SIZE", 1000))
+
 
 class Paths:
     """Folder paths."""
@@ -69,6 +105,180 @@ class Paths:
     resources = src / "resources"
 
 
+class Gateway:
+    """Gateway settings of the minimal profile."""
+
+    # the guild create event fills the role cache.
+    BASE_INTENTS = hikari.Intents.GUILDS
+    MINIMAL_CACHE = hikari.CacheComponents.GUILDS | hikari.CacheComponents.ROLES
+    # seconds after start to log the profile report.
+    REPORT_DELAY = 60
+
+
+class LoopMonitor:
+    """Event loop lag monitor settings, in seconds."""
+
+    INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", 0.5))
+    SLOW_CALLBACK = float(os.getenv("LOOP_MONITOR_SLOW_CALLBACK", 0.25))
+    # amount of samples kept for the percentiles.
+    WINDOW = 1200
+
+
+class Mongo:
+    """Mongo client settings, times in milliseconds."""
+
+    MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 20))
+    # kept open from the warm-up on, so commands never wait on a handshake.
+    MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 2))
+    MAX_IDLE_TIME = int(os.getenv("MONGO_MAX_IDLE_TIME", 5 * 60 * 1000))
+    # the first one the server supports is used, zstd and snappy are only
+    # used if zstandard and python-snappy are installed.
+    COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib")
+    CONNECT_TIMEOUT = int(os.getenv("MONGO_CONNECT_TIMEOUT", 5000))
+    SERVER_SELECTION_TIMEOUT = int(
+        os.getenv("MONGO_SERVER_SELECTION_TIMEOUT", 10_000)
+    )
+    SOCKET_TIMEOUT = int(os.getenv("MONGO_SOCKET_TIMEOUT", 20_000))
+
+
+class Sharding:
+    """Shards of this process, set by the launcher for each worker."""
+
+    WORKER_ID = int(os.getenv("WORKER_ID", 0))
+    # empty runs every shard.
+    SHARD_IDS = [
+        int(id_) for id_ in os.getenv("SHARD_IDS", "").split(",") if id_
+    ]
+    SHARD_COUNT = int(os.getenv("SHARD_COUNT", 0)) or None
+    # only the primary worker declares commands and runs scheduled jobs.
+    PRIMARY = bool(int(os.getenv("PRIMARY_WORKER", True)))
+
+
+class Launcher:
+    """Multi-process launcher settings."""
+
+    # seconds a shard needs to identify, workers are started this far apart.
+    IDENTIFY_INTERVAL = 5.0
+    # a worker restarts after a crash with a doubling delay up to the max,
+    # the delay resets once it ran for STABLE_AFTER seconds.
+    RESTART_DELAY = 1.0
+    MAX_RESTART_DELAY = 60.0
+    STABLE_AFTER = 60.0
+    # seconds a worker gets to shut down before it is killed.
+    STOP_TIMEOUT = 30.0
+
+
+class Outbox:
+    """Outbound message queue settings, times in seconds."""
+
+    # attempts per message, retries back off from RETRY_DELAY doubling.
+    MAX_ATTEMPTS = 5
+    RETRY_DELAY = 1.0
+    MAX_RETRY_DELAY = 30.0
+    # log embeds wait this long for others to be sent with.
+    COALESCE_DELAY = float(os.getenv("OUTBOX_COALESCE_DELAY", 2))
+    # Discord's limits per message.
+    MAX_EMBEDS = 10
+    MAX_CHARACTERS = 6000
+    CLOSE_TIMEOUT = 10.0
+
+
+class Search:
+    """Role search settings."""
+
+    MAX_RESULTS = 10
+    # share of the query's trigrams a role needs to be a fuzzy match.
+    MIN_SIMILARITY = 0.3
+
+
+class Http:
+    """Outbound http client settings, times in seconds."""
+
+    LIMIT = int(os.getenv("HTTP_LIMIT", 100))
+    LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", 20))
+    # idle connections are kept this long for the next request.
+    KEEPALIVE_TIMEOUT = 30.0
+    TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+    CONNECT_TIMEOUT = 3.0
+    # attempts of idempotent requests, retries back off from RETRY_DELAY.
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = 0.5
+    MAX_RETRY_DELAY = 5.0
+    # failures in a row that stop requests to a host for the reset timeout.
+    CIRCUIT_THRESHOLD = 5
+    CIRCUIT_RESET_TIMEOUT = 30.0
+
+
+class Twitch:
+    """Twitch api settings, times in seconds."""
+
+    CLIENT_ID = os.getenv("TWITCH_CLIENT_ID", "")
+    CLIENT_SECRET = os.getenv("TWITCH_CLIENT_SECRET", "")
+    # point these at a local stub server when testing.
+    API_URL = os.getenv("TWITCH_API_URL", "https://api.twitch.tv/helix")
+    AUTH_URL = os.getenv("TWITCH_AUTH_URL", "https://id.twitch.tv/oauth2")
+    # most logins helix accepts per request.
+    BATCH_SIZE = 100
+    # lookups arriving within this long of each other share a request.
+    BATCH_DELAY = 0.05
+    CACHE_SIZE = int(os.getenv("TWITCH_CACHE_SIZE", 5000))
+    CACHE_TTL = float(os.getenv("TWITCH_CACHE_TTL", 10 * 60))
+    # logins that do not exist, kept shorter as they may be created.
+    MISSING_TTL = 60.0
+    # size of the app's rate limit bucket, until a response tells otherwise.
+    RATE_LIMIT = 800
+    # live announcements go here, 0 disables polling.
+    LIVE_CHANNEL_ID = int(os.getenv("TWITCH_LIVE_CHANNEL_ID", 0))
+    # the poll interval adapts to the channel count, between these bounds.
+    MIN_POLL_INTERVAL = float(os.getenv("TWITCH_MIN_POLL_INTERVAL", 60))
+    MAX_POLL_INTERVAL = 10 * 60.0
+    # share of the rate limit polling may spend, the rest is for lookups.
+    POLL_BUDGET = 0.5
+    # stream requests of a poll in flight at once.
+    POLL_CONCURRENCY = 8
+
+
+class Interactions:
+    """Component router settings."""
+
+    # seconds per tick of the timeout wheel.
+    WHEEL_RESOLUTION = 1.0
+    # a turn of the wheel covers WHEEL_RESOLUTION * WHEEL_SLOTS seconds.
+    WHEEL_SLOTS = 512
+
+
+class Logging:
+    """Log output settings."""
+
+    LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    # level of single modules and their submodules,
+    # like "hikari=WARNING,bot.live=DEBUG".
+    MODULE_LEVELS = dict(
+        pair.split("=", 1)
+        for pair in os.getenv("LOG_LEVELS", "").split(",")
+        if pair
+    )
+    # share of the frequent events logged, by the sample key they are bound to.
+    SAMPLING = {
+        key: float(rate)
+        for key, rate in (
+            pair.split("=", 1)
+            for pair in os.getenv(
+                "LOG_SAMPLING", "interaction=0.1,role_update=0.1"
+            ).split(",")
+            if pair
+        )
+    }
+    # records waiting for the writer, more are dropped.
+    QUEUE_SIZE = 10_000
+    STOP_TIMEOUT = 5.0
+    # errors are summed up in LOG_CHANNEL_ID every SUMMARY_INTERVAL seconds.
+    ERROR_SUMMARY = bool(int(os.getenv("LOG_ERROR_SUMMARY", True)))
+    SUMMARY_INTERVAL = float(os.getenv("LOG_SUMMARY_INTERVAL", 60))
+    SUMMARY_LINES = 10
+    SUMMARY_MESSAGE_LENGTH = 150
+
+
 class Colors:
     """Default colors."""
 
@@ -76,3 +286,4 @@ class Colors:
     GREEN = hikari.Color(0x07E500)
     BLUE = hikari.Color(0x0044F2)
     YELLOW = hikari.Color(0xF7EB02)
+    PURPLE = hikari.Color(0x9146FF)
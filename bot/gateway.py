@@ -0,0 +1,217 @@
+"""Gateway intents and cache profiles."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import time
+from collections import Counter
+from typing import TYPE_CHECKING
+
+import hikari
+import tanjun
+from hikari.events.base_events import get_required_intents_for
+from loguru import logger
+
+from bot import constants, utils
+from bot.profiling import profiler
+
+if TYPE_CHECKING:
+    from types import ModuleType
+    from typing import Iterable
+
+
+def module_names() -> list[str]:
+    """
+    Get the names of the modules in the modules folder.
+
+    Returns:
+        list[str]: The names, without the package.
+    """
+    return [path.stem for path in sorted(constants.Paths.modules.glob("*.py"))]
+
+
+def import_modules() -> list[ModuleType]:
+    """
+    Import every module in the modules folder, timing each import.
+
+    Returns:
+        list[ModuleType]: The imported modules.
+    """
+    modules: list[ModuleType] = []
+    for name in module_names():
+        with profiler.phase(f"import: {name}"):
+            modules.append(importlib.import_module(f"bot.modules.{name}"))
+
+    return modules
+
+
+def reload_module(
+    client: tanjun.Client, name: str, intents: hikari.Intents
+) -> hikari.Intents:
+    """
+    Reload a module of the modules folder in place, without reconnecting.
+
+    Its components are removed and added again from the new code, so their
+    listeners are not duplicated. The dependencies, like the caches, the
+    scheduler and the open prompts, are kept as they are. Scheduler jobs
+    find their callback by name on each run, so they run the new code
+    without being added again. StartedEvent listeners do not run again.
+
+    If the new code fails to load, the old code is loaded back.
+
+    Args:
+        client (tanjun.Client): Client the module is loaded in.
+        name (str): Name of the module, without the package.
+        intents (hikari.Intents): Intents the bot was started with.
+
+    Returns:
+        hikari.Intents: Intents the new listeners need that the bot was not
+            started with, their events are not received until a restart.
+
+    Raises:
+        Exception: The new code failed to load, the old code is back.
+    """
+    module = importlib.import_module(f"bot.modules.{name}")
+    namespace = dict(vars(module))
+    try:
+        client.reload_modules(module.__name__)
+    except Exception:
+        # the module is unloaded by now, put the old code back in its place.
+        vars(module).clear()
+        vars(module).update(namespace)
+        client.load_modules(module.__name__)
+        raise
+
+    logger.info("Reloaded module {}", name)
+    return minimal_intents(listened_events([module])) & ~intents
+
+
+def listened_events(modules: Iterable[ModuleType]) -> set[type[hikari.Event]]:
+    """
+    Get the event types the components in the modules listen to.
+
+    Args:
+        modules (Iterable[ModuleType]): Modules to look for components in.
+
+    Returns:
+        set[type[hikari.Event]]: The event types.
+    """
+    events: set[type[hikari.Event]] = set()
+    for module in modules:
+        for value in vars(module).values():
+            if isinstance(value, tanjun.Component):
+                events.update(value.listeners)
+
+    return events
+
+
+def minimal_intents(events: Iterable[type[hikari.Event]]) -> hikari.Intents:
+    """
+    Get the intents needed to receive the events.
+
+    Args:
+        events (Iterable[type[hikari.Event]]): The event types to receive.
+
+    Returns:
+        hikari.Intents: The base intents plus the intents of every event.
+    """
+    intents = constants.Gateway.BASE_INTENTS
+    for event in events:
+        # any of the combinations is enough, the first is the smallest.
+        options = list(get_required_intents_for(event))
+        if options:
+            intents |= options[0]
+
+    return intents
+
+
+def resolve_profile(
+    profile: str, modules: Iterable[ModuleType]
+) -> tuple[hikari.Intents, hikari.CacheComponents]:
+    """
+    Get the intents and cache components of a gateway profile.
+
+    Args:
+        profile (str): "all" for everything, or "minimal" for only what the
+            modules listen to.
+        modules (Iterable[ModuleType]): The modules that will be loaded.
+
+    Returns:
+        tuple[hikari.Intents, hikari.CacheComponents]:
+            The intents and cache components to use.
+
+    Raises:
+        ValueError: Unknown profile.
+    """
+    if profile == "all":
+        return hikari.Intents.ALL, hikari.CacheComponents.ALL
+
+    if profile == "minimal":
+        # member events keep the admin index current, no members are cached.
+        intents = minimal_intents(listened_events(modules))
+        return intents, constants.Gateway.MINIMAL_CACHE
+
+    raise ValueError(f"Unknown gateway profile {profile!r}")
+
+
+class EventCounter:
+    """Count received gateway events by type."""
+
+    def __init__(self) -> None:
+        """Create a counter with no events counted."""
+        self.counts: Counter[str] = Counter()
+        self.since = time.monotonic()
+
+    async def on_event(self, event: hikari.Event) -> None:
+        """
+        Count an event, subscribe this to hikari.Event.
+
+        Args:
+            event (hikari.Event): The received event.
+        """
+        self.counts[type(event).__name__] += 1
+
+    @property
+    def rate(self) -> float:
+        """
+        Get the average amount of events per second since creation.
+
+        Returns:
+            float: Events per second.
+        """
+        elapsed = time.monotonic() - self.since
+        return sum(self.counts.values()) / elapsed if elapsed else 0.0
+
+
+async def report_profile(
+    intents: hikari.Intents,
+    cache: hikari.CacheComponents,
+    counter: EventCounter,
+) -> None:
+    """
+    Log what the gateway profile leaves out compared to ALL and its load.
+
+    Only this run is measured, the memory and event rate are for comparing
+    with the same report of a run using the "all" profile.
+
+    Args:
+        intents (hikari.Intents): The intents in use.
+        cache (hikari.CacheComponents): The cache components in use.
+        counter (EventCounter): Counter of the received events.
+    """
+    await asyncio.sleep(constants.Gateway.REPORT_DELAY)
+
+    disabled_intents = hikari.Intents.ALL - intents
+    disabled_cache = hikari.CacheComponents.ALL - cache
+    logger.info(
+        "Gateway profile {!r} leaves out intents [{}] "
+        "and cache components [{}], this run uses "
+        "{:.1f} MiB resident and receives {:.2f} events/s ({})",
+        constants.GATEWAY_PROFILE,
+        disabled_intents or "none",
+        disabled_cache or "none",
+        utils.memory_usage() / (1024 * 1024),
+        counter.rate,
+        ", ".join(f"{name}: {n}" for name, n in counter.counts.most_common()),
+    )
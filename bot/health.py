@@ -0,0 +1,153 @@
+"""Metrics and health check http endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+from loguru import logger
+
+from bot import metrics
+
+if TYPE_CHECKING:
+    import hikari
+
+    from bot import storage
+
+
+class HealthServer:
+    """
+    Http server exposing /metrics, /healthz and /readyz.
+
+    /healthz only reports that the process is serving requests, /readyz
+    reports if both the gateway and the db are usable.
+    """
+
+    def __init__(
+        self,
+        bot: hikari.GatewayBot,
+        store: storage.Storage,
+        preparing: asyncio.Task[None],
+    ) -> None:
+        """
+        Create the server, it is not listening yet.
+
+        Args:
+            bot (hikari.GatewayBot): Bot to check the gateway state of.
+            store (storage.Storage): Storage to ping.
+            preparing (asyncio.Task[None]): Task preparing the storage.
+        """
+        self.bot = bot
+        self.store = store
+        self.preparing = preparing
+
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.router.add_get("/healthz", self.handle_healthz)
+        app.router.add_get("/readyz", self.handle_readyz)
+        self._runner = web.AppRunner(app, access_log=None)
+
+    async def start(self, host: str, port: int) -> None:
+        """
+        Start listening.
+
+        Args:
+            host (str): Address to bind to.
+            port (int): Port to bind to.
+        """
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info("Health server listening on {}:{}", host, port)
+
+    async def stop(self) -> None:
+        """Stop listening and close open connections."""
+        await self._runner.cleanup()
+
+    def gateway_ready(self) -> bool:
+        """
+        Check if every shard is connected and heartbeating.
+
+        Returns:
+            bool: If the gateway is ready.
+        """
+        return (
+            self.bot.is_alive
+            and bool(self.bot.shards)
+            and all(shard.is_alive for shard in self.bot.shards.values())
+            and not math.isnan(self.bot.heartbeat_latency)
+        )
+
+    async def database_ready(self, timeout: float = 2) -> bool:
+        """
+        Check if the db is prepared and answers a ping in time.
+
+        Args:
+            timeout (float): Seconds to wait for the ping. Defaults to 2.
+
+        Returns:
+            bool: If the db is ready.
+        """
+        if (
+            not self.preparing.done()
+            or self.preparing.cancelled()
+            or self.preparing.exception() is not None
+        ):
+            return False
+
+        try:
+            await asyncio.wait_for(self.store.ping(), timeout)
+        except Exception:  # noqa: B902
+            return False
+        return True
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """
+        Serve the metrics in the Prometheus text format.
+
+        Args:
+            request (web.Request): The request.
+
+        Returns:
+            web.Response: The metrics.
+        """
+        return web.Response(
+            body=metrics.REGISTRY.render().encode(),
+            headers={
+                "Content-Type": "text/plain; version=0.0.4; charset=utf-8"
+            },
+        )
+
+    async def handle_healthz(self, request: web.Request) -> web.Response:
+        """
+        Report that the process is alive.
+
+        Args:
+            request (web.Request): The request.
+
+        Returns:
+            web.Response: Always 200.
+        """
+        return web.Response(text="ok")
+
+    async def handle_readyz(self, request: web.Request) -> web.Response:
+        """
+        Report if the gateway and db are ready.
+
+        Args:
+            request (web.Request): The request.
+
+        Returns:
+            web.Response: 200 if everything is ready, otherwise 503.
+        """
+        checks = {
+            "gateway": self.gateway_ready(),
+            "database": await self.database_ready(),
+        }
+        return web.Response(
+            text=json.dumps(checks),
+            content_type="application/json",
+            status=200 if all(checks.values()) else 503,
+        )
@@ -0,0 +1,255 @@
+"""Shared client for outbound http requests."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from bot import constants, metrics
+
+if TYPE_CHECKING:
+    from typing import Any, AsyncIterator
+
+# methods that are safe to send again when an attempt fails.
+IDEMPOTENT = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# statuses of an overloaded or restarting server, worth another attempt.
+RETRY_STATUSES = frozenset({502, 503, 504})
+RETRYABLE = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """Requests to a host are failing, it is not tried until it cools down."""
+
+    def __init__(self, host: str) -> None:
+        """
+        Create the error.
+
+        Args:
+            host (str): The failing host.
+        """
+        super().__init__(f"Circuit to {host} is open")
+        self.host = host
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Failure tracking of a host.
+
+    After CIRCUIT_THRESHOLD failures in a row the circuit opens and requests
+    fail right away. Once CIRCUIT_RESET_TIMEOUT passed a single trial request
+    is let through, its success closes the circuit and its failure opens it again.
+    """
+
+    failures: int = 0
+    # monotonic time the circuit opened, None while closed.
+    opened_at: float | None = None
+    trial: bool = False
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Check if the circuit is open.
+
+        Returns:
+            bool: If requests are being refused.
+        """
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """
+        Check if a request may be sent, starting the trial when cooled down.
+
+        Returns:
+            bool: If the request may be sent.
+        """
+        if self.opened_at is None:
+            return True
+
+        if self.trial or (
+            time.monotonic() - self.opened_at
+            < constants.Http.CIRCUIT_RESET_TIMEOUT
+        ):
+            return False
+
+        self.trial = True
+        return True
+
+    def success(self) -> None:
+        """Record a successful request, closing the circuit."""
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    def failure(self) -> None:
+        """Record a failed request, opening the circuit at the threshold."""
+        self.failures += 1
+        if self.trial or self.failures >= constants.Http.CIRCUIT_THRESHOLD:
+            self.opened_at = time.monotonic()
+        self.trial = False
+
+
+class HttpClient:
+    """
+    A tuned aiohttp session with retries and a circuit breaker per host.
+
+    The connector caps the connections in total and per host, keeps idle
+    connections alive for reuse and caches DNS answers. Idempotent requests
+    that fail on the connection, time out or hit a 502, 503 or 504 are sent
+    again after a jittered back off.
+    """
+
+    def __init__(
+        self,
+        limit: int = constants.Http.LIMIT,
+        limit_per_host: int = constants.Http.LIMIT_PER_HOST,
+        timeout: float = constants.Http.TIMEOUT,
+    ) -> None:
+        """
+        Create the client, connections are opened on first use.
+
+        Args:
+            limit (int): Most connections open at once.
+                Defaults to constants.Http.LIMIT.
+            limit_per_host (int): Most connections to a single host.
+                Defaults to constants.Http.LIMIT_PER_HOST.
+            timeout (float): Seconds a request may take, per attempt.
+                Defaults to constants.Http.TIMEOUT.
+        """
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=limit,
+                limit_per_host=limit_per_host,
+                keepalive_timeout=constants.Http.KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=int(constants.DNS_CACHE_TTL),
+            ),
+            timeout=aiohttp.ClientTimeout(
+                total=timeout, connect=constants.Http.CONNECT_TIMEOUT
+            ),
+        )
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    @contextlib.asynccontextmanager
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        retry: bool | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Send a request, retrying failures that may pass.
+
+        Use as an async context manager, the connection is released when
+        it exits.
+
+        Args:
+            method (str): The http method.
+            url (str): The url.
+            retry (bool | None): If failed attempts are sent again.
+                Defaults to None, which retries idempotent methods.
+            **kwargs (Any): Arguments of aiohttp's request.
+
+        Yields:
+            aiohttp.ClientResponse: The response of the last attempt.
+        """
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT
+
+        response = await self._send(
+            method, url, constants.Http.MAX_ATTEMPTS if retry else 1, kwargs
+        )
+        try:
+            yield response
+        finally:
+            response.release()
+
+    async def close(self) -> None:
+        """Close the open connections."""
+        await self.session.close()
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        """
+        Get the circuit breaker of a host, creating it if needed.
+
+        Args:
+            host (str): The host.
+
+        Returns:
+            CircuitBreaker: The breaker.
+        """
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker()
+        return breaker
+
+    async def _send(
+        self, method: str, url: str, attempts: int, kwargs: dict[str, Any]
+    ) -> aiohttp.ClientResponse:
+        """
+        Send the attempts of a request.
+
+        Args:
+            method (str): The http method.
+            url (str): The url.
+            attempts (int): Most attempts to make.
+            kwargs (dict[str, Any]): Arguments of aiohttp's request.
+
+        Returns:
+            aiohttp.ClientResponse: The response of the last attempt.
+
+        Raises:
+            CircuitOpenError: The host is failing.
+            RETRYABLE: The last attempt failed to get a response.
+            asyncio.CancelledError: The request was cancelled.
+        """
+        host = urlsplit(url).hostname or ""
+        breaker = self._breaker(host)
+        delay = constants.Http.RETRY_DELAY
+        attempt = 0
+
+        while True:
+            attempt += 1
+            if not breaker.allow():
+                raise CircuitOpenError(host)
+
+            started = time.perf_counter()
+            try:
+                response = await self.session.request(method, url, **kwargs)
+            except asyncio.CancelledError:
+                # a cancelled trial proves nothing, the next request tries.
+                breaker.trial = False
+                raise
+            except RETRYABLE:
+                metrics.HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started, host, "error"
+                )
+                breaker.failure()
+                if attempt == attempts:
+                    raise
+            else:
+                metrics.HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started, host, str(response.status)
+                )
+                if response.status not in RETRY_STATUSES:
+                    breaker.success()
+                    return response
+
+                breaker.failure()
+                if attempt == attempts:
+                    return response
+                response.release()
+
+            metrics.HTTP_RETRIES.inc(host)
+            # the jitter keeps the retries of concurrent requests apart.
+            jitter = random.uniform(0.5, 1.5)  # noqa: S311, DUO102
+            await asyncio.sleep(delay * jitter)
+            delay = min(delay * 2, constants.Http.MAX_RETRY_DELAY)
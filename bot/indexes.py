@@ -0,0 +1,152 @@
+"""Declared indexes for the collections used by the bot."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from loguru import logger
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+
+if TYPE_CHECKING:
+    from typing import Any, Mapping
+
+    from motor import motor_asyncio as motor
+
+
+@dataclass(frozen=True)
+class CollectionIndexes:
+    """The indexes a collection needs and the queries they should serve."""
+
+    collection: str
+    indexes: list[IndexModel]
+    queries: list[Mapping[str, Any]] = field(default_factory=list)
+
+
+REGISTRY = [
+    CollectionIndexes(
+        "role_info",
+        indexes=[
+            IndexModel([("role_id", ASCENDING)], name="role_id", unique=True)
+        ],
+        queries=[{"role_id": 0}],
+    ),
+    CollectionIndexes(
+        "birthday",
+        indexes=[
+            IndexModel(
+                [("discord_id", ASCENDING)], name="discord_id", unique=True
+            ),
+            IndexModel([("date", ASCENDING)], name="date"),
+        ],
+        queries=[
+            {"discord_id": 0},
+            {"date": {"$lte": datetime(1970, 1, 1)}},
+            {
+                "discord_id": {"$in": [0]},
+                "date": {"$lte": datetime(1970, 1, 1)},
+            },
+        ],
+    ),
+    CollectionIndexes(
+        "twitch_channel",
+        indexes=[
+            IndexModel([("user_id", ASCENDING)], name="user_id", unique=True)
+        ],
+        queries=[{"user_id": ""}],
+    ),
+]
+
+
+def _has_collection_scan(plan: Mapping[str, Any]) -> bool:
+    """
+    Check if a query plan stage, or any of its input stages, scans everything.
+
+    Args:
+        plan (Mapping[str, Any]): The plan stage to check.
+
+    Returns:
+        bool: If the plan contains a COLLSCAN stage.
+    """
+    if plan.get("stage") == "COLLSCAN":
+        return True
+
+    stages = list(plan.get("inputStages", []))
+    if "inputStage" in plan:
+        stages.append(plan["inputStage"])
+
+    return any(_has_collection_scan(stage) for stage in stages)
+
+
+async def is_collection_scan(
+    collection: motor.AsyncIOMotorCollection[Any], query: Mapping[str, Any]
+) -> bool:
+    """
+    Check if a query would scan the whole collection.
+
+    Args:
+        collection (motor.AsyncIOMotorCollection[Any]): Collection to query.
+        query (Mapping[str, Any]): The filter of the query.
+
+    Returns:
+        bool: If the winning plan of the query is a collection scan.
+    """
+    explanation = await collection.find(query).explain()
+    return _has_collection_scan(explanation["queryPlanner"]["winningPlan"])
+
+
+async def ensure_indexes(database: motor.AsyncIOMotorDatabase) -> None:
+    """
+    Create the missing indexes of every collection in the registry.
+
+    Queries that would still scan the whole collection are logged as warnings,
+    queries that can not be explained are logged and skipped.
+
+    Args:
+        database (motor.AsyncIOMotorDatabase): Database holding the collections.
+    """
+    for spec in REGISTRY:
+        collection = database[spec.collection]
+        existing = await collection.index_information()
+        missing = [
+            index
+            for index in spec.indexes
+            if index.document["name"] not in existing
+        ]
+
+        if missing:
+            try:
+                created = await collection.create_indexes(missing)
+            except OperationFailure as error:
+                logger.error(
+                    "Failed to create indexes on {!r}: {}",
+                    spec.collection,
+                    error,
+                )
+            else:
+                logger.info(
+                    "Created indexes on {!r}: {}",
+                    spec.collection,
+                    ", ".join(created),
+                )
+
+        for query in spec.queries:
+            try:
+                scans = await is_collection_scan(collection, query)
+            except PyMongoError as error:
+                logger.error(
+                    "Failed to explain query {} on {!r}: {}",
+                    query,
+                    spec.collection,
+                    error,
+                )
+                continue
+
+            if scans:
+                logger.warning(
+                    "Query {} on {!r} scans the whole collection",
+                    query,
+                    spec.collection,
+                )
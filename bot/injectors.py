@@ -2,68 +2,214 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, TypeVar
+import asyncio
 
-import aiohttp
+import hikari
 import tanjun
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from motor import motor_asyncio as motor
-
-from bot import constants, types
-
-if TYPE_CHECKING:
-    from typing import Callable, Type
-
+from loguru import logger
+
+from bot import (
+    caches,
+    constants,
+    dns_cache,
+    health,
+    http_client,
+    interactions,
+    live,
+    logs,
+    loop_monitor,
+    metrics,
+    outbox,
+    permissions,
+    scheduling,
+    search,
+    storage,
+    timeline,
+    twitch,
+)
+from bot.profiling import profiler
 
-D = TypeVar("D")  # noqa: VNE001
 
+async def prepare_storage(store: storage.Storage) -> None:
+    """
+    Connect to the db and create what the repositories need.
 
-def _create_collection_injector(
-    collection_name: str, type_: Type[D]
-) -> Callable[[motor.AsyncIOMotorDatabase], motor.AsyncIOMotorCollection[D]]:
-    def injector(
-        database: motor.AsyncIOMotorDatabase = tanjun.injected(
-            type=motor.AsyncIOMotorDatabase
-        ),
-    ) -> motor.AsyncIOMotorCollection[D]:
-        return database[collection_name]  # type: ignore
+    Args:
+        store (storage.Storage): The storage to prepare.
+    """
+    with profiler.phase("storage prepare"):
+        await store.prepare()
 
-    return injector
 
+def _log_prepare_failure(task: asyncio.Task[None]) -> None:
+    """
+    Log why preparing the db failed, the health server then reports unready.
 
-get_role_info_db = _create_collection_injector(
-    "role_info", types.RoleInfoDocument
-)
-get_birthday_db = _create_collection_injector(
-    "birthday", types.BirthdayDocument
-)
+    Args:
+        task (asyncio.Task[None]): The finished prepare_storage task.
+    """
+    if not task.cancelled() and (error := task.exception()) is not None:
+        logger.opt(exception=error).error("Preparing the storage failed")
 
 
 async def register_in_async_context(
     client: tanjun.Client = tanjun.injected(type=tanjun.Client),
+    bot: hikari.GatewayBot = tanjun.injected(type=hikari.GatewayBot),
 ) -> None:
     """
-    Register type dependecies.
+    Register type dependecies and start preparing the db.
+
+    The db is prepared in the background, while the gateway connects, until
+    that succeeded /readyz reports it unready. Its DNS records are resolved
+    first, off the event loop.
 
     Args:
         client (tanjun.Client, optional):
             he client to register dependecies to.
             Defaults to tanjun.injected(type=tanjun.Client).
+        bot (hikari.GatewayBot, optional):
+            Bot the health server reports on, the component router listens
+            to and the outbox sends with.
     """
-    scheduler = AsyncIOScheduler()
-    scheduler.start()
+    with profiler.phase("injector: scheduler"):
+        scheduler = scheduling.create_scheduler(client)
+        scheduler.add_listener(metrics.record_job_event, metrics.JOB_EVENTS)
+
+    with profiler.phase("injector: storage"):
+        if constants.STORAGE_BACKEND == "mongo":
+            await dns_cache.prefetch_srv(constants.DATABASE_URI)
+        store = storage.create_storage()
+    preparing = asyncio.create_task(prepare_storage(store))
+    preparing.add_done_callback(_log_prepare_failure)
+    # keep a reference, so the task is not garbage collected.
+    client.metadata["prepare_storage"] = preparing
+
+    with profiler.phase("injector: http client"):
+        http = http_client.HttpClient()
+    metrics.HTTP_CIRCUITS.callback = lambda: (
+        ((host,), int(breaker.is_open))
+        for host, breaker in http.breakers.items()
+    )
+
+    monitor = loop_monitor.LoopLagMonitor()
+    monitor.start()
+    metrics.EVENT_LOOP_LAG.callback = lambda: zip(
+        [("0.5",), ("0.95",), ("0.99",)], monitor.percentiles()
+    )
+
+    messages = outbox.Outbox(bot.rest)
+    metrics.OUTBOX_DEPTH.callback = lambda: (
+        ((priority.name.lower(),), count)
+        for priority, count in messages.depth().items()
+    )
+
+    if constants.Logging.ERROR_SUMMARY:
+        summary = logs.ErrorSummary(messages)
+        summary.start()
+        client.set_type_dependency(logs.ErrorSummary, summary)
+
+    twitch_client = twitch.TwitchClient(http)
+    poller = live.LivePoller(twitch_client, store.twitch_channels, messages)
+    metrics.TWITCH_CHANNELS.callback = lambda: (
+        (("live",), poller.live()),
+        (("offline",), len(poller.channels) - poller.live()),
+    )
+
+    router = interactions.ComponentRouter()
+    router.start()
+    bot.subscribe(hikari.InteractionCreateEvent, router.on_interaction)
 
     (
-        client.set_type_dependency(
-            motor.AsyncIOMotorDatabase,
-            motor.AsyncIOMotorClient(constants.DATABASE_URI)[
-                constants.DATABASE_NAME
-            ],
+        client.set_type_dependency(storage.Storage, store)
+        .set_type_dependency(storage.RoleInfoRepository, store.roles)
+        .set_type_dependency(storage.BirthdayRepository, store.birthdays)
+        .set_type_dependency(
+            storage.TwitchChannelRepository, store.twitch_channels
         )
-        .set_type_dependency(aiohttp.ClientSession, aiohttp.ClientSession())
+        .set_type_dependency(http_client.HttpClient, http)
+        .set_type_dependency(twitch.TwitchClient, twitch_client)
+        .set_type_dependency(live.LivePoller, poller)
         .set_type_dependency(AsyncIOScheduler, scheduler)
+        .set_type_dependency(caches.RoleInfoCache, caches.RoleInfoCache())
+        .set_type_dependency(search.RoleIndex, search.RoleIndex())
+        .set_type_dependency(permissions.AdminIndex, permissions.AdminIndex())
+        .set_type_dependency(loop_monitor.LoopLagMonitor, monitor)
+        .set_type_dependency(interactions.ComponentRouter, router)
+        .set_type_dependency(outbox.Outbox, messages)
+        .set_type_dependency(
+            timeline.BirthdayTimeline, timeline.BirthdayTimeline()
+        )
     )
 
+    # started last, jobs resolve the dependencies when they run.
+    # with several workers only the primary runs jobs, so none run twice.
+    if constants.Sharding.PRIMARY:
+        with profiler.phase("injector: scheduler start"):
+            scheduler.start()
+
+    if constants.METRICS_PORT:
+        with profiler.phase("injector: health server"):
+            server = health.HealthServer(bot, store, preparing)
+            await server.start(constants.METRICS_HOST, constants.METRICS_PORT)
+        client.set_type_dependency(health.HealthServer, server)
+
+
+async def close_in_async_context(
+    client: tanjun.Client = tanjun.injected(type=tanjun.Client),
+) -> None:
+    """
+    Close the dependencies that hold open connections.
+
+    Args:
+        client (tanjun.Client, optional):
+            The client the dependecies are registered to.
+            Defaults to tanjun.injected(type=tanjun.Client).
+    """
+    monitor = client.get_type_dependency(loop_monitor.LoopLagMonitor)
+    if isinstance(monitor, loop_monitor.LoopLagMonitor):
+        monitor.stop()
+
+    router = client.get_type_dependency(interactions.ComponentRouter)
+    if isinstance(router, interactions.ComponentRouter):
+        router.stop()
+
+    # stopped first, so no announcements are queued while closing.
+    poller = client.get_type_dependency(live.LivePoller)
+    if isinstance(poller, live.LivePoller):
+        poller.stop()
+
+    # its last summary goes out with the outbox.
+    summary = client.get_type_dependency(logs.ErrorSummary)
+    if isinstance(summary, logs.ErrorSummary):
+        summary.stop()
+
+    # before the rest client closes, so queued messages are still sent.
+    messages = client.get_type_dependency(outbox.Outbox)
+    if isinstance(messages, outbox.Outbox):
+        await messages.close()
+
+    twitch_client = client.get_type_dependency(twitch.TwitchClient)
+    if isinstance(twitch_client, twitch.TwitchClient):
+        await twitch_client.close()
+
+    # after its users, so no request is cut off.
+    http = client.get_type_dependency(http_client.HttpClient)
+    if isinstance(http, http_client.HttpClient):
+        await http.close()
+
+    server = client.get_type_dependency(health.HealthServer)
+    if isinstance(server, health.HealthServer):
+        await server.stop()
+
+    preparing = client.metadata.get("prepare_storage")
+    if isinstance(preparing, asyncio.Task):
+        preparing.cancel()
+
+    store = client.get_type_dependency(storage.Storage)
+    if isinstance(store, storage.Storage):
+        await store.close()
+
 
 def register_injectors(client: tanjun.Client) -> None:
     """
@@ -74,4 +220,6 @@ def register_injectors(client: tanjun.Client) -> None:
     """
     client.add_client_callback(
         tanjun.ClientCallbackNames.STARTING, register_in_async_context
+    ).add_client_callback(
+        tanjun.ClientCallbackNames.CLOSING, close_in_async_context
     )
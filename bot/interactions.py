@@ -0,0 +1,252 @@
+"""Routing of component interactions to the prompts waiting for them."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import secrets
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Generic, Hashable, TypeVar
+
+import hikari
+
+from bot import constants
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+K = TypeVar("K", bound=Hashable)  # noqa: VNE001
+
+
+def custom_id(prefix: str) -> str:
+    """
+    Create a custom id that is unique to a single prompt.
+
+    Args:
+        prefix (str): Readable part of the id, like "confirm".
+
+    Returns:
+        str: The custom id.
+    """
+    return f"{prefix}:{secrets.token_hex(8)}"
+
+
+class TimerWheel(Generic[K]):
+    """
+    Hashed timer wheel, scheduling and cancelling are O(1).
+
+    Keys are placed in the slot their deadline falls in, each tick expires
+    the keys of a single slot. Deadlines further away than a full turn wait
+    for the amount of extra turns stored with them.
+    """
+
+    def __init__(
+        self,
+        resolution: float = constants.Interactions.WHEEL_RESOLUTION,
+        slots: int = constants.Interactions.WHEEL_SLOTS,
+    ) -> None:
+        """
+        Create an empty wheel.
+
+        Args:
+            resolution (float): Seconds per tick.
+                Defaults to constants.Interactions.WHEEL_RESOLUTION.
+            slots (int): Amount of slots in a turn.
+                Defaults to constants.Interactions.WHEEL_SLOTS.
+        """
+        self.resolution = resolution
+        # key -> remaining turns, per slot.
+        self._slots: list[dict[K, int]] = [{} for _ in range(slots)]
+        self._slot_of: dict[K, int] = {}
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        """
+        Get the amount of scheduled keys.
+
+        Returns:
+            int: The amount of keys.
+        """
+        return len(self._slot_of)
+
+    def schedule(self, key: K, delay: float) -> None:
+        """
+        Expire a key after a delay, rounded up to a whole tick.
+
+        Args:
+            key (K): The key, replaces its earlier deadline if scheduled.
+            delay (float): Seconds until the key expires.
+        """
+        self.cancel(key)
+
+        ticks = max(1, math.ceil(delay / self.resolution))
+        slot = (self._cursor + ticks) % len(self._slots)
+        self._slots[slot][key] = (ticks - 1) // len(self._slots)
+        self._slot_of[key] = slot
+
+    def cancel(self, key: K) -> None:
+        """
+        Stop a key from expiring.
+
+        Args:
+            key (K): The key, nothing happens if it is not scheduled.
+        """
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def tick(self) -> list[K]:
+        """
+        Move the wheel by one tick.
+
+        Returns:
+            list[K]: The keys that expired.
+        """
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        slot = self._slots[self._cursor]
+
+        expired = [key for key, turns in slot.items() if turns == 0]
+        for key in expired:
+            del slot[key]
+            del self._slot_of[key]
+        for key in slot:
+            slot[key] -= 1
+
+        return expired
+
+
+@dataclass(eq=False)
+class Pending:
+    """A prompt waiting for a component interaction."""
+
+    custom_ids: tuple[str, ...]
+    message_id: hikari.Snowflakeish | None
+    future: asyncio.Future[hikari.ComponentInteraction] = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+class ComponentRouter:
+    """
+    Dispatch component interactions with a dict lookup.
+
+    Prompts are found by the custom id of the component or by the id of
+    their message, so the cost of an interaction does not depend on the
+    amount of open prompts. Timeouts are kept in a timer wheel.
+    """
+
+    def __init__(self, wheel: TimerWheel[Pending] | None = None) -> None:
+        """
+        Create a router without prompts, timeouts run once started.
+
+        Args:
+            wheel (TimerWheel[Pending] | None): Wheel to keep timeouts in.
+                Defaults to None, which creates one with default settings.
+        """
+        self.wheel: TimerWheel[Pending] = wheel or TimerWheel()
+        self._by_custom_id: dict[str, Pending] = {}
+        self._by_message: dict[hikari.Snowflakeish, Pending] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        """
+        Get the amount of open prompts.
+
+        Returns:
+            int: The amount of prompts.
+        """
+        return len(self.wheel)
+
+    def start(self) -> None:
+        """Start expiring timed out prompts."""
+        self._task = asyncio.create_task(self._expire())
+
+    def stop(self) -> None:
+        """Stop expiring timed out prompts."""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def wait_for(
+        self,
+        *,
+        custom_ids: Iterable[str] = (),
+        message_id: hikari.Snowflakeish | None = None,
+        timeout: float = 60 * 5,
+    ) -> hikari.ComponentInteraction:
+        """
+        Wait for an interaction on any of the components or the message.
+
+        Args:
+            custom_ids (Iterable[str]): Custom ids of the components.
+                Defaults to ().
+            message_id (hikari.Snowflakeish | None): Id of the message.
+                Defaults to None.
+            timeout (float): Seconds to wait. Defaults to 60*5 (5 minutes).
+
+        Returns:
+            hikari.ComponentInteraction: The first interaction.
+
+        Raises:
+            ValueError: Neither custom ids nor a message id were given.
+        """
+        pending = Pending(tuple(custom_ids), message_id)
+        if not pending.custom_ids and message_id is None:
+            raise ValueError("Nothing to wait for")
+
+        for key in pending.custom_ids:
+            self._by_custom_id[key] = pending
+        if message_id is not None:
+            self._by_message[message_id] = pending
+        self.wheel.schedule(pending, timeout)
+
+        try:
+            return await pending.future
+        finally:
+            self._remove(pending)
+
+    async def on_interaction(
+        self, event: hikari.InteractionCreateEvent
+    ) -> None:
+        """
+        Hand a component interaction to the prompt waiting for it.
+
+        Args:
+            event (hikari.InteractionCreateEvent): The interaction event.
+        """
+        interaction = event.interaction
+        if not isinstance(interaction, hikari.ComponentInteraction):
+            return
+
+        pending = self._by_custom_id.get(interaction.custom_id)
+        if pending is None:
+            pending = self._by_message.get(interaction.message.id)
+
+        if pending is not None and not pending.future.done():
+            pending.future.set_result(interaction)
+
+    def _remove(self, pending: Pending) -> None:
+        """
+        Forget a prompt.
+
+        Args:
+            pending (Pending): The prompt.
+        """
+        self.wheel.cancel(pending)
+        for key in pending.custom_ids:
+            self._by_custom_id.pop(key, None)
+        if pending.message_id is not None:
+            self._by_message.pop(pending.message_id, None)
+
+    async def _expire(self) -> None:
+        """Fail timed out prompts with asyncio.TimeoutError, forever."""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+
+        while True:
+            # sleep until a deadline, so a late wake up does not drift.
+            next_tick += self.wheel.resolution
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+            for pending in self.wheel.tick():
+                if not pending.future.done():
+                    pending.future.set_exception(asyncio.TimeoutError())
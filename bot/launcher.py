@@ -0,0 +1,477 @@
+"""
+Run the bot as several worker processes, each owning a range of shards.
+
+    python -m bot.launcher --workers 4
+
+Every worker is a normal `python -m bot` process, told its shards through
+the environment. The supervisor restarts crashed workers and, if
+METRICS_PORT is set, serves the combined health and metrics of the workers
+on it, each worker serving its own on the ports after it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import aiohttp
+from aiohttp import web
+from loguru import logger
+
+from bot import constants, logs
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+GATEWAY_URL = "https://discord.com/api/v9/gateway/bot"
+
+
+@dataclass
+class Worker:
+    """A worker process and the shards it owns."""
+
+    worker_id: int
+    shard_ids: list[int]
+    shard_count: int
+    # declares the commands and runs the scheduled jobs.
+    primary: bool
+    # 0 when the worker has no health server.
+    metrics_port: int
+    process: asyncio.subprocess.Process | None = None
+    restarts: int = 0
+
+    def environment(self) -> dict[str, str]:
+        """
+        Get the environment of the process, see constants.Sharding.
+
+        Returns:
+            dict[str, str]: The environment.
+        """
+        return {
+            **os.environ,
+            "WORKER_ID": str(self.worker_id),
+            "SHARD_IDS": ",".join(map(str, self.shard_ids)),
+            "SHARD_COUNT": str(self.shard_count),
+            "PRIMARY_WORKER": str(int(self.primary)),
+            "METRICS_PORT": str(self.metrics_port),
+        }
+
+    @property
+    def alive(self) -> bool:
+        """
+        Check if the process is running.
+
+        Returns:
+            bool: If the process is running.
+        """
+        return self.process is not None and self.process.returncode is None
+
+
+def split_shards(shard_count: int, workers: int) -> list[list[int]]:
+    """
+    Split the shards into contiguous ranges of about equal size.
+
+    Args:
+        shard_count (int): Total amount of shards.
+        workers (int): Amount of ranges.
+
+    Returns:
+        list[list[int]]: The shard ids of each range.
+    """
+    return [
+        list(
+            range(
+                shard_count * index // workers,
+                shard_count * (index + 1) // workers,
+            )
+        )
+        for index in range(workers)
+    ]
+
+
+def create_workers(shard_count: int, workers: int) -> list[Worker]:
+    """
+    Create the workers, the one owning the shard of the guild is primary.
+
+    Args:
+        shard_count (int): Total amount of shards.
+        workers (int): Amount of workers, at most one per shard.
+
+    Returns:
+        list[Worker]: The workers, not started yet.
+    """
+    # the guild's interactions and events arrive on this shard.
+    guild_shard = (constants.GUILD_ID >> 22) % shard_count
+    return [
+        Worker(
+            worker_id=index,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+            primary=guild_shard in shard_ids,
+            metrics_port=(
+                constants.METRICS_PORT + 1 + index
+                if constants.METRICS_PORT
+                else 0
+            ),
+        )
+        for index, shard_ids in enumerate(
+            split_shards(shard_count, min(workers, shard_count))
+        )
+    ]
+
+
+async def fetch_gateway_info() -> tuple[int, int]:
+    """
+    Get the recommended shard count and how many shards may identify at once.
+
+    Returns:
+        tuple[int, int]: The shard count and max concurrency.
+    """
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            GATEWAY_URL, headers={"Authorization": f"Bot {constants.TOKEN}"}
+        ) as response:
+            response.raise_for_status()
+            info = await response.json()
+
+    return info["shards"], info["session_start_limit"]["max_concurrency"]
+
+
+def merge_metrics(texts: dict[int, str]) -> str:
+    """
+    Combine the metrics of the workers, labeling each sample with its worker.
+
+    Samples of a metric have to be together, so they are grouped by metric.
+
+    Args:
+        texts (dict[int, str]): The Prometheus text of each worker, by id.
+
+    Returns:
+        str: The combined Prometheus text.
+    """
+    families: dict[str, list[str]] = {}
+    for worker_id, text in texts.items():
+        family: list[str] = []
+        for line in text.splitlines():
+            if line.startswith("# HELP "):
+                family = families.setdefault(line.split(" ", 3)[2], [])
+                if not family:
+                    family.append(line)
+            elif line.startswith("# TYPE "):
+                if len(family) == 1:
+                    family.append(line)
+            elif line:
+                name, _, rest = line.partition(" ")
+                if name.endswith("}"):
+                    name = name.replace("{", f'{{worker="{worker_id}",', 1)
+                else:
+                    name = f'{name}{{worker="{worker_id}"}}'
+                family.append(f"{name} {rest}")
+
+    return (
+        "\n".join(line for lines in families.values() for line in lines) + "\n"
+    )
+
+
+# not a dataclass, __init__ builds the web app and its runner.
+class Supervisor:  # noqa: SIM119
+    """Starts the workers, restarts them when they crash and reports health."""
+
+    def __init__(self, workers: list[Worker], max_concurrency: int) -> None:
+        """
+        Create the supervisor.
+
+        Args:
+            workers (list[Worker]): The workers to run.
+            max_concurrency (int): Shards that may identify at once.
+        """
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.stopping = asyncio.Event()
+
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.router.add_get("/healthz", self.handle_healthz)
+        app.router.add_get("/readyz", self.handle_readyz)
+        self._runner = web.AppRunner(app, access_log=None)
+
+    async def run(self) -> None:
+        """Run the workers until a stop signal."""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        if constants.METRICS_PORT:
+            await self._runner.setup()
+            await web.TCPSite(
+                self._runner, constants.METRICS_HOST, constants.METRICS_PORT
+            ).start()
+
+        tasks = []
+        for worker in self.workers:
+            tasks.append(asyncio.create_task(self.supervise(worker)))
+            # stops workers from running into each other's identify limit.
+            await self.wait_stopping(
+                math.ceil(len(worker.shard_ids) / self.max_concurrency)
+                * constants.Launcher.IDENTIFY_INTERVAL
+            )
+
+        await self.stopping.wait()
+        await asyncio.gather(*tasks)
+        await self._runner.cleanup()
+
+    async def wait_stopping(self, timeout: float) -> bool:
+        """
+        Wait for a stop signal, at most the timeout.
+
+        Args:
+            timeout (float): Seconds to wait.
+
+        Returns:
+            bool: If the supervisor is stopping.
+        """
+        try:
+            await asyncio.wait_for(self.stopping.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def supervise(self, worker: Worker) -> None:
+        """
+        Run a worker, restarting it when it exits until a stop signal.
+
+        Args:
+            worker (Worker): The worker.
+        """
+        delay = constants.Launcher.RESTART_DELAY
+        while not self.stopping.is_set():
+            worker.process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "bot", env=worker.environment()
+            )
+            logger.info(
+                "Started worker {} with shards {}, pid {}",
+                worker.worker_id,
+                worker.shard_ids,
+                worker.process.pid,
+            )
+
+            started = time.monotonic()
+            exited = asyncio.create_task(worker.process.wait())
+            stopping = asyncio.create_task(self.stopping.wait())
+            await asyncio.wait(
+                (exited, stopping), return_when=asyncio.FIRST_COMPLETED
+            )
+            stopping.cancel()
+            if self.stopping.is_set():
+                await self.stop(worker)
+                return
+
+            if time.monotonic() - started > constants.Launcher.STABLE_AFTER:
+                delay = constants.Launcher.RESTART_DELAY
+            logger.error(
+                "Worker {} exited with {}, restarting in {}s",
+                worker.worker_id,
+                worker.process.returncode,
+                delay,
+            )
+            worker.restarts += 1
+            if await self.wait_stopping(delay):
+                return
+            delay = min(delay * 2, constants.Launcher.MAX_RESTART_DELAY)
+
+    async def stop(self, worker: Worker) -> None:
+        """
+        Ask a worker to shut down, killing it if it takes too long.
+
+        Args:
+            worker (Worker): The worker.
+        """
+        if worker.process is None or not worker.alive:
+            return
+
+        worker.process.terminate()
+        try:
+            await asyncio.wait_for(
+                worker.process.wait(), constants.Launcher.STOP_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Worker {} did not stop in time, killing it", worker.worker_id
+            )
+            worker.process.kill()
+            await worker.process.wait()
+
+    async def fetch(self, path: str) -> dict[int, tuple[int, str]]:
+        """
+        Get an endpoint of every worker's health server.
+
+        Args:
+            path (str): Path of the endpoint.
+
+        Returns:
+            dict[int, tuple[int, str]]: The status and body of each worker,
+                by id, 503 if the worker did not answer.
+        """
+        timeout = aiohttp.ClientTimeout(total=3)
+
+        async def get(
+            session: aiohttp.ClientSession, worker: Worker
+        ) -> tuple[int, str]:
+            url = f"http://{constants.METRICS_HOST}:{worker.metrics_port}{path}"
+            try:
+                async with session.get(url) as response:
+                    return response.status, await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                return 503, repr(error)
+
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            answers = await asyncio.gather(
+                *(get(session, worker) for worker in self.workers)
+            )
+
+        return {
+            worker.worker_id: answer
+            for worker, answer in zip(self.workers, answers)
+        }
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """
+        Serve the metrics of every worker, labeled by worker.
+
+        Args:
+            request (web.Request): The request.
+
+        Returns:
+            web.Response: The metrics.
+        """
+        answers = await self.fetch("/metrics")
+        text = merge_metrics(
+            {
+                worker_id: body
+                for worker_id, (status, body) in answers.items()
+                if status == 200
+            }
+        )
+        text += (
+            "# HELP launcher_worker_restarts_total Worker restarts after an exit.\n"
+            "# TYPE launcher_worker_restarts_total counter\n"
+        )
+        text += "".join(
+            f'launcher_worker_restarts_total{{worker="{worker.worker_id}"}} '
+            f"{worker.restarts}\n"
+            for worker in self.workers
+        )
+        return web.Response(
+            body=text.encode(),
+            headers={
+                "Content-Type": "text/plain; version=0.0.4; charset=utf-8"
+            },
+        )
+
+    async def handle_healthz(self, request: web.Request) -> web.Response:
+        """
+        Report if every worker process is running.
+
+        Args:
+            request (web.Request): The request.
+
+        Returns:
+            web.Response: 200 if every worker runs, otherwise 503.
+        """
+        return _json_response(
+            {str(worker.worker_id): worker.alive for worker in self.workers}
+        )
+
+    async def handle_readyz(self, request: web.Request) -> web.Response:
+        """
+        Report if every worker is ready.
+
+        Args:
+            request (web.Request): The request.
+
+        Returns:
+            web.Response: 200 if every worker is ready, otherwise 503.
+        """
+        answers = await self.fetch("/readyz")
+        return _json_response(
+            {
+                str(worker_id): status == 200
+                for worker_id, (status, _) in answers.items()
+            }
+        )
+
+
+def _json_response(checks: dict[str, bool]) -> web.Response:
+    """
+    Create a health check response.
+
+    Args:
+        checks (dict[str, bool]): If each check passed, by name.
+
+    Returns:
+        web.Response: 200 if every check passed, otherwise 503.
+    """
+    return web.json_response(
+        checks, status=200 if all(checks.values()) else 503
+    )
+
+
+def _positive(value: str) -> int:
+    """
+    Parse a positive integer argument.
+
+    Args:
+        value (str): The argument.
+
+    Returns:
+        int: The integer.
+
+    Raises:
+        ArgumentTypeError: The argument is not a positive integer.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value!r} is not positive")
+    return number
+
+
+async def main(arguments: Iterable[str] | None = None) -> None:
+    """
+    Parse the command line and run the workers.
+
+    Args:
+        arguments (Iterable[str] | None): The arguments.
+            Defaults to None, which uses sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m bot.launcher",
+        description="Run the bot as several processes, splitting the shards.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=_positive,
+        default=os.cpu_count() or 1,
+        help="worker processes to run, defaults to the amount of cores",
+    )
+    parser.add_argument(
+        "--shards",
+        type=_positive,
+        help="total shards, defaults to the amount Discord recommends",
+    )
+    args = parser.parse_args(arguments)
+
+    shard_count, max_concurrency = await fetch_gateway_info()
+    workers = create_workers(args.shards or shard_count, args.workers)
+    await Supervisor(workers, max_concurrency).run()
+
+
+if __name__ == "__main__":
+    logs.install()
+    asyncio.run(main())
@@ -0,0 +1,262 @@
+"""Live stream notifications for the Twitch channels of members."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+import aiohttp
+import hikari
+from loguru import logger
+
+from bot import constants, metrics, twitch
+
+if TYPE_CHECKING:
+    from bot import outbox
+    from bot.storage import TwitchChannelRepository
+    from bot.types import TwitchChannelDocument, TwitchStreamData
+
+# size of the stream preview in announcements.
+THUMBNAIL_SIZE = {"width": "440", "height": "248"}
+
+
+def live_embed(
+    document: TwitchChannelDocument, stream: TwitchStreamData
+) -> hikari.Embed:
+    """
+    Create the announcement of a stream.
+
+    Args:
+        document (TwitchChannelDocument): The channel that went live.
+        stream (TwitchStreamData): The stream.
+
+    Returns:
+        hikari.Embed: The announcement.
+    """
+    description = f"<@{document['discord_id']}> is live"
+    if stream["game_name"]:
+        description += f" with **{stream['game_name']}**"
+
+    return (
+        hikari.Embed(
+            title=stream["title"] or stream["user_name"],
+            url=f"https://twitch.tv/{stream['user_login']}",
+            description=description,
+            color=constants.Colors.PURPLE,
+        )
+        .set_author(name=stream["user_name"])
+        .set_image(stream["thumbnail_url"].format_map(THUMBNAIL_SIZE) or None)
+    )
+
+
+class LivePoller:
+    """
+    Polls the registered channels and announces streams that started.
+
+    Every channel is checked each cycle, BATCH_SIZE channels per request,
+    so a cycle costs one request per hundred channels. The interval grows
+    with that cost, polling spends at most POLL_BUDGET of the rate limit.
+    The last stream of each channel is kept, in memory and in the db, only
+    a stream that was not seen before is announced.
+    """
+
+    def __init__(
+        self,
+        client: twitch.TwitchClient,
+        repository: TwitchChannelRepository,
+        messages: outbox.Outbox,
+        channel_id: int = constants.Twitch.LIVE_CHANNEL_ID,
+    ) -> None:
+        """
+        Create a poller, it does not poll until started.
+
+        Args:
+            client (twitch.TwitchClient): Client to get the streams with.
+            repository (TwitchChannelRepository): Db of the channels.
+            messages (outbox.Outbox): Outbox to queue announcements in.
+            channel_id (int): Channel to announce in.
+                Defaults to constants.Twitch.LIVE_CHANNEL_ID.
+        """
+        self.client = client
+        self.repository = repository
+        self.messages = messages
+        self.channel_id = channel_id
+        self.interval = constants.Twitch.MIN_POLL_INTERVAL
+
+        self.channels: dict[str, TwitchChannelDocument] = {}
+        self._semaphore = asyncio.Semaphore(constants.Twitch.POLL_CONCURRENCY)
+        self._task: asyncio.Task[None] | None = None
+
+    def live(self) -> int:
+        """
+        Count the channels that are live.
+
+        Returns:
+            int: The amount of live channels.
+        """
+        return sum(
+            document["stream_id"] is not None
+            for document in self.channels.values()
+        )
+
+    async def load(self) -> None:
+        """Replace the tracked channels with the ones in the db."""
+        self.channels = {
+            document["user_id"]: document
+            async for document in self.repository.documents()
+        }
+
+    def track(self, document: TwitchChannelDocument) -> None:
+        """
+        Start polling a channel, replacing its earlier document.
+
+        Args:
+            document (TwitchChannelDocument): The channel.
+        """
+        self.channels[document["user_id"]] = document
+
+    def untrack(self, user_id: str) -> None:
+        """
+        Stop polling a channel.
+
+        Args:
+            user_id (str): Twitch id of the channel.
+        """
+        self.channels.pop(user_id, None)
+
+    def start(self) -> None:
+        """Poll on the running loop until stopped."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop polling."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def poll(self) -> int:
+        """
+        Check every channel once, announcing the streams that started.
+
+        Returns:
+            int: The amount of requests made.
+        """
+        started = time.perf_counter()
+        user_ids = list(self.channels)
+        batches = [
+            user_ids[start : start + constants.Twitch.BATCH_SIZE]
+            for start in range(0, len(user_ids), constants.Twitch.BATCH_SIZE)
+        ]
+
+        changes = [
+            change
+            for batch in await asyncio.gather(*map(self._poll_batch, batches))
+            for change in batch
+        ]
+        if changes:
+            await self.repository.set_streams(changes)
+
+        self.interval = self.next_interval(len(batches))
+        metrics.TWITCH_POLL_SECONDS.observe(time.perf_counter() - started)
+        return len(batches)
+
+    def next_interval(self, requests: int) -> float:
+        """
+        Get the seconds to wait for the next poll.
+
+        Args:
+            requests (int): Requests a poll makes.
+
+        Returns:
+            float: The interval, within the poll interval bounds.
+        """
+        rate_limit = self.client.rate_limit
+        interval = (
+            requests * 60 / (rate_limit.limit * constants.Twitch.POLL_BUDGET)
+        )
+        if rate_limit.remaining < requests:
+            # the next poll would run out, wait for the bucket to refill.
+            interval = max(interval, rate_limit.reset - time.time())
+
+        return min(
+            max(interval, constants.Twitch.MIN_POLL_INTERVAL),
+            constants.Twitch.MAX_POLL_INTERVAL,
+        )
+
+    async def _run(self) -> None:
+        """Poll, waiting the interval between the start of each poll."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                await self.poll()
+            except Exception:  # noqa: B902
+                logger.exception("Polling twitch channels failed")
+
+            await asyncio.sleep(
+                max(0.0, self.interval - (loop.time() - started))
+            )
+
+    async def _poll_batch(
+        self, user_ids: list[str]
+    ) -> list[tuple[str, str | None]]:
+        """
+        Check a batch of channels, announcing the streams that started.
+
+        A failed request leaves the state of its channels as it was, so
+        they are not taken for offline.
+
+        Args:
+            user_ids (list[str]): Twitch ids of the channels, at most
+                BATCH_SIZE.
+
+        Returns:
+            list[tuple[str, str | None]]: Twitch id and new stream id of the
+                channels whose stream changed.
+        """
+        async with self._semaphore:
+            try:
+                streams = await self.client.request(
+                    "streams",
+                    [
+                        ("first", str(constants.Twitch.BATCH_SIZE)),
+                        *(("user_id", user_id) for user_id in user_ids),
+                    ],
+                )
+            except (
+                twitch.TwitchError,
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+            ) as error:
+                logger.warning(
+                    "Polling {} twitch channels failed: {}",
+                    len(user_ids),
+                    error,
+                )
+                return []
+
+        live: dict[str, TwitchStreamData] = {
+            stream["user_id"]: stream for stream in streams  # type: ignore
+        }
+        changes: list[tuple[str, str | None]] = []
+        for user_id in user_ids:
+            document = self.channels.get(user_id)
+            # unregistered while the request was out.
+            if document is None:
+                continue
+
+            stream = live.get(user_id)
+            stream_id = None if stream is None else stream["id"]
+            if stream_id == document["stream_id"]:
+                continue
+
+            document["stream_id"] = stream_id
+            changes.append((user_id, stream_id))
+            if stream is not None:
+                self.messages.send(
+                    self.channel_id, embed=live_embed(document, stream)
+                )
+
+        return changes
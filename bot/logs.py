@@ -0,0 +1,362 @@
+"""Structured logging, written off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import traceback
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import hikari
+from loguru import logger
+
+from bot import constants
+
+if TYPE_CHECKING:
+    from typing import Any, Mapping, TextIO
+
+    import loguru
+
+    from bot import outbox
+
+
+def to_json(record: loguru.Record) -> str:
+    """
+    Format a log record as a line of JSON.
+
+    Args:
+        record (loguru.Record): The record.
+
+    Returns:
+        str: The JSON, with a trailing newline.
+    """
+    entry: dict[str, Any] = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    entry.update(
+        (key, value)
+        for key, value in record["extra"].items()
+        if key != "sample"
+    )
+    if record["exception"] is not None:
+        entry["exception"] = "".join(
+            traceback.format_exception(*record["exception"])
+        ).rstrip()
+
+    return json.dumps(entry, default=str) + "\n"
+
+
+class QueueSink:
+    """
+    Loguru sink handing records to a thread that writes them as JSON.
+
+    Logging only puts the record on a bounded queue, the thread formats and
+    writes it, so the event loop never waits on the stream. When the writer
+    falls behind and the queue is full, records are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO = sys.stderr,
+        max_size: int = constants.Logging.QUEUE_SIZE,
+    ) -> None:
+        """
+        Create the sink and start its writer thread.
+
+        Args:
+            stream (TextIO): Stream to write to. Defaults to sys.stderr.
+            max_size (int): Most records waiting to be written.
+                Defaults to constants.Logging.QUEUE_SIZE.
+        """
+        self.stream = stream
+        self.dropped = 0
+        # None tells the writer to stop.
+        self._queue: queue.Queue[loguru.Record | None] = queue.Queue(max_size)
+        self._thread = threading.Thread(
+            target=self._write, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message: loguru.Message) -> None:
+        """
+        Queue a record, called by loguru.
+
+        Args:
+            message (loguru.Message): The formatted message and its record.
+        """
+        try:
+            self._queue.put_nowait(message.record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self) -> None:
+        """Write what is queued and stop the thread, called by loguru."""
+        self._queue.put(None)
+        self._thread.join(constants.Logging.STOP_TIMEOUT)
+
+    def _write(self) -> None:
+        """Write queued records until stopped, flushing after each burst."""
+        while (record := self._queue.get()) is not None:
+            lines = [to_json(record)]
+            # take whatever else is waiting, so a burst is a single write.
+            while not self._queue.empty():
+                record = self._queue.get_nowait()
+                if record is None:
+                    self.stream.write("".join(lines))
+                    self.stream.flush()
+                    return
+                lines.append(to_json(record))
+
+            self.stream.write("".join(lines))
+            self.stream.flush()
+
+
+class LevelFilter:
+    """
+    Loguru filter with a level per module and sampling of frequent events.
+
+    Records bound with a sample key, like logger.bind(sample="interaction"),
+    are kept at the rate of that key. Warnings and worse are never dropped.
+    """
+
+    def __init__(
+        self,
+        level: str = constants.Logging.LEVEL,
+        module_levels: Mapping[str, str] = constants.Logging.MODULE_LEVELS,
+        sampling: Mapping[str, float] = constants.Logging.SAMPLING,
+    ) -> None:
+        """
+        Create the filter.
+
+        Args:
+            level (str): Level of modules without their own.
+                Defaults to constants.Logging.LEVEL.
+            module_levels (Mapping[str, str]): Level by module name, a module
+                also covers its submodules.
+                Defaults to constants.Logging.MODULE_LEVELS.
+            sampling (Mapping[str, float]): Share of the records kept, by
+                sample key. Defaults to constants.Logging.SAMPLING.
+        """
+        self.levels = {"": logger.level(level).no}
+        self.levels.update(
+            (module, logger.level(module_level).no)
+            for module, module_level in module_levels.items()
+        )
+        self.sampling = dict(sampling)
+        self._resolved: dict[str | None, int] = {}
+
+    @property
+    def lowest(self) -> int:
+        """
+        Get the lowest level any module logs at.
+
+        Returns:
+            int: The level number.
+        """
+        return min(self.levels.values())
+
+    def __call__(self, record: loguru.Record) -> bool:
+        """
+        Check if a record is logged.
+
+        Args:
+            record (loguru.Record): The record.
+
+        Returns:
+            bool: If the record is logged.
+        """
+        level = record["level"].no
+        if level < self._level(record["name"]):
+            return False
+
+        rate = self.sampling.get(record["extra"].get("sample", ""))
+        if rate is None or level >= logging.WARNING:
+            return True
+
+        return random.random() < rate  # noqa: S311, DUO102
+
+    def _level(self, name: str | None) -> int:
+        """
+        Get the level of a module, from its closest configured parent.
+
+        Args:
+            name (str | None): Name of the module.
+
+        Returns:
+            int: The level number.
+        """
+        level = self._resolved.get(name)
+        if level is None:
+            module = name or ""
+            while module not in self.levels:
+                module = module.rpartition(".")[0]
+            level = self._resolved[name] = self.levels[module]
+        return level
+
+
+class InterceptHandler(logging.Handler):
+    """Pass records of the standard logging module, like hikari's, to loguru."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Log a record with loguru, keeping where it came from.
+
+        Args:
+            record (logging.LogRecord): The record.
+        """
+        try:
+            level: str | int = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+
+        logger.patch(
+            lambda patched: patched.update(  # type: ignore
+                name=record.name,
+                function=record.funcName,
+                line=record.lineno,
+            )
+        ).opt(exception=record.exc_info).log(level, record.getMessage())
+
+
+def install() -> QueueSink:
+    """
+    Log every record, of loguru and standard logging, as JSON lines.
+
+    Returns:
+        QueueSink: The sink, loguru stops it on exit.
+    """
+    log_filter = LevelFilter()
+    sink = QueueSink()
+
+    logger.remove()
+    logger.configure(extra={"worker": constants.Sharding.WORKER_ID})
+    logger.add(sink, level=log_filter.lowest, filter=log_filter, format="")
+
+    # hikari leaves logging alone once the root logger has a handler.
+    logging.root.handlers = [InterceptHandler()]
+    logging.root.setLevel(log_filter.lowest)
+    return sink
+
+
+@dataclass
+class _ErrorGroup:
+    """Errors logged from the same place."""
+
+    count: int
+    message: str
+
+
+class ErrorSummary:
+    """
+    Counts the errors logged and sends a summary to a channel now and then.
+
+    Errors are grouped by where they were logged, so a failure repeating
+    in a loop is a single line of the summary. At most one summary is sent
+    per interval, however many errors there are.
+    """
+
+    def __init__(
+        self,
+        messages: outbox.Outbox,
+        channel_id: int = constants.LOG_CHANNEL_ID,
+        interval: float = constants.Logging.SUMMARY_INTERVAL,
+    ) -> None:
+        """
+        Create the summary, it counts nothing until started.
+
+        Args:
+            messages (outbox.Outbox): Outbox to queue the summaries in.
+            channel_id (int): Channel to send the summaries in.
+                Defaults to constants.LOG_CHANNEL_ID.
+            interval (float): Seconds between summaries.
+                Defaults to constants.Logging.SUMMARY_INTERVAL.
+        """
+        self.messages = messages
+        self.channel_id = channel_id
+        self.interval = interval
+        # errors can be logged from any thread.
+        self._lock = threading.Lock()
+        self._groups: dict[tuple[str | None, str, int], _ErrorGroup] = {}
+        self._handler_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def write(self, message: loguru.Message) -> None:
+        """
+        Count an error, called by loguru.
+
+        Args:
+            message (loguru.Message): The formatted message and its record.
+        """
+        record = message.record
+        key = (record["name"], record["function"], record["line"])
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                self._groups[key] = _ErrorGroup(1, record["message"])
+            else:
+                group.count += 1
+
+    def start(self) -> None:
+        """Start counting errors and sending summaries."""
+        self._handler_id = logger.add(self.write, level="ERROR", format="")
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop counting and send the summary of what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._handler_id is not None:
+            logger.remove(self._handler_id)
+            self._handler_id = None
+        self.flush()
+
+    def flush(self) -> None:
+        """Send the summary of the errors counted since the last one."""
+        with self._lock:
+            groups, self._groups = self._groups, {}
+        if not groups:
+            return
+
+        ranked = sorted(
+            groups.items(), key=lambda item: item[1].count, reverse=True
+        )
+        lines = [
+            f"**{group.count}x** `{name}:{function}:{line}` "
+            f"{group.message[: constants.Logging.SUMMARY_MESSAGE_LENGTH]}"
+            for (name, function, line), group in ranked[
+                : constants.Logging.SUMMARY_LINES
+            ]
+        ]
+        if len(ranked) > constants.Logging.SUMMARY_LINES:
+            lines.append(
+                f"and {len(ranked) - constants.Logging.SUMMARY_LINES} "
+                "more places"
+            )
+
+        total = sum(group.count for group in groups.values())
+        self.messages.log(
+            self.channel_id,
+            hikari.Embed(
+                title=f"{total} errors logged",
+                description="\n".join(lines),
+                color=constants.Colors.RED,
+            ).set_footer(text=f"worker {constants.Sharding.WORKER_ID}"),
+        )
+
+    async def _run(self) -> None:
+        """Send a summary every interval."""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
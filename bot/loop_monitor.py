@@ -0,0 +1,131 @@
+"""Event loop lag monitoring."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from loguru import logger
+
+from bot import constants
+from bot.tracing import percentile
+
+
+def _thread_stack(thread_id: int) -> str:
+    """
+    Format the current stack of another thread.
+
+    Args:
+        thread_id (int): Identifier of the thread.
+
+    Returns:
+        str: The formatted stack, or "?" if the thread is not running.
+    """
+    # there is no public way to get the stack of another running thread,
+    # faulthandler can only dump it to a file.
+    frames = sys._current_frames()  # pyright: ignore[reportPrivateUsage]
+    frame = frames.get(thread_id)
+    return "".join(traceback.format_stack(frame)) if frame else "?"
+
+
+class LoopLagMonitor:
+    """
+    Sample how late the event loop wakes up, and catch what blocks it.
+
+    A task sleeps for a fixed interval and records how much later than asked
+    it woke up. A watchdog thread checks that the task keeps beating, if it
+    stops for longer than the threshold the stack of the loop thread is
+    logged while it is still blocked, showing the offending callback.
+    """
+
+    def __init__(
+        self,
+        interval: float = constants.LoopMonitor.INTERVAL,
+        threshold: float = constants.LoopMonitor.SLOW_CALLBACK,
+        window: int = constants.LoopMonitor.WINDOW,
+    ) -> None:
+        """
+        Create a monitor, it does not sample until started.
+
+        Args:
+            interval (float): Seconds between samples.
+                Defaults to constants.LoopMonitor.INTERVAL.
+            threshold (float): Seconds the loop may be blocked before it is
+                logged. Defaults to constants.LoopMonitor.SLOW_CALLBACK.
+            window (int): Amount of samples to keep.
+                Defaults to constants.LoopMonitor.WINDOW.
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.samples: deque[float] = deque(maxlen=window)
+        self.stalls = 0
+
+        self._last_beat = time.monotonic()
+        self._task: asyncio.Task[None] | None = None
+        self._stop = threading.Event()
+        self._loop_thread_id: int | None = None
+
+    def start(self) -> None:
+        """Start sampling on the running loop and start the watchdog."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = asyncio.create_task(self._sample())
+        threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        """Stop sampling and stop the watchdog."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def percentiles(
+        self, fractions: tuple[float, ...] = (0.5, 0.95, 0.99)
+    ) -> list[float]:
+        """
+        Get percentiles of the sampled lag.
+
+        Args:
+            fractions (tuple[float, ...]): The percentiles to get.
+                Defaults to p50, p95 and p99.
+
+        Returns:
+            list[float]: The lag at each percentile, in seconds.
+        """
+        samples = list(self.samples)
+        return [percentile(samples, fraction) for fraction in fractions]
+
+    async def _sample(self) -> None:
+        """Record the lag of each wake up, forever."""
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._last_beat = time.monotonic()
+            self.samples.append(
+                max(0.0, self._last_beat - before - self.interval)
+            )
+
+    def _watch(self) -> None:
+        """Log the loop thread stack when the sampler stops beating."""
+        reported_beat = None
+
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or beat == reported_beat:
+                continue
+
+            reported_beat = beat
+            self.stalls += 1
+
+            stack = _thread_stack(self._loop_thread_id or 0)
+            logger.warning(
+                "Event loop blocked for over {:.0f} ms in:\n{}",
+                blocked * 1000,
+                stack,
+            )
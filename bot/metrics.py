@@ -0,0 +1,665 @@
+"""Runtime metrics in the Prometheus text format."""
+
+from __future__ import annotations
+
+import bisect
+import logging
+from typing import TYPE_CHECKING
+
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MISSED,
+)
+from pymongo import monitoring
+
+if TYPE_CHECKING:
+    from typing import Callable, Iterable, Iterator, TypeVar
+
+    import tanjun
+    from apscheduler.events import JobExecutionEvent
+
+    M = TypeVar("M", bound="Metric")  # noqa: VNE001
+    Sample = tuple[tuple[str, ...], float]
+
+
+# seconds, from 5 ms up to 10 s.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value: str) -> str:
+    """
+    Escape a label value.
+
+    Args:
+        value (str): The raw value.
+
+    Returns:
+        str: The value with backslashes, quotes and newlines escaped.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    """
+    Format label pairs for a sample line.
+
+    Args:
+        names (tuple[str, ...]): Label names.
+        values (tuple[str, ...]): Label values, in the same order.
+
+    Returns:
+        str: The labels in braces, or an empty string if there are none.
+    """
+    if not names:
+        return ""
+
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+class Metric:
+    """Base of all metrics, with a name, help text and label names."""
+
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labels: tuple[str, ...] = ()
+    ) -> None:
+        """
+        Create a metric.
+
+        Args:
+            name (str): Name of the metric.
+            documentation (str): Help text of the metric.
+            labels (tuple[str, ...]): Names of the labels. Defaults to ().
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+
+    def lines(self) -> Iterator[str]:
+        """
+        Get the sample lines of the metric.
+
+        Yields:
+            str: A sample line.
+        """
+        yield from ()
+
+    def render(self) -> str:
+        """
+        Get the metric in the Prometheus text format.
+
+        Returns:
+            str: The help, type and sample lines.
+        """
+        return "\n".join(
+            [
+                f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.kind}",
+                *self.lines(),
+            ]
+        )
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labels: tuple[str, ...] = ()
+    ) -> None:
+        """
+        Create a counter at zero.
+
+        Args:
+            name (str): Name of the metric.
+            documentation (str): Help text of the metric.
+            labels (tuple[str, ...]): Names of the labels. Defaults to ().
+        """
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            *label_values (str): Values of the labels.
+            amount (float): Amount to increase by. Defaults to 1.
+        """
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def lines(self) -> Iterator[str]:
+        """
+        Get the sample lines of the counter.
+
+        Yields:
+            str: A sample line.
+        """
+        for label_values, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class Histogram(Metric):
+    """Distribution of observed values, in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """
+        Create an empty histogram.
+
+        Args:
+            name (str): Name of the metric.
+            documentation (str): Help text of the metric.
+            labels (tuple[str, ...]): Names of the labels. Defaults to ().
+            buckets (tuple[float, ...]): Upper bounds of the buckets, ascending.
+                Defaults to DEFAULT_BUCKETS.
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Record a value.
+
+        Args:
+            value (float): The observed value.
+            *label_values (str): Values of the labels.
+        """
+        counts = self._counts.setdefault(
+            label_values, [0] * (len(self.buckets) + 1)
+        )
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[label_values] = self._sums.get(label_values, 0) + value
+
+    def lines(self) -> Iterator[str]:
+        """
+        Get the bucket, sum and count lines of the histogram.
+
+        Yields:
+            str: A sample line.
+        """
+        names = (*self.labels, "le")
+        for label_values, counts in self._counts.items():
+            total = 0
+            bounds = [*map(str, self.buckets), "+Inf"]
+            for bound, count in zip(bounds, counts):
+                total += count
+                labels = _format_labels(names, (*label_values, bound))
+                yield f"{self.name}_bucket{labels} {total}"
+
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {self._sums[label_values]}"
+            yield f"{self.name}_count{labels} {total}"
+
+
+class CallbackMetric(Metric):
+    """A metric whose samples are collected when rendered."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labels: tuple[str, ...] = (),
+        callback: Callable[[], Iterable[Sample]] | None = None,
+    ) -> None:
+        """
+        Create a metric without a source yet.
+
+        Args:
+            name (str): Name of the metric.
+            documentation (str): Help text of the metric.
+            kind (str): Prometheus type, like "gauge" or "counter".
+            labels (tuple[str, ...]): Names of the labels. Defaults to ().
+            callback (Callable[[], Iterable[Sample]] | None):
+                Returns the label values and value of each sample.
+                Defaults to None, which has no samples.
+        """
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        self.callback = callback
+
+    def lines(self) -> Iterator[str]:
+        """
+        Get the sample lines from the callback.
+
+        Yields:
+            str: A sample line.
+        """
+        if self.callback is None:
+            return
+
+        for label_values, value in self.callback():
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        """Create an empty registry."""
+        self.metrics: list[Metric] = []
+
+    def add(self, metric: M) -> M:
+        """
+        Add a metric.
+
+        Args:
+            metric (M): The metric to add.
+
+        Returns:
+            M: The same metric, to allow assigning it.
+        """
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Get every metric in the Prometheus text format.
+
+        Returns:
+            str: The exposition text.
+        """
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+GATEWAY_LATENCY = REGISTRY.add(
+    CallbackMetric(
+        "discord_gateway_latency_seconds", "Gateway heartbeat latency.", "gauge"
+    )
+)
+EVENTS = REGISTRY.add(
+    CallbackMetric(
+        "discord_events_total",
+        "Gateway events received, by type.",
+        "counter",
+        ("type",),
+    )
+)
+COMMANDS = REGISTRY.add(
+    Counter("bot_commands_total", "Commands served, by command.", ("command",))
+)
+MONGO_OPERATIONS = REGISTRY.add(
+    Counter(
+        "mongo_operations_total",
+        "Mongo commands run, by command and outcome.",
+        ("command", "outcome"),
+    )
+)
+MONGO_LATENCY = REGISTRY.add(
+    Histogram(
+        "mongo_operation_duration_seconds",
+        "Mongo command round-trip time, by command.",
+        ("command",),
+    )
+)
+JOB_RUNS = REGISTRY.add(
+    Counter(
+        "scheduler_job_runs_total",
+        "Scheduler job runs, by job and outcome.",
+        ("job", "outcome"),
+    )
+)
+RATE_LIMIT_WAITS = REGISTRY.add(
+    Counter("discord_rate_limit_waits_total", "REST rate limit back offs.")
+)
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.add(
+    Counter(
+        "discord_rate_limit_wait_seconds_total",
+        "Time spent backing off REST rate limits.",
+    )
+)
+
+OUTBOX_DEPTH = REGISTRY.add(
+    CallbackMetric(
+        "outbox_queued_messages",
+        "Messages waiting in the outbox, by priority.",
+        "gauge",
+        ("priority",),
+    )
+)
+OUTBOX_SEND_SECONDS = REGISTRY.add(
+    Histogram(
+        "outbox_send_duration_seconds",
+        "Time from queueing a message to it being sent, by priority.",
+        ("priority",),
+    )
+)
+OUTBOX_FAILURES = REGISTRY.add(
+    Counter(
+        "outbox_failures_total",
+        "Messages dropped after their last attempt, by priority.",
+        ("priority",),
+    )
+)
+HTTP_REQUEST_SECONDS = REGISTRY.add(
+    Histogram(
+        "http_request_duration_seconds",
+        "Outbound http request attempts, by host and status.",
+        ("host", "status"),
+    )
+)
+HTTP_RETRIES = REGISTRY.add(
+    Counter(
+        "http_retries_total",
+        "Outbound http requests sent again, by host.",
+        ("host",),
+    )
+)
+HTTP_CIRCUITS = REGISTRY.add(
+    CallbackMetric(
+        "http_circuit_open",
+        "If requests to a host are refused after failing, by host.",
+        "gauge",
+        ("host",),
+    )
+)
+TWITCH_REQUESTS = REGISTRY.add(
+    Counter(
+        "twitch_requests_total",
+        "Twitch helix requests, by endpoint and status.",
+        ("endpoint", "status"),
+    )
+)
+TWITCH_CHANNELS = REGISTRY.add(
+    CallbackMetric(
+        "twitch_channels",
+        "Twitch channels polled for live streams, by state.",
+        "gauge",
+        ("state",),
+    )
+)
+TWITCH_POLL_SECONDS = REGISTRY.add(
+    Histogram(
+        "twitch_poll_duration_seconds",
+        "Time to poll every Twitch channel once.",
+    )
+)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Record the count and latency of every Mongo command."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        """
+        Ignore started commands, they are recorded when they finish.
+
+        Args:
+            event (monitoring.CommandStartedEvent): The started command.
+        """
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        """
+        Record a successful command.
+
+        Args:
+            event (monitoring.CommandSucceededEvent): The finished command.
+        """
+        MONGO_OPERATIONS.inc(event.command_name, "success")
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        """
+        Record a failed command.
+
+        Args:
+            event (monitoring.CommandFailedEvent): The failed command.
+        """
+        MONGO_OPERATIONS.inc(event.command_name, "failure")
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, event.command_name)
+
+
+def count_command(ctx: tanjun.abc.Context) -> None:
+    """
+    Record a served command, use as a success hook.
+
+    Args:
+        ctx (tanjun.abc.Context): Context of the command.
+    """
+    COMMANDS.inc(ctx.triggering_name)
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Track how many pooled Mongo connections are open and checked out."""
+
+    def __init__(self) -> None:
+        """Create the listener with no connections."""
+        self.open = 0
+        self.in_use = 0
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        """
+        Ignore pool creation.
+
+        Args:
+            event (monitoring.PoolCreatedEvent): The event.
+        """
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        """
+        Ignore pool clearing, the connections report being closed.
+
+        Args:
+            event (monitoring.PoolClearedEvent): The event.
+        """
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        """
+        Ignore pool closing, the connections report being closed.
+
+        Args:
+            event (monitoring.PoolClosedEvent): The event.
+        """
+
+    def connection_created(
+        self, event: monitoring.ConnectionCreatedEvent
+    ) -> None:
+        """
+        Count an opened connection.
+
+        Args:
+            event (monitoring.ConnectionCreatedEvent): The event.
+        """
+        self.open += 1
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        """
+        Ignore connections finishing their setup.
+
+        Args:
+            event (monitoring.ConnectionReadyEvent): The event.
+        """
+
+    def connection_closed(
+        self, event: monitoring.ConnectionClosedEvent
+    ) -> None:
+        """
+        Count a closed connection.
+
+        Args:
+            event (monitoring.ConnectionClosedEvent): The event.
+        """
+        self.open -= 1
+
+    def connection_check_out_started(
+        self, event: monitoring.ConnectionCheckOutStartedEvent
+    ) -> None:
+        """
+        Ignore check outs starting, they are counted when they succeed.
+
+        Args:
+            event (monitoring.ConnectionCheckOutStartedEvent): The event.
+        """
+
+    def connection_check_out_failed(
+        self, event: monitoring.ConnectionCheckOutFailedEvent
+    ) -> None:
+        """
+        Ignore failed check outs.
+
+        Args:
+            event (monitoring.ConnectionCheckOutFailedEvent): The event.
+        """
+
+    def connection_checked_out(
+        self, event: monitoring.ConnectionCheckedOutEvent
+    ) -> None:
+        """
+        Count a connection being used.
+
+        Args:
+            event (monitoring.ConnectionCheckedOutEvent): The event.
+        """
+        self.in_use += 1
+
+    def connection_checked_in(
+        self, event: monitoring.ConnectionCheckedInEvent
+    ) -> None:
+        """
+        Count a connection no longer being used.
+
+        Args:
+            event (monitoring.ConnectionCheckedInEvent): The event.
+        """
+        self.in_use -= 1
+
+
+MONGO_POOL = MongoPoolListener()
+REGISTRY.add(
+    CallbackMetric(
+        "mongo_pool_connections",
+        "Pooled Mongo connections, by state.",
+        "gauge",
+        ("state",),
+        lambda: [
+            (("open",), MONGO_POOL.open),
+            (("in_use",), MONGO_POOL.in_use),
+        ],
+    )
+)
+DNS_CACHE = REGISTRY.add(
+    CallbackMetric(
+        "dns_cache_lookups_total",
+        "Cached DNS lookups, by result.",
+        "counter",
+        ("result",),
+    )
+)
+EVENT_LOOP_LAG = REGISTRY.add(
+    CallbackMetric(
+        "event_loop_lag_seconds",
+        "Event loop wake up lag, by quantile.",
+        "gauge",
+        ("quantile",),
+    )
+)
+
+
+JOB_EVENTS = EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED
+
+
+def record_job_event(event: JobExecutionEvent) -> None:
+    """
+    Record a job run, add this as a scheduler listener for JOB_EVENTS.
+
+    Args:
+        event (JobExecutionEvent): The job event.
+    """
+    if event.code == EVENT_JOB_MISSED:
+        outcome = "missed"
+    elif event.exception is not None:
+        outcome = "error"
+    else:
+        outcome = "success"
+
+    JOB_RUNS.inc(event.job_id, outcome)
+
+
+class _ForwardHandler(logging.Handler):
+    """Pass records on to another logger."""
+
+    def __init__(self, target: str, level: int) -> None:
+        """
+        Create the handler.
+
+        Args:
+            target (str): Name of the logger to pass records to.
+            level (int): Lowest level to pass on.
+        """
+        super().__init__(level)
+        self.target = target
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Pass a record on.
+
+        Args:
+            record (logging.LogRecord): The log record.
+        """
+        logging.getLogger(self.target).handle(record)
+
+
+class RateLimitHandler(logging.Handler):
+    """
+    Record the rate limit back offs hikari logs.
+
+    hikari has no hook for rate limits, but logs every back off on the
+    "hikari.ratelimits" logger with the wait time as the last argument.
+    """
+
+    # this depends on hikari internals (checked with 2.0.0.dev102 and dev103):
+    # hikari.impl.rate_limits logs a back off from these methods, the bucket
+    # one from WindowedBurstRateLimiter.throttle and the global one from
+    # ManualRateLimiter.unlock_later. Check them when updating hikari.
+    MODULE = "rate_limits"
+    FUNCTIONS = frozenset({"throttle", "unlock_later"})
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Record the back off, if the log record is one.
+
+        Args:
+            record (logging.LogRecord): The log record.
+        """
+        if (
+            record.module != self.MODULE
+            or record.funcName not in self.FUNCTIONS
+        ):
+            return
+
+        RATE_LIMIT_WAITS.inc()
+        if record.args and isinstance(record.args, tuple):
+            wait = record.args[-1]
+            if isinstance(wait, (int, float)):
+                RATE_LIMIT_WAIT_SECONDS.inc(amount=wait)
+
+
+def install_rate_limit_handler() -> None:
+    """
+    Start recording rate limit back offs.
+
+    The back offs are logged at debug level, so the logger is lowered to debug
+    and stops propagating, records of warning and above are still passed on.
+    """
+    ratelimits = logging.getLogger("hikari.ratelimits")
+    ratelimits.setLevel(logging.DEBUG)
+    ratelimits.propagate = False
+    ratelimits.addHandler(RateLimitHandler())
+    ratelimits.addHandler(_ForwardHandler("hikari", logging.WARNING))
@@ -0,0 +1,117 @@
+"""Keeps the admin index current."""
+
+from __future__ import annotations
+
+import hikari
+import tanjun
+from loguru import logger
+
+from bot import constants, permissions
+from bot.profiling import profiler
+
+component = tanjun.Component()
+
+
+@component.with_listener(hikari.StartedEvent)
+@profiler.started_listener
+async def load_admins(
+    event: hikari.StartedEvent,
+    bot: hikari.GatewayBot = tanjun.injected(type=hikari.GatewayBot),
+    admins: permissions.AdminIndex = tanjun.injected(
+        type=permissions.AdminIndex
+    ),
+) -> None:
+    """
+    Build the admin index from the members of the guild.
+
+    Only the primary worker fetches the members, the others keep deciding
+    from the roles sent with each command.
+
+    Args:
+        event (hikari.StartedEvent): The start event.
+        bot (hikari.GatewayBot, optional): Bot to fetch the members with.
+        admins (permissions.AdminIndex, optional): Index to load.
+    """
+    if not constants.Sharding.PRIMARY:
+        return
+
+    await admins.load(bot.rest.fetch_members(constants.GUILD_ID))
+    logger.info("Loaded {} admins", len(admins))
+
+
+@component.with_listener(hikari.MemberCreateEvent)
+@component.with_listener(hikari.MemberUpdateEvent)
+async def update_admin(
+    event: hikari.MemberCreateEvent | hikari.MemberUpdateEvent,
+    admins: permissions.AdminIndex = tanjun.injected(
+        type=permissions.AdminIndex
+    ),
+) -> None:
+    """
+    Record the roles of a member that joined or changed.
+
+    Args:
+        event (hikari.MemberCreateEvent | hikari.MemberUpdateEvent):
+            The member event.
+        admins (permissions.AdminIndex, optional): Index to update.
+    """
+    if event.guild_id == constants.GUILD_ID:
+        admins.update(event.user_id, event.member.role_ids)
+
+
+@component.with_listener(hikari.MemberDeleteEvent)
+async def remove_admin(
+    event: hikari.MemberDeleteEvent,
+    admins: permissions.AdminIndex = tanjun.injected(
+        type=permissions.AdminIndex
+    ),
+) -> None:
+    """
+    Forget a member that left.
+
+    Args:
+        event (hikari.MemberDeleteEvent): The member delete event.
+        admins (permissions.AdminIndex, optional): Index to update.
+    """
+    if event.guild_id == constants.GUILD_ID:
+        admins.remove_member(event.user_id)
+
+
+@component.with_listener(hikari.RoleDeleteEvent)
+async def remove_admin_role(
+    event: hikari.RoleDeleteEvent,
+    admins: permissions.AdminIndex = tanjun.injected(
+        type=permissions.AdminIndex
+    ),
+) -> None:
+    """
+    Forget a deleted role.
+
+    Args:
+        event (hikari.RoleDeleteEvent): The role delete event.
+        admins (permissions.AdminIndex, optional): Index to update.
+    """
+    if event.guild_id == constants.GUILD_ID:
+        admins.remove_role(event.role_id)
+
+
+@tanjun.as_loader
+def load_component(client: tanjun.Client) -> None:
+    """
+    Add component to client.
+
+    Args:
+        client (tanjun.Client): Client to add component to.
+    """
+    client.add_component(component)
+
+
+@tanjun.as_unloader
+def unload_component(client: tanjun.Client) -> None:
+    """
+    Remove component from client.
+
+    Args:
+        client (tanjun.Client): Client to remove component from.
+    """
+    client.remove_component(component)
@@ -2,54 +2,153 @@
 
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
+from datetime import timezone as dt_timezone
 from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfoNotFoundError
 
 import hikari
 import tanjun
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from bot import constants, injectors
+from bot import constants, outbox, scheduling, storage, timeline
+from bot.profiling import profiler
+from bot.tracing import tracer
 
 if TYPE_CHECKING:
-    from motor import motor_asyncio as motor
+    from typing import Iterable, Iterator, Sequence
 
-    from bot.types import BirthdayDocument
 
-
-DATE_FORMAT = "%d/%m"
 HUMAN_DATE_FORMAT = "dd/mm"
+TIMER_JOB_ID = "birthday_timeline"
+
+EMBED_DESCRIPTION_LIMIT = 4096
 
 
 component = tanjun.Component()
 
 
-async def send_birthday_msg(
-    rest: hikari.impl.RESTClientImpl,
-    discord_id: int,
+def _digest_descriptions(discord_ids: Iterable[int]) -> Iterator[str]:
+    """
+    Split the birthday mentions into embed descriptions within the size limit.
+
+    Args:
+        discord_ids (Iterable[int]): Ids of users who have a birthday.
+
+    Yields:
+        str: A description mentioning as many users as fit.
+    """
+    header = "It is the birthday of:\n"
+    footer = "\nDon't forget to wish them a happy birthday!"
+    budget = EMBED_DESCRIPTION_LIMIT - len(header) - len(footer)
+
+    lines: list[str] = []
+    size = 0
+    for discord_id in discord_ids:
+        line = f"🥳 <@{discord_id}>\n"
+        if lines and size + len(line) > budget:
+            yield header + "".join(lines) + footer
+            lines = []
+            size = 0
+        lines.append(line)
+        size += len(line)
+
+    if lines:
+        yield header + "".join(lines) + footer
+
+
+async def send_birthday_digest(
+    messages: outbox.Outbox,
+    channel_id: int,
+    discord_ids: Sequence[int],
 ) -> None:
     """
-    Send message to inform users of somebodies birthday.
+    Send one message informing users of everybody who has a birthday.
+
+    The mentions are only split over more messages if they do not fit in
+    a single embed, those are queued together so they stay in order.
 
     Args:
-        rest (hikari.impl.RESTClientImpl): Rest client to send message with.
-        discord_id (int): Id of user who has a birthday
-    """
-    embed = hikari.Embed(
-        title="Happy Birthday!",
-        description="".join(
-            [
-                f"it is <@{discord_id}> birthday 🥳\n\n",
-                "dont forget to wish them a happy birthday!",
-            ]
-        ),
-        color=constants.Colors.GREEN,
+        messages (outbox.Outbox): Outbox to queue the messages in.
+        channel_id (int): Channel to send the message in.
+        discord_ids (Sequence[int]): Ids of users who have a birthday.
+    """
+    await asyncio.gather(
+        *(
+            messages.send(
+                channel_id,
+                embed=hikari.Embed(
+                    title="Happy Birthday!",
+                    description=description,
+                    color=constants.Colors.GREEN,
+                ),
+            )
+            for description in _digest_descriptions(discord_ids)
+        )
     )
 
-    await rest.create_message(constants.BIRTHDAY_CHANNEL_ID, embed=embed)
+
+def parse_date(text: str) -> tuple[int, int]:
+    """
+    Parse a user provided birthday.
+
+    Args:
+        text (str): The date, in the format of HUMAN_DATE_FORMAT.
+
+    Returns:
+        tuple[int, int]: The month and day of the birthday.
+
+    Raises:
+        ValueError: The text is not a valid day of the year.
+    """
+    parts = text.split("/")
+    if len(parts) != 2:
+        raise ValueError(f"{text!r} is not in the format {HUMAN_DATE_FORMAT}")
+
+    day, month = (int(part) for part in parts)
+    # 2000 is a leap year, so the 29th of February is accepted.
+    timeline.birthday_in_year(2000, month, day)
+    return month, day
+
+
+def arm_timer(
+    scheduler: AsyncIOScheduler, birthdays: timeline.BirthdayTimeline
+) -> None:
+    """
+    Schedule the announcement of the next birthday on the timeline.
+
+    The job has no misfire grace time, a birthday that is already due is
+    announced as soon as the scheduler runs instead of being dropped.
+
+    Args:
+        scheduler (AsyncIOScheduler): Scheduler to add the job to.
+        birthdays (timeline.BirthdayTimeline): The upcoming birthdays.
+    """
+    moment = birthdays.peek()
+
+    if moment is None:
+        if scheduler.get_job(TIMER_JOB_ID) is not None:
+            scheduler.remove_job(TIMER_JOB_ID)
+        return
+
+    scheduling.add_injected_job(
+        scheduler,
+        check_birthdays,
+        TIMER_JOB_ID,
+        "date",
+        run_date=moment,
+        misfire_grace_time=None,
+    )
 
 
 @component.with_slash_command
+@tanjun.with_str_slash_option(
+    "timezone",
+    "the time zone you live in, for example Europe/Oslo, "
+    "so we wish you a happy birthday at your midnight",
+    default=constants.DEFAULT_TIMEZONE,
+)
 @tanjun.with_str_slash_option(
     "date",
     "your birthday, provided in the format of"
@@ -61,9 +160,14 @@ async def send_birthday_msg(
 async def command_birthday(
     ctx: tanjun.SlashContext,
     date: str,
-    birthday: motor.AsyncIOMotorCollection[BirthdayDocument] = tanjun.injected(
-        callback=injectors.get_birthday_db
+    timezone: str,
+    birthday: storage.BirthdayRepository = tanjun.injected(
+        type=storage.BirthdayRepository
     ),
+    birthdays: timeline.BirthdayTimeline = tanjun.injected(
+        type=timeline.BirthdayTimeline
+    ),
+    scheduler: AsyncIOScheduler = tanjun.injected(type=AsyncIOScheduler),
 ) -> None:
     """
     Register a users birthday.
@@ -71,89 +175,144 @@ async def command_birthday(
     Args:
         ctx (tanjun.SlashContext): The commands context
         date (str): User porivded date
-        birthday (motor.AsyncIOMotorCollection[BirthdayDocument], optional):
-            Db to store data in.
+        timezone (str): User provided time zone name
+        birthday (storage.BirthdayRepository, optional): Db to store data in.
+        birthdays (timeline.BirthdayTimeline, optional):
+            Upcoming birthdays to add the user to.
+        scheduler (AsyncIOScheduler): Scheduler to rearm the timer on.
     """
     try:
-        date_d = datetime.strptime(date, DATE_FORMAT)
+        month, day = parse_date(date)
     except ValueError:
-        await ctx.respond(
-            "**ERROR:** Sorry I had some trouble converting your input to a date,"
-            f"please use format `{HUMAN_DATE_FORMAT}`"
+        with tracer.span(ctx, "rest"):
+            await ctx.respond(
+                "**ERROR:** Sorry I had some trouble converting your input to a date,"
+                f"please use format `{HUMAN_DATE_FORMAT}`"
+            )
+        return
+
+    try:
+        next_date = timeline.next_birthday(
+            month, day, timezone, datetime.now(dt_timezone.utc)
         )
+    except (ValueError, ZoneInfoNotFoundError):
+        with tracer.span(ctx, "rest"):
+            await ctx.respond(
+                f"**ERROR:** Sorry I do not know the time zone `{timezone}`, "
+                "please use a name like `Europe/Oslo` or `America/New_York`"
+            )
         return
 
-    today = datetime.today()
-    date_d = datetime(today.year, date_d.month, date_d.day)
-    date_d = datetime(
-        today.year if date_d > today else today.year + 1,
-        date_d.month,
-        date_d.day,
-    )
+    with tracer.span(ctx, "db"):
+        await birthday.upsert(
+            {
+                "discord_id": ctx.author.id,
+                "date": next_date,
+                "month": month,
+                "day": day,
+                "timezone": timezone,
+            }
+        )
 
-    await birthday.update_one(
-        {
-            "discord_id": ctx.author.id,
-        },
-        {
-            "$set": {"date": date_d},
-            "$setOnInsert": {"discord_id": ctx.author.id},
-        },
-        upsert=True,
-    )
+        birthdays.schedule(ctx.author.id, next_date)
+        arm_timer(scheduler, birthdays)
 
-    await ctx.respond(
-        "great! I will remind everyone at "
-        f"<t:{int(date_d.timestamp())}:D> in <#{constants.BIRTHDAY_CHANNEL_ID}> :D"
-    )
+    with tracer.span(ctx, "rest"):
+        await ctx.respond(
+            "great! I will remind everyone at "
+            f"<t:{int(next_date.timestamp())}:D> in <#{constants.BIRTHDAY_CHANNEL_ID}> :D"
+        )
 
 
 async def check_birthdays(
-    rest: hikari.impl.RESTClientImpl,
-    birthday_db: motor.AsyncIOMotorCollection[BirthdayDocument],
+    scheduler: AsyncIOScheduler = tanjun.injected(type=AsyncIOScheduler),
+    messages: outbox.Outbox = tanjun.injected(type=outbox.Outbox),
+    birthday_db: storage.BirthdayRepository = tanjun.injected(
+        type=storage.BirthdayRepository
+    ),
+    birthdays: timeline.BirthdayTimeline = tanjun.injected(
+        type=timeline.BirthdayTimeline
+    ),
 ) -> None:
     """
-    Check if anybody has a birthday today.
+    Announce the birthdays that are due, then arm the timer for the next one.
+
+    Everybody is announced in a single digest and all dates are moved to their
+    next birthday in one batch of writes. Birthdays that were due while the
+    bot was offline are announced on the first run after start.
 
     Args:
-        rest (hikari.impl.RESTClientImpl): Rest client to send messages with
-        birthday_db (motor.AsyncIOMotorCollection[BirthdayDocument]):
+        scheduler (AsyncIOScheduler): Scheduler to rearm the timer on.
+        messages (outbox.Outbox, optional): Outbox to queue messages in.
+        birthday_db (storage.BirthdayRepository, optional):
             Db to get birthdays from
+        birthdays (timeline.BirthdayTimeline, optional): The upcoming birthdays.
     """
-    today = datetime.today()
-    birthdays = await birthday_db.find({"date": {"$lte": today}}).to_list(None)
+    now = datetime.now(dt_timezone.utc)
+    try:
+        due = birthdays.pop_due(now)
+        if not due:
+            return
 
-    for birthday in birthdays:
-        await send_birthday_msg(rest, birthday["discord_id"])
-        new_date = birthday["date"]
-        new_date = datetime(new_date.year + 1, new_date.month, new_date.day)
-        await birthday_db.update_one(
-            {"_id": birthday["_id"]}, {"$set": {"date": new_date}}
-        )
+        discord_ids: list[int] = []
+        moves: list[tuple[int, datetime, datetime]] = []
+        for birthday in await birthday_db.due(due, now):
+            discord_id = birthday["discord_id"]
+            old_date = birthday["date"]
+            new_date = timeline.next_birthday(
+                birthday.get("month", old_date.month),
+                birthday.get("day", old_date.day),
+                birthday.get("timezone", constants.DEFAULT_TIMEZONE),
+                now,
+            )
+
+            discord_ids.append(discord_id)
+            # the old date stops a concurrent run moving it twice.
+            moves.append((discord_id, old_date, new_date))
+
+        if moves:
+            await send_birthday_digest(
+                messages, constants.BIRTHDAY_CHANNEL_ID, discord_ids
+            )
+            await birthday_db.move(moves)
+
+        # only once the db moved on, so the timeline never runs ahead of it.
+        for discord_id, _, new_date in moves:
+            birthdays.schedule(discord_id, new_date)
+    finally:
+        arm_timer(scheduler, birthdays)
 
 
 @component.with_listener(hikari.StartedEvent)
+@profiler.started_listener
 async def start_scheduler(
     event: hikari.StartedEvent,
     scheduler: AsyncIOScheduler = tanjun.injected(type=AsyncIOScheduler),
-    rest: hikari.impl.RESTClientImpl = tanjun.injected(
-        type=hikari.impl.RESTClientImpl
+    birthday: storage.BirthdayRepository = tanjun.injected(
+        type=storage.BirthdayRepository
     ),
-    birthday: motor.AsyncIOMotorCollection[BirthdayDocument] = tanjun.injected(
-        callback=injectors.get_birthday_db
+    birthdays: timeline.BirthdayTimeline = tanjun.injected(
+        type=timeline.BirthdayTimeline
     ),
 ) -> None:
     """
-    Start the loop checking for birthdays each day.
+    Build the birthday timeline and arm the timer for the first birthday.
+
+    Only the primary worker runs jobs, so the others skip it.
 
     Args:
         event (hikari.StartedEvent): The start event
         scheduler (AsyncIOScheduler): scheduler to user
-        rest (hikari.impl.RESTClientImpl, optional): Rest client to send messages with
-        birthday (motor.AsyncIOMotorCollection[BirthdayDocument], optional):
+        birthday (storage.BirthdayRepository, optional):
             db to get birthdays from
+        birthdays (timeline.BirthdayTimeline, optional):
+            Timeline to load the birthdays into.
     """
-    scheduler.add_job(check_birthdays, "cron", hour=0, args=[rest, birthday])
+    if not constants.Sharding.PRIMARY:
+        return
+
+    await birthdays.load(birthday)
+    arm_timer(scheduler, birthdays)
 
 
 @tanjun.as_loader
@@ -165,3 +324,14 @@ def load_component(client: tanjun.Client) -> None:
         client (tanjun.Client): Client to add component to
     """
     client.add_component(component)
+
+
+@tanjun.as_unloader
+def unload_component(client: tanjun.Client) -> None:
+    """
+    Remove component from client.
+
+    Args:
+        client (tanjun.Client): Client to remove component from.
+    """
+    client.remove_component(component)
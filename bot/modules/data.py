@@ -0,0 +1,258 @@
+"""Bulk export and import of the stored data."""
+
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import tempfile
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import aiohttp
+import hikari
+import tanjun
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from loguru import logger
+
+from bot import (
+    caches,
+    http_client,
+    live,
+    permissions,
+    search,
+    storage,
+    timeline,
+)
+from bot.modules import birthday
+from bot.storage import bulk
+from bot.tracing import tracer
+
+# imports are only downloaded from files uploaded to Discord.
+ALLOWED_HOSTS = frozenset({"cdn.discordapp.com", "media.discordapp.net"})
+# largest file a bot can upload to a guild without boosts.
+UPLOAD_LIMIT = 8 * 1024 * 1024
+MESSAGE_LIMIT = 2000
+
+component = tanjun.Component()
+
+
+@dataclass(frozen=True)
+class InMemoryCopies:
+    """The in memory copies of the collections, loaded again after imports."""
+
+    cache: caches.RoleInfoCache
+    index: search.RoleIndex
+    birthdays: timeline.BirthdayTimeline
+    scheduler: AsyncIOScheduler
+    poller: live.LivePoller
+
+    async def reload(self, collection: str, store: storage.Storage) -> None:
+        """
+        Load the copies of a collection from the db again.
+
+        Args:
+            collection (str): Name of the collection in bulk.COLLECTIONS.
+            store (storage.Storage): Storage to load from.
+        """
+        if collection == "roles":
+            await self.cache.load(store.roles)
+            await self.index.load(store.roles)
+        elif collection == "birthdays":
+            await self.birthdays.load(store.birthdays)
+            birthday.arm_timer(self.scheduler, self.birthdays)
+        else:
+            await self.poller.load()
+
+
+def in_memory_copies(
+    cache: caches.RoleInfoCache = tanjun.injected(type=caches.RoleInfoCache),
+    index: search.RoleIndex = tanjun.injected(type=search.RoleIndex),
+    birthdays: timeline.BirthdayTimeline = tanjun.injected(
+        type=timeline.BirthdayTimeline
+    ),
+    scheduler: AsyncIOScheduler = tanjun.injected(type=AsyncIOScheduler),
+    poller: live.LivePoller = tanjun.injected(type=live.LivePoller),
+) -> InMemoryCopies:
+    """
+    Group the in memory copies an import has to reload.
+
+    Args:
+        cache (caches.RoleInfoCache, optional): Role cache.
+        index (search.RoleIndex, optional): Role search index.
+        birthdays (timeline.BirthdayTimeline, optional): Birthday timeline.
+        scheduler (AsyncIOScheduler): Scheduler running the birthday timer.
+        poller (live.LivePoller, optional): Poller of the Twitch channels.
+
+    Returns:
+        InMemoryCopies: The copies.
+    """
+    return InMemoryCopies(cache, index, birthdays, scheduler, poller)
+
+
+@component.with_slash_command
+@tanjun.with_check(permissions.check_admin)
+@tanjun.with_str_slash_option(
+    "file_format", "format of the file", choices=bulk.FORMATS, default="jsonl"
+)
+@tanjun.with_str_slash_option(
+    "collection", "the data to export", choices=list(bulk.COLLECTIONS)
+)
+@tanjun.as_slash_command("export", "Export stored data as a file.")
+async def command_export(
+    ctx: tanjun.abc.SlashContext,
+    collection: str,
+    file_format: str,
+    store: storage.Storage = tanjun.injected(type=storage.Storage),
+) -> None:
+    """
+    Export the documents of a collection as a JSON lines or CSV file.
+
+    Args:
+        ctx (tanjun.abc.SlashContext): The interaction context.
+        collection (str): Name of the collection.
+        file_format (str): "jsonl" or "csv".
+        store (storage.Storage, optional): Storage to export from.
+    """
+    await ctx.defer()
+    with tempfile.TemporaryDirectory() as directory:
+        path = pathlib.Path(directory, f"{collection}.{file_format}")
+        with tracer.span(ctx, "db"), path.open(
+            "w", newline="", encoding="utf-8"
+        ) as stream:
+            exported = await bulk.export(
+                getattr(store, collection).documents(),
+                collection,
+                file_format,
+                stream,
+            )
+
+        with tracer.span(ctx, "rest"):
+            if path.stat().st_size > UPLOAD_LIMIT:
+                await ctx.respond(
+                    f"**ERROR:** The export of {exported} documents is too "
+                    "large to upload, use `python -m bot.storage.bulk` instead."
+                )
+                return
+
+            # deferred, so the response is the edited initial one.
+            await ctx.edit_initial_response(
+                f"Exported {exported} documents.", attachment=hikari.File(path)
+            )
+
+
+@component.with_slash_command
+@tanjun.with_check(permissions.check_admin)
+@tanjun.with_str_slash_option(
+    "url", "link of a .jsonl or .csv file uploaded to Discord"
+)
+@tanjun.with_str_slash_option(
+    "collection", "the data to import", choices=list(bulk.COLLECTIONS)
+)
+@tanjun.as_slash_command("import", "Import data from a JSON lines or CSV file.")
+async def command_import(
+    ctx: tanjun.abc.SlashContext,
+    collection: str,
+    url: str,
+    store: storage.Storage = tanjun.injected(type=storage.Storage),
+    http: http_client.HttpClient = tanjun.injected(type=http_client.HttpClient),
+    copies: InMemoryCopies = tanjun.injected(callback=in_memory_copies),
+) -> None:
+    """
+    Import documents into a collection, replacing those with the same id.
+
+    The file is streamed and written in chunks, invalid lines are skipped
+    and reported. The in memory copies of the collection are loaded again,
+    also when the import stopped halfway.
+
+    Args:
+        ctx (tanjun.abc.SlashContext): The interaction context.
+        collection (str): Name of the collection.
+        url (str): Link of the file.
+        store (storage.Storage, optional): Storage to import into.
+        http (http_client.HttpClient, optional): Client to download with.
+        copies (InMemoryCopies): Copies of the collection to reload.
+    """
+    try:
+        file_format = bulk.format_of(urlsplit(url).path)
+    except ValueError as error:
+        await ctx.respond(f"**ERROR:** {error}")
+        return
+
+    if urlsplit(url).hostname not in ALLOWED_HOSTS:
+        await ctx.respond(
+            "**ERROR:** Upload the file to Discord and use its link."
+        )
+        return
+
+    await ctx.defer()
+    report: bulk.ImportReport | None = None
+    failure = ""
+    try:
+        with tracer.span(ctx, "db"):
+            async with http.request("GET", url) as response:
+                response.raise_for_status()
+                report = await bulk.import_documents(
+                    (
+                        line.decode(errors="replace")
+                        async for line in response.content
+                    ),
+                    collection,
+                    file_format,
+                    getattr(store, collection).upsert_many,
+                )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        failure = f"Downloading the file failed: {error}"
+    except ValueError as error:
+        # aiohttp refuses lines longer than its read buffer.
+        failure = f"The file is not a valid {file_format} file: {error}"
+
+    # chunks written before a failure are stored, so reload either way.
+    with tracer.span(ctx, "db"):
+        await copies.reload(collection, store)
+
+    if report is None:
+        with tracer.span(ctx, "rest"):
+            await ctx.respond(f"**ERROR:** {failure}")
+        return
+
+    logger.info(
+        "Imported {} {} by {}, skipped {} invalid lines",
+        report.imported,
+        collection,
+        ctx.author.id,
+        report.invalid,
+    )
+    response_text = (
+        f"Imported {report.imported} documents, "
+        f"skipped {report.invalid} invalid lines."
+    )
+    if report.errors:
+        errors = "\n".join(report.errors)
+        response_text = (
+            f"{response_text}\n```\n{errors}"[: MESSAGE_LIMIT - 4] + "\n```"
+        )
+
+    with tracer.span(ctx, "rest"):
+        await ctx.respond(response_text)
+
+
+@tanjun.as_loader
+def load_component(client: tanjun.Client) -> None:
+    """
+    Add component to client.
+
+    Args:
+        client (tanjun.Client): Client to add component to.
+    """
+    client.add_component(component)
+
+
+@tanjun.as_unloader
+def unload_component(client: tanjun.Client) -> None:
+    """
+    Remove component from client.
+
+    Args:
+        client (tanjun.Client): Client to remove component from.
+    """
+    client.remove_component(component)
@@ -0,0 +1,83 @@
+"""Commands of the bot owner."""
+
+from __future__ import annotations
+
+import time
+
+import hikari
+import tanjun
+from loguru import logger
+
+from bot import gateway, permissions
+
+component = tanjun.Component()
+
+
+@component.with_slash_command
+@tanjun.with_check(permissions.check_owner)
+@tanjun.with_str_slash_option(
+    "module", "the module to reload", choices=gateway.module_names()
+)
+@tanjun.as_slash_command(
+    "reload", "Reload a module without restarting the bot."
+)
+async def command_reload(
+    ctx: tanjun.abc.SlashContext,
+    module: str,
+    client: tanjun.Client = tanjun.injected(type=tanjun.Client),
+    bot: hikari.GatewayBot = tanjun.injected(type=hikari.GatewayBot),
+) -> None:
+    """
+    Reload the code of a module, keeping the connection and the caches.
+
+    Only the worker that received the command reloads.
+
+    Args:
+        ctx (tanjun.abc.SlashContext): The interaction context.
+        module (str): Name of the module to reload.
+        client (tanjun.Client, optional): Client the module is loaded in.
+        bot (hikari.GatewayBot, optional): Bot to get the intents of.
+    """
+    started = time.perf_counter()
+    try:
+        missing = gateway.reload_module(client, module, bot.intents)
+    except Exception as error:  # noqa: B902
+        logger.exception("Reloading module {} failed", module)
+        await ctx.respond(
+            f"**ERROR:** Reloading `{module}` failed, "
+            f"the old code is still loaded: `{error!r}`"
+        )
+        return
+
+    response = (
+        f"Reloaded `{module}` in "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms."
+    )
+    if missing:
+        response += (
+            f" Its listeners need the intents {missing}, "
+            "restart to receive their events."
+        )
+    await ctx.respond(response)
+
+
+@tanjun.as_loader
+def load_component(client: tanjun.Client) -> None:
+    """
+    Add component to client.
+
+    Args:
+        client (tanjun.Client): Client to add component to.
+    """
+    client.add_component(component)
+
+
+@tanjun.as_unloader
+def unload_component(client: tanjun.Client) -> None:
+    """
+    Remove component from client.
+
+    Args:
+        client (tanjun.Client): Client to remove component from.
+    """
+    client.remove_component(component)
@@ -0,0 +1,63 @@
+"""Command performance."""
+
+import hikari
+import tanjun
+
+from bot import constants, permissions
+from bot.tracing import tracer
+
+component = tanjun.Component()
+
+
+@component.with_slash_command
+@tanjun.with_check(permissions.check_admin)
+@tanjun.as_slash_command("perf", "Get the latency of each command.")
+async def command_perf(ctx: tanjun.abc.SlashContext) -> None:
+    """
+    Display the latency percentiles of each command.
+
+    Args:
+        ctx (tanjun.abc.SlashContext): The interaction context
+    """
+    embed = hikari.Embed(
+        title="Command latency",
+        description=(
+            f"p50 / p95 / p99 over the last {constants.PERF_WINDOW} uses, "
+            f"uses over {constants.SLOW_COMMAND_THRESHOLD}s are logged."
+        ),
+        color=constants.Colors.BLUE,
+    )
+
+    for name in sorted(tracer.timings):
+        lines = [f"{len(tracer.timings[name])} uses"]
+        for part, values in tracer.percentiles(name).items():
+            formatted = " / ".join(f"{value * 1000:.0f}" for value in values)
+            lines.append(f"{part}: {formatted} ms")
+        embed.add_field(name=f"/{name}", value="\n".join(lines), inline=True)
+
+    if not tracer.timings:
+        embed.add_field(name="no data", value="No commands have been used yet.")
+
+    await ctx.respond(embed=embed)
+
+
+@tanjun.as_loader
+def load_component(client: tanjun.Client) -> None:
+    """
+    Load component.
+
+    Args:
+        client (tanjun.abc.Client): Client to add component to.
+    """
+    client.add_component(component)
+
+
+@tanjun.as_unloader
+def unload_component(client: tanjun.Client) -> None:
+    """
+    Unload component.
+
+    Args:
+        client (tanjun.abc.Client): Client to remove component from.
+    """
+    client.remove_component(component)
@@ -2,121 +2,242 @@
 
 from __future__ import annotations
 
+import time
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 import hikari
 import tanjun
+from loguru import logger
 
-from bot import constants, injectors
+from bot import caches, constants, search, storage
+from bot.profiling import profiler
+from bot.tracing import tracer
 
 if TYPE_CHECKING:
-    from motor import motor_asyncio as motor
+    from typing import Mapping
 
     from bot.types import RoleInfoDocument
 
 
+DEFAULT_DESCRIPTION = constants.DEFAULT_ROLE_DESCRIPTION
+# descriptions in search results are cut off at this length.
+SEARCH_DESCRIPTION_LENGTH = 100
+
 component = tanjun.Component()
 
 
+@dataclass(frozen=True)
+class RoleSyncReport:
+    """Outcome of reconciling the guild roles with the db."""
+
+    inserted: int
+    updated: int
+    deleted: int
+    unchanged: int
+    duration: float
+
+    @property
+    def touched(self) -> int:
+        """
+        Get the amount of documents written to.
+
+        Returns:
+            int: Inserted, updated and deleted documents combined.
+        """
+        return self.inserted + self.updated + self.deleted
+
+
+async def reconcile_roles(
+    role_info: storage.RoleInfoRepository,
+    roles: Mapping[hikari.Snowflake, hikari.Role],
+) -> tuple[RoleSyncReport, dict[int, RoleInfoDocument]]:
+    """
+    Make the db match the given roles in a single batch of writes.
+
+    The existing documents are read once, roles whose name and color did not
+    change are skipped and documents of roles that no longer exist are removed.
+
+    Args:
+        role_info (storage.RoleInfoRepository): Db to store role info in.
+        roles (Mapping[hikari.Snowflake, hikari.Role]):
+            The roles currently in the guild.
+
+    Returns:
+        tuple[RoleSyncReport, dict[int, RoleInfoDocument]]:
+            What was done and the documents now in the db, keyed by role id.
+    """
+    start = time.perf_counter()
+    documents: dict[int, RoleInfoDocument] = {
+        document["role_id"]: document
+        async for document in role_info.documents()
+    }
+    changes = storage.RoleChanges()
+
+    for role_id, role in roles.items():
+        name = role.name
+        color = role.color.raw_hex_code
+        document = documents.get(role_id)
+
+        if document is None:
+            inserted: RoleInfoDocument = {
+                "name": name,
+                "color": color,
+                "role_id": role_id,
+                "description": DEFAULT_DESCRIPTION,
+            }
+            changes.inserted.append(inserted)
+            documents[role_id] = inserted
+        elif document.get("name") != name or document.get("color") != color:
+            document["name"] = name
+            document["color"] = color
+            changes.updated.append(document)
+
+    changes.deleted = [role_id for role_id in documents if role_id not in roles]
+    for role_id in changes.deleted:
+        del documents[role_id]
+
+    await role_info.apply(changes)
+
+    report = RoleSyncReport(
+        inserted=len(changes.inserted),
+        updated=len(changes.updated),
+        deleted=len(changes.deleted),
+        unchanged=len(roles) - len(changes.inserted) - len(changes.updated),
+        duration=time.perf_counter() - start,
+    )
+    return report, documents
+
+
 @component.with_listener(hikari.StartedEvent)
+@profiler.started_listener
 async def sync_roles(
     event: hikari.StartedEvent,
     bot: hikari.GatewayBot = tanjun.injected(type=hikari.GatewayBot),
-    role_info: motor.AsyncIOMotorCollection[RoleInfoDocument] = tanjun.injected(
-        callback=injectors.get_role_info_db
+    role_info: storage.RoleInfoRepository = tanjun.injected(
+        type=storage.RoleInfoRepository
     ),
+    cache: caches.RoleInfoCache = tanjun.injected(type=caches.RoleInfoCache),
+    index: search.RoleIndex = tanjun.injected(type=search.RoleIndex),
 ) -> None:
     """
-    Sync roles in the guild with the db.
+    Sync roles in the guild with the db, then load them into the cache.
+
+    Only the primary worker syncs, so workers do not insert the same roles.
 
     Args:
         event (hikari.StartedEvent): The start event.
         bot (hikari.GatewayBot, optional): Bot to get guild date from.
-        role_info (motor.AsyncIOMotorCollection[RoleInfoDocument], optional):
+        role_info (storage.RoleInfoRepository, optional):
             Db to store role info in.
+        cache (caches.RoleInfoCache, optional): Cache to load role info into.
+        index (search.RoleIndex, optional): Search index to load roles into.
     """
+    if not constants.Sharding.PRIMARY:
+        return
+
     guild = await bot.rest.fetch_guild(constants.GUILD_ID)
+    report, documents = await reconcile_roles(role_info, guild.get_roles())
 
-    for role_id, role in guild.get_roles().items():
-        await role_info.update_one(
-            {"role_id": role_id},
-            {
-                "$set": {"name": role.name, "color": role.color.raw_hex_code},
-                "$setOnInsert": {
-                    "role_id": role_id,
-                    "description": "No description provided yet.",
-                },
-            },
-            upsert=True,
-        )
+    logger.info(
+        "Synced roles: {} documents touched "
+        "({} inserted, {} updated, {} deleted, {} unchanged) in {:.3f}s",
+        report.touched,
+        report.inserted,
+        report.updated,
+        report.deleted,
+        report.unchanged,
+        report.duration,
+    )
+
+    cache.clear()
+    for document in documents.values():
+        cache.set(document)
+    index.rebuild(documents.values())
 
 
 @component.with_listener(hikari.RoleCreateEvent)
 async def create_new_role(
     event: hikari.RoleCreateEvent,
-    role_info: motor.AsyncIOMotorCollection[RoleInfoDocument] = tanjun.injected(
-        callback=injectors.get_role_info_db
+    role_info: storage.RoleInfoRepository = tanjun.injected(
+        type=storage.RoleInfoRepository
     ),
+    cache: caches.RoleInfoCache = tanjun.injected(type=caches.RoleInfoCache),
+    index: search.RoleIndex = tanjun.injected(type=search.RoleIndex),
 ) -> None:
     """
     Store new role when one is created.
 
     Args:
         event (hikari.RoleCreateEvent): Role created event
-        role_info (motor.AsyncIOMotorCollection[RoleInfoDocument], optional):
+        role_info (storage.RoleInfoRepository, optional):
             Db to store role info in.
+        cache (caches.RoleInfoCache, optional): Cache to store role info in.
+        index (search.RoleIndex, optional): Search index to add the role to.
     """
     role = event.role
-    await role_info.insert_one(
-        {
-            "name": role.name,
-            "color": role.color.raw_hex_code,
-            "role_id": role.id,
-            "description": "No description provided yet.",
-        }
-    )
+    document: RoleInfoDocument = {  # type: ignore
+        "name": role.name,
+        "color": role.color.raw_hex_code,
+        "role_id": role.id,
+        "description": DEFAULT_DESCRIPTION,
+    }
+    await role_info.add(document)
+    cache.set(document)
+    index.add(document)
 
 
 @component.with_listener(hikari.RoleDeleteEvent)
 async def remove_deleted_roles(
     event: hikari.RoleDeleteEvent,
-    role_info: motor.AsyncIOMotorCollection = tanjun.injected(
-        callback=injectors.get_role_info_db
+    role_info: storage.RoleInfoRepository = tanjun.injected(
+        type=storage.RoleInfoRepository
     ),
+    cache: caches.RoleInfoCache = tanjun.injected(type=caches.RoleInfoCache),
+    index: search.RoleIndex = tanjun.injected(type=search.RoleIndex),
 ) -> None:
     """
     Remove role when it is deleted.
 
     Args:
         event (hikari.RoleDeleteEvent): Role delete event
-        role_info (motor.AsyncIOMotorCollection, optional): Db to remove role from.
+        role_info (storage.RoleInfoRepository, optional):
+            Db to remove role from.
+        cache (caches.RoleInfoCache, optional): Cache to remove role from.
+        index (search.RoleIndex, optional): Search index to remove role from.
     """
-    await role_info.delete_one({"role_id": event.role_id})
+    await role_info.remove(event.role_id)
+    cache.remove(event.role_id)
+    index.remove(event.role_id)
 
 
 @component.with_listener(hikari.RoleUpdateEvent)
 async def store_new_role_info(
     event: hikari.RoleUpdateEvent,
-    role_info: motor.AsyncIOMotorCollection[RoleInfoDocument] = tanjun.injected(
-        callback=injectors.get_role_info_db
+    role_info: storage.RoleInfoRepository = tanjun.injected(
+        type=storage.RoleInfoRepository
     ),
+    cache: caches.RoleInfoCache = tanjun.injected(type=caches.RoleInfoCache),
+    index: search.RoleIndex = tanjun.injected(type=search.RoleIndex),
 ) -> None:
     """
     Update role info when role is updated.
 
     Args:
         event (hikari.RoleUpdateEvent): Role update event
-        role_info (motor.AsyncIOMotorCollection[RoleInfoDocument], optional):
+        role_info (storage.RoleInfoRepository, optional):
             Db to update info in.
+        cache (caches.RoleInfoCache, optional): Cache to update info in.
+        index (search.RoleIndex, optional): Search index to update.
     """
-    await role_info.update_one(
-        {"role_id": event.role_id},
-        {
-            "$set": {
-                "name": event.role.name,
-                "color": event.role.color.raw_hex_code,
-            }
-        },
+    name = event.role.name
+    color = event.role.color.raw_hex_code
+
+    await role_info.update(event.role_id, name=name, color=color)
+    cache.update(event.role_id, name=name, color=color)
+    index.update(event.role_id, name=name, color=color)
+    logger.bind(sample="role_update", role_id=event.role_id).info(
+        "Role {} updated", name
     )
 
 
@@ -126,9 +247,10 @@ async def store_new_role_info(
 async def command_role(
     ctx: tanjun.SlashContext,
     role: hikari.Role,
-    role_info: motor.AsyncIOMotorCollection[RoleInfoDocument] = tanjun.injected(
-        callback=injectors.get_role_info_db
+    role_info: storage.RoleInfoRepository = tanjun.injected(
+        type=storage.RoleInfoRepository
     ),
+    cache: caches.RoleInfoCache = tanjun.injected(type=caches.RoleInfoCache),
 ) -> None:
     """
     Get description of role.
@@ -136,22 +258,59 @@ async def command_role(
     Args:
         ctx (tanjun.SlashContext): The commands context.
         role (hikari.Role): The role to get info of.
-        role_info (motor.AsyncIOMotorCollection[RoleInfoDocument], optional):
-            Db to get info from.
+        role_info (storage.RoleInfoRepository, optional):
+            Db to get info from on a cache miss.
+        cache (caches.RoleInfoCache, optional): Cache to get info from.
     """
-    role_data = await role_info.find_one({"role_id": role.id})
+    with tracer.span(ctx, "db"):
+        role_data = await cache.fetch(role_info, role.id)
 
     if role_data is None:
-        await ctx.respond(
-            "Sorry an unecpected error occured: **Role not found**"
-        )
+        with tracer.span(ctx, "rest"):
+            await ctx.respond(
+                "Sorry an unecpected error occured: **Role not found**"
+            )
         return
 
     embed = hikari.Embed(
         title=role.name, color=role.color, description=role_data["description"]
     )
 
-    await ctx.respond(embed=embed)
+    with tracer.span(ctx, "rest"):
+        await ctx.respond(embed=embed)
+
+
+@component.with_slash_command
+@tanjun.with_str_slash_option("query", "words of the role name or description")
+@tanjun.as_slash_command("role-search", "find roles by name or description")
+async def command_role_search(
+    ctx: tanjun.SlashContext,
+    query: str,
+    index: search.RoleIndex = tanjun.injected(type=search.RoleIndex),
+) -> None:
+    """
+    List the roles best matching a query.
+
+    Args:
+        ctx (tanjun.SlashContext): The commands context.
+        query (str): What to search for.
+        index (search.RoleIndex, optional): Search index to search in.
+    """
+    documents = index.search(query)
+    embed = hikari.Embed(
+        title=f"Roles matching {query!r}", color=constants.Colors.BLUE
+    )
+    for document in documents:
+        description = document["description"]
+        if len(description) > SEARCH_DESCRIPTION_LENGTH:
+            description = description[: SEARCH_DESCRIPTION_LENGTH - 1] + "…"
+        embed.add_field(name=document["name"], value=description)
+
+    if not documents:
+        embed.description = "No roles found."
+
+    with tracer.span(ctx, "rest"):
+        await ctx.respond(embed=embed)
 
 
 @tanjun.as_loader
@@ -163,3 +322,14 @@ def load_component(client: tanjun.Client) -> None:
         client (tanjun.Client): Client to add component to.
     """
     client.add_component(component)
+
+
+@tanjun.as_unloader
+def unload_component(client: tanjun.Client) -> None:
+    """
+    Remove component from client.
+
+    Args:
+        client (tanjun.Client): Client to remove component from.
+    """
+    client.remove_component(component)
@@ -1,13 +1,25 @@
 """Bot status."""
 
+import asyncio
 import os
 import sys
 import time
 
 import hikari
 import tanjun
-
-from bot import constants
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from bot import (
+    caches,
+    constants,
+    loop_monitor,
+    metrics,
+    outbox,
+    profiling,
+    utils,
+)
+from bot.profiling import profiler
+from bot.tracing import tracer
 
 component = tanjun.Component()
 
@@ -17,6 +29,16 @@ component = tanjun.Component()
 async def command_status(
     ctx: tanjun.abc.SlashContext,
     bot: hikari.GatewayBot = tanjun.injected(type=hikari.GatewayBot),
+    role_cache: caches.RoleInfoCache = tanjun.injected(
+        type=caches.RoleInfoCache
+    ),
+    startup: profiling.StartupProfiler = tanjun.injected(
+        type=profiling.StartupProfiler
+    ),
+    monitor: loop_monitor.LoopLagMonitor = tanjun.injected(
+        type=loop_monitor.LoopLagMonitor
+    ),
+    scheduler: AsyncIOScheduler = tanjun.injected(type=AsyncIOScheduler),
 ) -> None:
     """
     Dispat the status of the bot.
@@ -24,7 +46,28 @@ async def command_status(
     Args:
         ctx (tanjun.abc.SlashContext): The interaction context
         bot (hikari.GatewayBot, optional): hikari bot instace, used to get latency.
+        role_cache (caches.RoleInfoCache, optional): Cache to get hit rate of.
+        startup (profiling.StartupProfiler, optional):
+            Profiler to get the startup breakdown from.
+        monitor (loop_monitor.LoopLagMonitor, optional):
+            Monitor to get the event loop lag from.
+        scheduler (AsyncIOScheduler): Scheduler to count jobs of.
     """
+    if startup.finished_after is None:
+        startup_info = "still starting"
+    else:
+        startup_info = f"{startup.finished_after:.2f}s, slowest:\n" + "\n".join(
+            f"{name}: {duration * 1000:.0f} ms"
+            for name, duration in startup.slowest(3)
+        )
+
+    lag = " / ".join(f"{value * 1000:.1f}" for value in monitor.percentiles())
+    cache_sizes = (
+        f"{len(bot.cache.get_guilds_view())} guilds, "
+        f"{len(bot.cache.get_roles_view())} roles, "
+        f"{len(bot.cache.get_users_view())} users"
+    )
+
     embed = (
         hikari.Embed(title="Bot status", color=constants.Colors.GREEN)
         .add_field(name="os", value=os.uname().release, inline=True)
@@ -40,15 +83,50 @@ async def command_status(
             value=f"{bot.heartbeat_latency * 1000 :.0f} ms",
             inline=True,
         )
+        .add_field(
+            name="role cache",
+            value=f"{role_cache.hits} hits, {role_cache.misses} misses",
+            inline=True,
+        )
+        .add_field(
+            name="loop lag p50 / p95 / p99",
+            value=f"{lag} ms, {monitor.stalls} stalls",
+            inline=True,
+        )
+        .add_field(
+            name="memory",
+            value=f"{utils.memory_usage() / (1024 * 1024):.1f} MiB",
+            inline=True,
+        )
+        .add_field(
+            name="tasks", value=str(len(asyncio.all_tasks())), inline=True
+        )
+        .add_field(name="cache", value=cache_sizes, inline=True)
+        .add_field(
+            name="mongo pool",
+            value=(
+                f"{metrics.MONGO_POOL.in_use} in use, "
+                f"{metrics.MONGO_POOL.open} open"
+            ),
+            inline=True,
+        )
+        .add_field(
+            name="scheduled jobs",
+            value=str(len(scheduler.get_jobs())),
+            inline=True,
+        )
+        .add_field(name="startup", value=startup_info)
         .add_field(
             name="started", value=f"<t:{component.metadata['start_time']}:R>"
         )
     )
 
-    await ctx.respond(embed=embed)
+    with tracer.span(ctx, "rest"):
+        await ctx.respond(embed=embed)
 
 
 @component.with_listener(hikari.StartedEvent)
+@profiler.started_listener
 async def store_start_time(
     event: hikari.StartedEvent,
 ) -> None:
@@ -62,27 +140,30 @@ async def store_start_time(
 
 
 @component.with_listener(hikari.StartedEvent)
+@profiler.started_listener
 async def send_online_embed(
     event: hikari.StartedEvent,
-    rest: hikari.impl.RESTClientImpl = tanjun.injected(
-        type=hikari.impl.RESTClientImpl
-    ),
+    messages: outbox.Outbox = tanjun.injected(type=outbox.Outbox),
 ) -> None:
     """
     Send an embed when the bot start.
 
+    Only the primary worker sends it, so it is sent once.
+
     Args:
         event (hikari.StartedEvent): Start event.
-        rest (hikari.impl.RESTClientImpl, optional):
-            Rest application to create message with.
+        messages (outbox.Outbox, optional): Outbox to queue the embed in.
     """
+    if not constants.Sharding.PRIMARY:
+        return
+
     embed = hikari.Embed(
         title="Bot online",
         color=constants.Colors.GREEN,
         description="Bot is online!",
     )
 
-    await rest.create_message(constants.LOG_CHANNEL_ID, embed=embed)
+    messages.log(constants.LOG_CHANNEL_ID, embed)
 
 
 @tanjun.as_loader
@@ -94,3 +175,14 @@ def load_component(client: tanjun.Client) -> None:
         client (tanjun.abc.Client): Client to add component to.
     """
     client.add_component(component)
+
+
+@tanjun.as_unloader
+def unload_component(client: tanjun.Client) -> None:
+    """
+    Unload component.
+
+    Args:
+        client (tanjun.abc.Client): Client to remove component from.
+    """
+    client.remove_component(component)
@@ -0,0 +1,256 @@
+"""Twitch commands and live announcements."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import aiohttp
+import hikari
+import tanjun
+from loguru import logger
+
+from bot import constants, live, storage, twitch
+from bot.profiling import profiler
+from bot.tracing import tracer
+
+if TYPE_CHECKING:
+    from bot.types import TwitchUserData
+
+BROADCASTER_TYPES = {"partner": "Partner", "affiliate": "Affiliate"}
+
+component = tanjun.Component()
+
+
+async def lookup(
+    ctx: tanjun.SlashContext, client: twitch.TwitchClient, login: str
+) -> TwitchUserData | None:
+    """
+    Look up a user, telling the user when that fails.
+
+    Args:
+        ctx (tanjun.SlashContext): The commands context.
+        client (twitch.TwitchClient): Client to look the user up.
+        login (str): Login name of the user.
+
+    Returns:
+        TwitchUserData | None: The user, None if it was not found.
+    """
+    try:
+        with tracer.span(ctx, "rest"):
+            user = await client.get_user(login)
+    except (
+        twitch.TwitchError,
+        aiohttp.ClientError,
+        asyncio.TimeoutError,
+    ) as error:
+        logger.warning("Twitch lookup of {!r} failed: {}", login, error)
+        with tracer.span(ctx, "rest"):
+            await ctx.respond(
+                "**ERROR:** Sorry I could not reach twitch, try again later"
+            )
+        return None
+
+    if user is None:
+        with tracer.span(ctx, "rest"):
+            await ctx.respond(f"Sorry there is no twitch user `{login}`")
+    return user
+
+
+@component.with_slash_command
+@tanjun.with_str_slash_option("login", "login name of the twitch user")
+@tanjun.as_slash_command("twitch", "get information on a twitch user")
+async def command_twitch(
+    ctx: tanjun.SlashContext,
+    login: str,
+    client: twitch.TwitchClient = tanjun.injected(type=twitch.TwitchClient),
+) -> None:
+    """
+    Show a Twitch user.
+
+    Args:
+        ctx (tanjun.SlashContext): The commands context.
+        login (str): Login name of the user.
+        client (twitch.TwitchClient, optional): Client to look the user up.
+    """
+    user = await lookup(ctx, client, login)
+    if user is None:
+        return
+
+    created = datetime.fromisoformat(user["created_at"].replace("Z", "+00:00"))
+    embed = (
+        hikari.Embed(
+            title=user["display_name"],
+            url=f"https://twitch.tv/{user['login']}",
+            description=user["description"] or None,
+            color=constants.Colors.BLUE,
+        )
+        .set_thumbnail(user["profile_image_url"] or None)
+        .add_field(name="views", value=f"{user['view_count']:,}", inline=True)
+        .add_field(
+            name="created",
+            value=f"<t:{int(created.timestamp())}:D>",
+            inline=True,
+        )
+    )
+    broadcaster_type = BROADCASTER_TYPES.get(user["broadcaster_type"])
+    if broadcaster_type is not None:
+        embed.add_field(name="type", value=broadcaster_type, inline=True)
+
+    with tracer.span(ctx, "rest"):
+        await ctx.respond(embed=embed)
+
+
+@component.with_slash_command
+@tanjun.with_str_slash_option("login", "login name of your twitch channel")
+@tanjun.as_slash_command(
+    "twitch-register", "announce when your twitch channel goes live"
+)
+async def command_twitch_register(
+    ctx: tanjun.SlashContext,
+    login: str,
+    client: twitch.TwitchClient = tanjun.injected(type=twitch.TwitchClient),
+    channels: storage.TwitchChannelRepository = tanjun.injected(
+        type=storage.TwitchChannelRepository
+    ),
+    poller: live.LivePoller = tanjun.injected(type=live.LivePoller),
+) -> None:
+    """
+    Register a channel of the user for live announcements.
+
+    Args:
+        ctx (tanjun.SlashContext): The commands context.
+        login (str): Login name of the channel.
+        client (twitch.TwitchClient, optional): Client to look the channel up.
+        channels (storage.TwitchChannelRepository, optional):
+            Db to store the channel in.
+        poller (live.LivePoller, optional): Poller to start polling it on.
+    """
+    user = await lookup(ctx, client, login)
+    if user is None:
+        return
+
+    with tracer.span(ctx, "db"):
+        existing = await channels.get(user["id"])
+    if existing is not None and existing["discord_id"] != ctx.author.id:
+        with tracer.span(ctx, "rest"):
+            await ctx.respond(
+                f"**ERROR:** `{user['login']}` is already registered by "
+                f"<@{existing['discord_id']}>"
+            )
+        return
+
+    document = {
+        "user_id": user["id"],
+        "login": user["login"],
+        "discord_id": ctx.author.id,
+        # a stream that is already announced is not announced again.
+        "stream_id": None if existing is None else existing["stream_id"],
+    }
+    with tracer.span(ctx, "db"):
+        await channels.upsert(document)  # type: ignore
+    poller.track(document)  # type: ignore
+
+    with tracer.span(ctx, "rest"):
+        await ctx.respond(
+            f"great! I will announce in <#{constants.Twitch.LIVE_CHANNEL_ID}> "
+            f"when {user['display_name']} goes live"
+        )
+
+
+@component.with_slash_command
+@tanjun.with_str_slash_option("login", "login name of your twitch channel")
+@tanjun.as_slash_command(
+    "twitch-unregister", "stop announcing when your twitch channel goes live"
+)
+async def command_twitch_unregister(
+    ctx: tanjun.SlashContext,
+    login: str,
+    client: twitch.TwitchClient = tanjun.injected(type=twitch.TwitchClient),
+    channels: storage.TwitchChannelRepository = tanjun.injected(
+        type=storage.TwitchChannelRepository
+    ),
+    poller: live.LivePoller = tanjun.injected(type=live.LivePoller),
+) -> None:
+    """
+    Stop the live announcements of a channel of the user.
+
+    Args:
+        ctx (tanjun.SlashContext): The commands context.
+        login (str): Login name of the channel.
+        client (twitch.TwitchClient, optional): Client to look the channel up.
+        channels (storage.TwitchChannelRepository, optional):
+            Db to remove the channel from.
+        poller (live.LivePoller, optional): Poller to stop polling it on.
+    """
+    user = await lookup(ctx, client, login)
+    if user is None:
+        return
+
+    with tracer.span(ctx, "db"):
+        existing = await channels.get(user["id"])
+    if existing is None or existing["discord_id"] != ctx.author.id:
+        with tracer.span(ctx, "rest"):
+            await ctx.respond(
+                f"**ERROR:** You did not register `{user['login']}`"
+            )
+        return
+
+    with tracer.span(ctx, "db"):
+        await channels.remove(user["id"])
+    poller.untrack(user["id"])
+
+    with tracer.span(ctx, "rest"):
+        await ctx.respond(
+            f"done, I will no longer announce {user['display_name']}"
+        )
+
+
+@component.with_listener(hikari.StartedEvent)
+@profiler.started_listener
+async def start_poller(
+    event: hikari.StartedEvent,
+    poller: live.LivePoller = tanjun.injected(type=live.LivePoller),
+) -> None:
+    """
+    Load the registered channels and start polling them.
+
+    Only the primary worker polls, so streams are announced once. Without
+    an announcement channel or Twitch application nothing is polled.
+
+    Args:
+        event (hikari.StartedEvent): The start event.
+        poller (live.LivePoller, optional): The poller to start.
+    """
+    if not (
+        constants.Sharding.PRIMARY
+        and constants.Twitch.LIVE_CHANNEL_ID
+        and constants.Twitch.CLIENT_ID
+    ):
+        return
+
+    await poller.load()
+    poller.start()
+
+
+@tanjun.as_loader
+def load_component(client: tanjun.Client) -> None:
+    """
+    Add component to client.
+
+    Args:
+        client (tanjun.Client): Client to add component to.
+    """
+    client.add_component(component)
+
+
+@tanjun.as_unloader
+def unload_component(client: tanjun.Client) -> None:
+    """
+    Remove component from client.
+
+    Args:
+        client (tanjun.Client): Client to remove component from.
+    """
+    client.remove_component(component)
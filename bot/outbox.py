@@ -0,0 +1,413 @@
+"""Queued outbound messages, sent per channel in priority order."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import enum
+import heapq
+import itertools
+import random
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import aiohttp
+import hikari
+from loguru import logger
+
+from bot import constants, metrics
+
+if TYPE_CHECKING:
+    from typing import Any, Awaitable, Callable
+
+# failures worth another attempt, anything else will fail again.
+RETRYABLE = (
+    hikari.InternalServerError,
+    hikari.RateLimitTooLongError,
+    aiohttp.ClientConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+class Priority(enum.IntEnum):
+    """Order messages to a channel are sent in, lowest first."""
+
+    # replies a user is looking at.
+    HIGH = 0
+    # announcements.
+    NORMAL = 1
+    # log messages, coalesced into batches of embeds.
+    LOG = 2
+
+
+@dataclass(eq=False)
+class Outgoing:
+    """A queued message."""
+
+    priority: Priority
+    send: Callable[[], Awaitable[Any]]
+    # None for fire-and-forget messages nobody waits on.
+    future: asyncio.Future[Any] | None
+    queued_at: float
+
+
+@dataclass(eq=False)
+class _Channel:
+    """Messages queued for a channel and the task sending them."""
+
+    # (priority, sequence, message), the sequence keeps the order stable.
+    heap: list[tuple[int, int, Outgoing]] = field(default_factory=list)
+    logs: list[hikari.Embed] = field(default_factory=list)
+    logs_queued_at: float = 0.0
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        """
+        Get the amount of queued messages, every log embed counted.
+
+        Returns:
+            int: The amount of messages.
+        """
+        return len(self.heap) + len(self.logs)
+
+
+def embed_size(embed: hikari.Embed) -> int:
+    """
+    Count the characters of an embed towards Discord's per message limit.
+
+    Args:
+        embed (hikari.Embed): The embed.
+
+    Returns:
+        int: The amount of characters.
+    """
+    texts = [embed.title, embed.description]
+    if embed.footer is not None:
+        texts.append(embed.footer.text)
+    if embed.author is not None:
+        texts.append(embed.author.name)
+    for embed_field in embed.fields:
+        texts.extend((embed_field.name, embed_field.value))
+
+    return sum(len(text) for text in texts if text)
+
+
+class Outbox:
+    """
+    Sends messages from a queue per channel, callers never wait on hikari.
+
+    Callers return straight away instead of waiting in the rate limit buckets
+    of hikari. Each channel has its own queue and sending task, a burst to one
+    channel does not hold up the others. Within a channel messages go out by
+    priority, log embeds wait briefly and are sent together in a single
+    message. Failed sends are retried with an exponential back off.
+    """
+
+    def __init__(self, rest: hikari.api.RESTClient) -> None:
+        """
+        Create an empty outbox.
+
+        Args:
+            rest (hikari.api.RESTClient): Rest client to send messages with.
+        """
+        self.rest = rest
+        self._channels: dict[int, _Channel] = {}
+        self._sequence = itertools.count()
+        self._closing = False
+
+    def depth(self) -> dict[Priority, int]:
+        """
+        Count the queued messages.
+
+        Returns:
+            dict[Priority, int]: The amount of messages, by priority.
+        """
+        depth = dict.fromkeys(Priority, 0)
+        for channel in self._channels.values():
+            for priority, _, _ in channel.heap:
+                depth[Priority(priority)] += 1
+            depth[Priority.LOG] += len(channel.logs)
+        return depth
+
+    def submit(
+        self,
+        channel_id: int,
+        send: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.NORMAL,
+    ) -> asyncio.Future[Any]:
+        """
+        Queue any rest call that counts towards a channel's rate limit.
+
+        Args:
+            channel_id (int): Channel the call is for.
+            send (Callable[[], Awaitable[Any]]): Makes the call, it is called
+                again for every retry.
+            priority (Priority): Priority of the call.
+                Defaults to Priority.NORMAL.
+
+        Returns:
+            asyncio.Future[Any]: Result of the call, awaiting it is optional.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # mark the exception retrieved, failures are logged by _fail.
+        future.add_done_callback(
+            lambda done: done.cancelled() or done.exception()
+        )
+
+        channel = self._channel(channel_id)
+        heapq.heappush(
+            channel.heap,
+            (
+                priority,
+                next(self._sequence),
+                Outgoing(priority, send, future, loop.time()),
+            ),
+        )
+        self._wake(channel_id, channel)
+        return future
+
+    def send(
+        self,
+        channel_id: int,
+        *,
+        priority: Priority = Priority.NORMAL,
+        **kwargs: Any,
+    ) -> asyncio.Future[hikari.Message]:
+        """
+        Queue a message.
+
+        Args:
+            channel_id (int): Channel to send the message in.
+            priority (Priority): Priority of the message.
+                Defaults to Priority.NORMAL.
+            **kwargs (Any): Arguments of hikari's create_message.
+
+        Returns:
+            asyncio.Future[hikari.Message]: The sent message, awaiting it is
+                optional.
+        """
+        return self.submit(
+            channel_id,
+            lambda: self.rest.create_message(channel_id, **kwargs),
+            priority,
+        )
+
+    def log(self, channel_id: int, embed: hikari.Embed) -> None:
+        """
+        Queue a log embed, it is sent together with the other queued ones.
+
+        Args:
+            channel_id (int): Channel to send the embed in.
+            embed (hikari.Embed): The embed.
+        """
+        channel = self._channel(channel_id)
+        if not channel.logs:
+            channel.logs_queued_at = asyncio.get_running_loop().time()
+        channel.logs.append(embed)
+        self._wake(channel_id, channel)
+
+    async def close(
+        self, timeout: float = constants.Outbox.CLOSE_TIMEOUT
+    ) -> None:
+        """
+        Send what is queued, then stop, cancelling what is left at the timeout.
+
+        The futures of the messages that were not sent are cancelled.
+
+        Args:
+            timeout (float): Seconds to wait for the queues to drain.
+                Defaults to constants.Outbox.CLOSE_TIMEOUT.
+        """
+        self._closing = True
+        tasks = [
+            channel.task
+            for channel in self._channels.values()
+            if channel.task is not None
+        ]
+        for channel in self._channels.values():
+            # skip the coalescing wait.
+            channel.wakeup.set()
+
+        if not tasks:
+            return
+
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if not pending:
+            return
+
+        for task in pending:
+            task.cancel()
+        # the message being sent cancels its own future, see _deliver.
+        await asyncio.wait(pending)
+
+        logger.warning(
+            "Outbox closed with {} unsent messages",
+            sum(map(len, self._channels.values())),
+        )
+        for channel in self._channels.values():
+            for _, _, outgoing in channel.heap:
+                if outgoing.future is not None:
+                    outgoing.future.cancel()
+        self._channels.clear()
+
+    def _channel(self, channel_id: int) -> _Channel:
+        """
+        Get the queue of a channel, creating it if needed.
+
+        Args:
+            channel_id (int): Id of the channel.
+
+        Returns:
+            _Channel: The queue.
+        """
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = self._channels[channel_id] = _Channel()
+        return channel
+
+    def _wake(self, channel_id: int, channel: _Channel) -> None:
+        """
+        Make sure a task is sending the messages of a channel.
+
+        Args:
+            channel_id (int): Id of the channel.
+            channel (_Channel): Queue of the channel.
+        """
+        channel.wakeup.set()
+        if channel.task is None:
+            channel.task = asyncio.create_task(self._drain(channel_id, channel))
+
+    async def _next(
+        self, channel_id: int, channel: _Channel
+    ) -> Outgoing | None:
+        """
+        Take the next message of a channel, coalescing the log embeds.
+
+        Log embeds are only sent once nothing else is queued and the oldest
+        waited COALESCE_DELAY, so more can join the batch.
+
+        Args:
+            channel_id (int): Id of the channel.
+            channel (_Channel): Queue of the channel.
+
+        Returns:
+            Outgoing | None: The message, None if the queue is empty.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            if channel.heap:
+                return heapq.heappop(channel.heap)[2]
+
+            if not channel.logs:
+                return None
+
+            remaining = (
+                channel.logs_queued_at
+                + constants.Outbox.COALESCE_DELAY
+                - loop.time()
+            )
+            if remaining <= 0 or self._closing:
+                break
+
+            channel.wakeup.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(channel.wakeup.wait(), remaining)
+
+        batch: list[hikari.Embed] = []
+        size = 0
+        for embed in channel.logs:
+            if batch and (
+                len(batch) == constants.Outbox.MAX_EMBEDS
+                or size + embed_size(embed) > constants.Outbox.MAX_CHARACTERS
+            ):
+                break
+            batch.append(embed)
+            size += embed_size(embed)
+
+        queued_at = channel.logs_queued_at
+        del channel.logs[: len(batch)]
+        # the rest is sent straight after, without a second wait.
+        channel.logs_queued_at = 0.0
+
+        return Outgoing(
+            Priority.LOG,
+            lambda: self.rest.create_message(channel_id, embeds=batch),
+            None,
+            queued_at,
+        )
+
+    async def _drain(self, channel_id: int, channel: _Channel) -> None:
+        """
+        Send the messages of a channel until its queue is empty.
+
+        Args:
+            channel_id (int): Id of the channel.
+            channel (_Channel): Queue of the channel.
+        """
+        try:
+            while (
+                outgoing := await self._next(channel_id, channel)
+            ) is not None:
+                await self._deliver(outgoing)
+        finally:
+            channel.task = None
+            if not channel:
+                del self._channels[channel_id]
+
+    async def _deliver(self, outgoing: Outgoing) -> None:
+        """
+        Send a message, retrying failures that may pass.
+
+        Args:
+            outgoing (Outgoing): The message.
+
+        Raises:
+            asyncio.CancelledError: The outbox closed while sending it.
+        """
+        loop = asyncio.get_running_loop()
+        label = outgoing.priority.name.lower()
+        delay = constants.Outbox.RETRY_DELAY
+
+        for attempt in itertools.count(1):
+            try:
+                result = await outgoing.send()
+            except asyncio.CancelledError:
+                # the outbox is closing, nobody is going to send it.
+                if outgoing.future is not None:
+                    outgoing.future.cancel()
+                raise
+            except RETRYABLE as error:
+                if attempt == constants.Outbox.MAX_ATTEMPTS:
+                    self._fail(outgoing, error)
+                    return
+                # the jitter keeps retries of many channels apart.
+                jitter = random.uniform(0.5, 1.5)  # noqa: S311, DUO102
+                await asyncio.sleep(delay * jitter)
+                delay = min(delay * 2, constants.Outbox.MAX_RETRY_DELAY)
+            except Exception as error:  # noqa: B902
+                self._fail(outgoing, error)
+                return
+            else:
+                metrics.OUTBOX_SEND_SECONDS.observe(
+                    loop.time() - outgoing.queued_at, label
+                )
+                if outgoing.future is not None and not outgoing.future.done():
+                    outgoing.future.set_result(result)
+                return
+
+    @staticmethod
+    def _fail(outgoing: Outgoing, error: Exception) -> None:
+        """
+        Give up on a message.
+
+        Args:
+            outgoing (Outgoing): The message.
+            error (Exception): Why it could not be sent.
+        """
+        metrics.OUTBOX_FAILURES.inc(outgoing.priority.name.lower())
+        # logged here, fire-and-forget callers never see the exception.
+        logger.opt(exception=error).error("Dropped a queued message")
+        if outgoing.future is not None and not outgoing.future.done():
+            outgoing.future.set_exception(error)
@@ -0,0 +1,146 @@
+"""Who may use the privileged commands."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import tanjun
+
+from bot import constants
+
+if TYPE_CHECKING:
+    from typing import AsyncIterable, Iterable
+
+    import hikari
+
+
+class AdminIndex:
+    """
+    The members holding a privileged role, so checks are a set lookup.
+
+    Built from the guild's members on start and kept current by the member
+    and role listeners, checking a member never touches the cache or rest.
+    """
+
+    def __init__(
+        self, role_ids: Iterable[int] = constants.ADMIN_ROLE_IDS
+    ) -> None:
+        """
+        Create an empty index.
+
+        Args:
+            role_ids (Iterable[int]): Ids of the privileged roles.
+                Defaults to constants.ADMIN_ROLE_IDS.
+        """
+        self.role_ids = frozenset(role_ids)
+        self.loaded = False
+        # member id -> the privileged roles they hold, never empty.
+        self._members: dict[int, frozenset[int]] = {}
+
+    def __contains__(self, user_id: object) -> bool:
+        """
+        Check if a user holds a privileged role.
+
+        Args:
+            user_id (object): Id of the user.
+
+        Returns:
+            bool: If the user is an admin.
+        """
+        return user_id in self._members
+
+    def __len__(self) -> int:
+        """
+        Get the amount of admins.
+
+        Returns:
+            int: The amount of members holding a privileged role.
+        """
+        return len(self._members)
+
+    def update(self, user_id: int, role_ids: Iterable[int]) -> None:
+        """
+        Record the roles of a member.
+
+        Args:
+            user_id (int): Id of the member.
+            role_ids (Iterable[int]): Ids of every role they hold.
+        """
+        held = self.role_ids.intersection(role_ids)
+        if held:
+            self._members[user_id] = held
+        else:
+            self._members.pop(user_id, None)
+
+    def remove_member(self, user_id: int) -> None:
+        """
+        Forget a member that left.
+
+        Args:
+            user_id (int): Id of the member.
+        """
+        self._members.pop(user_id, None)
+
+    def remove_role(self, role_id: int) -> None:
+        """
+        Forget a deleted role.
+
+        Args:
+            role_id (int): Id of the role.
+        """
+        if role_id not in self.role_ids:
+            return
+
+        for user_id, held in list(self._members.items()):
+            if role_id in held:
+                self.update(user_id, held - {role_id})
+
+    async def load(self, members: AsyncIterable[hikari.Member]) -> None:
+        """
+        Replace the index content with the roles of every member.
+
+        Args:
+            members (AsyncIterable[hikari.Member]): Every member of the guild.
+        """
+        self._members.clear()
+        async for member in members:
+            self.update(member.id, member.role_ids)
+        self.loaded = True
+
+
+def check_admin(
+    ctx: tanjun.abc.Context,
+    admins: AdminIndex = tanjun.injected(type=AdminIndex),
+) -> bool:
+    """
+    Only let members with a privileged role use a command.
+
+    Until the index is loaded the roles sent with the command decide.
+
+    Args:
+        ctx (tanjun.abc.Context): The commands context.
+        admins (AdminIndex): The members with a privileged role.
+
+    Returns:
+        bool: If the author is an admin.
+    """
+    if ctx.member is None:
+        return False
+
+    if admins.loaded:
+        return ctx.author.id in admins
+
+    return not admins.role_ids.isdisjoint(ctx.member.role_ids)
+
+
+def check_owner(ctx: tanjun.abc.Context) -> bool:
+    """
+    Only let the owner of the bot use a command.
+
+    Args:
+        ctx (tanjun.abc.Context): The commands context.
+
+    Returns:
+        bool: If the author is the owner.
+    """
+    return ctx.author.id == constants.BOT_OWNER_ID
@@ -0,0 +1,134 @@
+"""Startup phase profiler."""
+
+from __future__ import annotations
+
+import functools
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+    T = TypeVar("T", bound=Callable[..., Awaitable[None]])  # noqa: VNE001
+
+
+class StartupProfiler:
+    """
+    Record the wall time of each startup phase.
+
+    The summary is logged once the gateway is ready and every profiled
+    StartedEvent listener has finished.
+    """
+
+    def __init__(self) -> None:
+        """Start the startup clock."""
+        self.origin = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.marks: dict[str, float] = {}
+        self.ready_after: float | None = None
+        self.finished_after: float | None = None
+        self._pending: set[str] = set()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time the code in the with block as a phase.
+
+        Args:
+            name (str): Name of the phase.
+
+        Yields:
+            None: Nothing, the phase ends when the block exits.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def mark(self, name: str) -> None:
+        """
+        Record the time since the clock started as a milestone.
+
+        Args:
+            name (str): Name of the milestone.
+        """
+        self.marks[name] = time.perf_counter() - self.origin
+
+    def mark_ready(self) -> None:
+        """Record that the bot is ready, logging the summary if nothing is left."""
+        self.mark("gateway ready")
+        self.ready_after = self.marks["gateway ready"]
+        self._maybe_log()
+
+    def started_listener(self, callback: T) -> T:
+        """
+        Profile a StartedEvent listener, use as a decorator below with_listener.
+
+        Args:
+            callback (T): The listener.
+
+        Returns:
+            T: The wrapped listener, with the same signature for injection.
+        """
+        name = f"started: {callback.__name__}"
+        self._pending.add(name)
+
+        @functools.wraps(callback)
+        async def wrapper(*args: Any, **kwargs: Any) -> None:
+            try:
+                with self.phase(name):
+                    await callback(*args, **kwargs)
+            finally:
+                self._pending.discard(name)
+                self._maybe_log()
+
+        return wrapper  # type: ignore
+
+    def slowest(self, amount: int) -> list[tuple[str, float]]:
+        """
+        Get the slowest phases.
+
+        Args:
+            amount (int): Amount of phases to get.
+
+        Returns:
+            list[tuple[str, float]]: Names and durations, slowest first.
+        """
+        ranked = sorted(self.phases.items(), key=lambda x: x[1], reverse=True)
+        return ranked[:amount]
+
+    def summary(self) -> str:
+        """
+        Get a line per milestone and phase, in the order they were recorded.
+
+        Returns:
+            str: The summary.
+        """
+        marks = (
+            f"{name} after {offset * 1000:.0f} ms"
+            for name, offset in self.marks.items()
+        )
+        phases = (
+            f"{name}: {duration * 1000:.0f} ms"
+            for name, duration in self.phases.items()
+        )
+        return "\n".join([*marks, *phases])
+
+    def _maybe_log(self) -> None:
+        """Log the summary the first time the startup is done."""
+        if (
+            self.ready_after is not None
+            and self.finished_after is None
+            and not self._pending
+        ):
+            self.finished_after = time.perf_counter() - self.origin
+            logger.info(
+                "Started in {:.2f}s:\n{}", self.finished_after, self.summary()
+            )
+
+
+profiler = StartupProfiler()
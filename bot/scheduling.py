@@ -0,0 +1,102 @@
+"""Job scheduling with tanjun dependencies."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.util import obj_to_ref, ref_to_obj
+from tanjun import injecting
+
+if TYPE_CHECKING:
+    from typing import Any, Awaitable, Callable
+
+    import tanjun
+
+
+_client: tanjun.Client | None = None
+
+
+def create_scheduler(client: tanjun.Client) -> AsyncIOScheduler:
+    """
+    Create a scheduler keeping its jobs in memory.
+
+    Jobs are not stored, the APScheduler job stores are synchronous and would
+    block the event loop on every change. The modules arm their jobs again on
+    start from their own data instead, so work that was due while the bot was
+    offline runs straight away.
+
+    Args:
+        client (tanjun.Client): Client to resolve job dependencies with.
+
+    Returns:
+        AsyncIOScheduler: The scheduler, not started yet.
+    """
+    global _client
+    _client = client
+
+    return AsyncIOScheduler(
+        jobstores={"default": MemoryJobStore()},
+        job_defaults={
+            "coalesce": True,
+            "max_instances": 1,
+        },
+    )
+
+
+async def run_injected(callback_ref: str) -> None:
+    """
+    Run a job callback, resolving its tanjun dependencies.
+
+    Jobs only store a reference to their callback, so the dependencies are
+    resolved when it runs and a reloaded module runs its new code.
+
+    Args:
+        callback_ref (str): Textual reference to the callback, as module:name.
+
+    Raises:
+        RuntimeError: No scheduler was created yet.
+    """
+    if _client is None:
+        raise RuntimeError("No scheduler was created yet")
+
+    callback: Callable[..., Awaitable[None]] = ref_to_obj(callback_ref)
+    await injecting.CallbackDescriptor(callback).resolve(
+        injecting.BasicInjectionContext(_client)
+    )
+
+
+def add_injected_job(
+    scheduler: AsyncIOScheduler,
+    callback: Callable[..., Awaitable[None]],
+    job_id: str,
+    trigger: str,
+    **trigger_args: Any,
+) -> None:
+    """
+    Add or replace a job calling a callback with tanjun dependencies.
+
+    Jobs have a fixed id, so re-adding one after a restart does not duplicate it.
+    A date in the past is moved to now, so it is not dropped as a misfire.
+
+    Args:
+        scheduler (AsyncIOScheduler): Scheduler to add the job to.
+        callback (Callable[..., Awaitable[None]]): The module level job callback.
+        job_id (str): Id of the job.
+        trigger (str): Alias of the trigger, like "date" or "cron".
+        **trigger_args (Any): Arguments for the trigger and the job.
+    """
+    run_date = trigger_args.get("run_date")
+    if isinstance(run_date, datetime):
+        trigger_args["run_date"] = max(run_date, datetime.now(timezone.utc))
+
+    scheduler.add_job(
+        run_injected,
+        trigger,
+        args=[obj_to_ref(callback)],
+        id=job_id,
+        replace_existing=True,
+        **trigger_args,
+    )
@@ -0,0 +1,327 @@
+"""In-memory search over role names and descriptions."""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import re
+from collections import Counter
+from typing import TYPE_CHECKING
+
+from bot import constants
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+    from bot.storage import RoleInfoRepository
+    from bot.types import RoleInfoDocument
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text: str) -> list[str]:
+    """
+    Split text into lowercase words.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        list[str]: The words, in order.
+    """
+    return _WORD.findall(text.casefold())
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Get the trigrams of the words in a text.
+
+    Words are padded, so the start and end of a word are trigrams as well.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        set[str]: The trigrams.
+    """
+    found: set[str] = set()
+    for word in words(text):
+        padded = f"  {word} "
+        found.update(
+            padded[index : index + 3] for index in range(len(word) + 1)
+        )
+    return found
+
+
+class RoleIndex:
+    """
+    Prefix and trigram index over the names and descriptions of roles.
+
+    Words are kept sorted, so the words starting with a prefix are a single
+    bisect away. Queries without a prefix match, like typos, fall back to
+    the roles sharing the most trigrams with the query. The role listeners
+    keep the index current, searching never touches the db.
+    """
+
+    def __init__(
+        self, placeholder: str = constants.DEFAULT_ROLE_DESCRIPTION
+    ) -> None:
+        """
+        Create an empty index.
+
+        Args:
+            placeholder (str): Description that is not indexed, so roles
+                without a real description do not all match its words.
+                Defaults to constants.DEFAULT_ROLE_DESCRIPTION.
+        """
+        self.placeholder = placeholder
+        self._documents: dict[int, RoleInfoDocument] = {}
+        self._sorted_words: list[str] = []
+        # word -> role id -> if the word is in the name.
+        self._postings: dict[str, dict[int, bool]] = {}
+        self._trigrams: dict[str, set[int]] = {}
+
+    def __len__(self) -> int:
+        """
+        Get the amount of indexed roles.
+
+        Returns:
+            int: The amount of roles.
+        """
+        return len(self._documents)
+
+    def add(self, document: RoleInfoDocument) -> None:
+        """
+        Index a role, replacing its earlier entry.
+
+        Args:
+            document (RoleInfoDocument): Document of the role.
+        """
+        role_id = document["role_id"]
+        self.remove(role_id)
+        self._documents[role_id] = document
+
+        name_words = set(words(document["name"]))
+        for word in name_words | self._description_words(document):
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                bisect.insort(self._sorted_words, word)
+            postings[role_id] = word in name_words
+
+        for trigram in self._role_trigrams(document):
+            self._trigrams.setdefault(trigram, set()).add(role_id)
+
+    def update(self, role_id: int, *, name: str, color: str) -> None:
+        """
+        Reindex a role with a new name and color, if it is indexed.
+
+        Args:
+            role_id (int): Id of the role.
+            name (str): The new name.
+            color (str): The new color, as a hex code.
+        """
+        document = self._documents.get(role_id)
+        if document is not None:
+            self.add({**document, "name": name, "color": color})
+
+    def remove(self, role_id: int) -> None:
+        """
+        Remove a role from the index, if it is indexed.
+
+        Args:
+            role_id (int): Id of the role.
+        """
+        document = self._documents.pop(role_id, None)
+        if document is None:
+            return
+
+        for word in set(words(document["name"])) | self._description_words(
+            document
+        ):
+            postings = self._postings[word]
+            del postings[role_id]
+            if not postings:
+                del self._postings[word]
+                del self._sorted_words[
+                    bisect.bisect_left(self._sorted_words, word)
+                ]
+
+        for trigram in self._role_trigrams(document):
+            role_ids = self._trigrams[trigram]
+            role_ids.discard(role_id)
+            if not role_ids:
+                del self._trigrams[trigram]
+
+    def clear(self) -> None:
+        """Remove every role."""
+        self._documents.clear()
+        self._sorted_words.clear()
+        self._postings.clear()
+        self._trigrams.clear()
+
+    def rebuild(self, documents: Iterable[RoleInfoDocument]) -> None:
+        """
+        Replace the index content.
+
+        Args:
+            documents (Iterable[RoleInfoDocument]): Documents of every role.
+        """
+        self.clear()
+        for document in documents:
+            self.add(document)
+
+    async def load(self, repository: RoleInfoRepository) -> None:
+        """
+        Replace the index content with the documents in the db.
+
+        Args:
+            repository (RoleInfoRepository): Db to load the documents from.
+        """
+        self.rebuild([document async for document in repository.documents()])
+
+    def search(
+        self, query: str, limit: int = constants.Search.MAX_RESULTS
+    ) -> list[RoleInfoDocument]:
+        """
+        Find the roles best matching a query.
+
+        Roles where every query word starts a word of the role come first,
+        those whose name starts with the query first of all, then by how many
+        of the words are in the name. The rest is filled with the roles most
+        similar by trigrams.
+
+        Args:
+            query (str): What the user typed.
+            limit (int): Most roles to return.
+                Defaults to constants.Search.MAX_RESULTS.
+
+        Returns:
+            list[RoleInfoDocument]: The roles, best match first.
+        """
+        terms = words(query)
+        if not terms:
+            return sorted(
+                self._documents.values(), key=lambda doc: doc["name"].casefold()
+            )[:limit]
+
+        # role id -> amount of terms found in the name, of roles with all.
+        matches: dict[int, int] = {}
+        for index, term in enumerate(terms):
+            found: dict[int, bool] = {}
+            for word in self._words_starting_with(term):
+                for role_id, in_name in self._postings[word].items():
+                    found[role_id] = found.get(role_id, False) or in_name
+
+            if index == 0:
+                matches = {
+                    role_id: int(in_name) for role_id, in_name in found.items()
+                }
+            else:
+                matches = {
+                    role_id: count + found[role_id]
+                    for role_id, count in matches.items()
+                    if role_id in found
+                }
+
+        folded = query.strip().casefold()
+        ranked = heapq.nsmallest(
+            limit,
+            matches,
+            key=lambda role_id: (
+                not self._documents[role_id]["name"]
+                .casefold()
+                .startswith(folded),
+                -matches[role_id],
+                self._documents[role_id]["name"].casefold(),
+            ),
+        )
+
+        if len(ranked) < limit:
+            ranked.extend(
+                self._similar(query, limit - len(ranked), exclude=matches)
+            )
+
+        return [self._documents[role_id] for role_id in ranked]
+
+    def _words_starting_with(self, prefix: str) -> list[str]:
+        """
+        Get the indexed words starting with a prefix.
+
+        Args:
+            prefix (str): The prefix.
+
+        Returns:
+            list[str]: The words.
+        """
+        start = bisect.bisect_left(self._sorted_words, prefix)
+        # every word starting with the prefix sorts before this one.
+        end = bisect.bisect_left(self._sorted_words, prefix + "\U0010ffff")
+        return self._sorted_words[start:end]
+
+    def _similar(
+        self, query: str, limit: int, exclude: Iterable[int]
+    ) -> list[int]:
+        """
+        Get the roles sharing the most trigrams with a query.
+
+        Args:
+            query (str): The query.
+            limit (int): Most roles to return.
+            exclude (Iterable[int]): Ids of roles to leave out.
+
+        Returns:
+            list[int]: Ids of the roles, most similar first.
+        """
+        wanted = trigrams(query)
+        shared: Counter[int] = Counter()
+        for trigram in wanted:
+            shared.update(self._trigrams.get(trigram, ()))
+        for role_id in exclude:
+            shared.pop(role_id, None)
+
+        minimum = len(wanted) * constants.Search.MIN_SIMILARITY
+        return [
+            role_id
+            for role_id, count in shared.most_common(limit)
+            if count >= minimum
+        ]
+
+    def _description(self, document: RoleInfoDocument) -> str:
+        """
+        Get the description of a role to index.
+
+        Args:
+            document (RoleInfoDocument): Document of the role.
+
+        Returns:
+            str: The description, empty if it is the placeholder.
+        """
+        description = document["description"]
+        return "" if description == self.placeholder else description
+
+    def _description_words(self, document: RoleInfoDocument) -> set[str]:
+        """
+        Get the words of a role's description.
+
+        Args:
+            document (RoleInfoDocument): Document of the role.
+
+        Returns:
+            set[str]: The words.
+        """
+        return set(words(self._description(document)))
+
+    def _role_trigrams(self, document: RoleInfoDocument) -> set[str]:
+        """
+        Get the trigrams a role is indexed under.
+
+        Args:
+            document (RoleInfoDocument): Document of the role.
+
+        Returns:
+            set[str]: The trigrams of the name and description.
+        """
+        return trigrams(document["name"]) | trigrams(
+            self._description(document)
+        )
@@ -0,0 +1,53 @@
+"""Storage of the bot's data, behind repositories with swappable backends."""
+
+from __future__ import annotations
+
+from bot import constants
+from bot.storage.base import (
+    BirthdayRepository,
+    RoleChanges,
+    RoleInfoRepository,
+    Storage,
+    TwitchChannelRepository,
+)
+from bot.storage.mongo import MongoStorage
+from bot.storage.sqlite import SQLiteStorage
+
+__all__ = [
+    "BirthdayRepository",
+    "RoleChanges",
+    "RoleInfoRepository",
+    "Storage",
+    "TwitchChannelRepository",
+    "MongoStorage",
+    "SQLiteStorage",
+    "create_storage",
+]
+
+
+def create_storage(backend: str = constants.STORAGE_BACKEND) -> Storage:
+    """
+    Create the storage of a backend.
+
+    Args:
+        backend (str): "mongo" or "sqlite".
+            Defaults to constants.STORAGE_BACKEND.
+
+    Returns:
+        Storage: The storage, not prepared yet.
+
+    Raises:
+        ValueError: The backend is unknown.
+        EnvironmentError: The Mongo database is not configured.
+    """
+    if backend == "mongo":
+        if not constants.DATABASE_URI or not constants.DATABASE_NAME:
+            raise EnvironmentError(
+                "DATABASE_URI and DATABASE_NAME are needed for Mongo"
+            )
+        return MongoStorage(constants.DATABASE_URI, constants.DATABASE_NAME)
+
+    if backend == "sqlite":
+        return SQLiteStorage(constants.SQLITE_PATH)
+
+    raise ValueError(f"Unknown storage backend {backend!r}")
@@ -0,0 +1,256 @@
+"""Interfaces of the repositories, implemented by each backend."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from datetime import datetime
+    from typing import AsyncIterator, Sequence
+
+    from bot.types import (
+        BirthdayDocument,
+        RoleInfoDocument,
+        TwitchChannelDocument,
+    )
+
+
+@dataclass
+class RoleChanges:
+    """Role info writes applied together, see RoleInfoRepository.apply."""
+
+    inserted: list[RoleInfoDocument] = field(default_factory=list)
+    # only the name and color of updated documents are written.
+    updated: list[RoleInfoDocument] = field(default_factory=list)
+    deleted: list[int] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        """
+        Check if there is anything to write.
+
+        Returns:
+            bool: If there are any changes.
+        """
+        return bool(self.inserted or self.updated or self.deleted)
+
+
+class RoleInfoRepository(ABC):
+    """Role info documents, keyed by role id."""
+
+    @abstractmethod
+    def documents(self) -> AsyncIterator[RoleInfoDocument]:
+        """
+        Iterate over every document.
+
+        Returns:
+            AsyncIterator[RoleInfoDocument]: The documents, streamed.
+        """
+
+    @abstractmethod
+    async def get(self, role_id: int) -> RoleInfoDocument | None:
+        """
+        Get the document of a role.
+
+        Args:
+            role_id (int): Id of the role.
+
+        Returns:
+            RoleInfoDocument | None: The document, None if there is none.
+        """
+
+    @abstractmethod
+    async def add(self, document: RoleInfoDocument) -> None:
+        """
+        Store the document of a new role.
+
+        Args:
+            document (RoleInfoDocument): The document.
+        """
+
+    @abstractmethod
+    async def update(self, role_id: int, *, name: str, color: str) -> None:
+        """
+        Update the name and color of a role.
+
+        Args:
+            role_id (int): Id of the role.
+            name (str): The new name.
+            color (str): The new color, as a hex code.
+        """
+
+    @abstractmethod
+    async def remove(self, role_id: int) -> None:
+        """
+        Remove the document of a role.
+
+        Args:
+            role_id (int): Id of the role.
+        """
+
+    @abstractmethod
+    async def apply(self, changes: RoleChanges) -> None:
+        """
+        Write many changes in a single round trip.
+
+        Args:
+            changes (RoleChanges): The changes.
+        """
+
+    @abstractmethod
+    async def upsert_many(self, documents: Sequence[RoleInfoDocument]) -> None:
+        """
+        Store documents, replacing the ones of the same roles.
+
+        Args:
+            documents (Sequence[RoleInfoDocument]): The documents.
+        """
+
+
+class BirthdayRepository(ABC):
+    """Birthday documents, keyed by discord id."""
+
+    @abstractmethod
+    def documents(self) -> AsyncIterator[BirthdayDocument]:
+        """
+        Iterate over every document.
+
+        Returns:
+            AsyncIterator[BirthdayDocument]: The documents, streamed.
+        """
+
+    @abstractmethod
+    async def upsert(self, document: BirthdayDocument) -> None:
+        """
+        Store the birthday of a user, replacing their earlier one.
+
+        Args:
+            document (BirthdayDocument): The document.
+        """
+
+    @abstractmethod
+    async def due(
+        self, discord_ids: Sequence[int], now: datetime
+    ) -> list[BirthdayDocument]:
+        """
+        Get the birthdays of users whose date is not after now.
+
+        Args:
+            discord_ids (Sequence[int]): Ids of the users to check.
+            now (datetime): The aware current time.
+
+        Returns:
+            list[BirthdayDocument]: The documents of the due users.
+        """
+
+    @abstractmethod
+    async def move(
+        self, moves: Sequence[tuple[int, datetime, datetime]]
+    ) -> None:
+        """
+        Move birthdays to a new date in a single round trip.
+
+        A birthday is only moved if its date is still the old date, so
+        concurrent runs can not move it twice.
+
+        Args:
+            moves (Sequence[tuple[int, datetime, datetime]]):
+                Discord id, old date as read and new date, per user.
+        """
+
+    @abstractmethod
+    async def upsert_many(self, documents: Sequence[BirthdayDocument]) -> None:
+        """
+        Store documents, replacing the ones of the same users.
+
+        Args:
+            documents (Sequence[BirthdayDocument]): The documents.
+        """
+
+
+class TwitchChannelRepository(ABC):
+    """Twitch channel documents, keyed by Twitch user id."""
+
+    @abstractmethod
+    def documents(self) -> AsyncIterator[TwitchChannelDocument]:
+        """
+        Iterate over every document.
+
+        Returns:
+            AsyncIterator[TwitchChannelDocument]: The documents, streamed.
+        """
+
+    @abstractmethod
+    async def get(self, user_id: str) -> TwitchChannelDocument | None:
+        """
+        Get the document of a channel.
+
+        Args:
+            user_id (str): Twitch id of the channel.
+
+        Returns:
+            TwitchChannelDocument | None: The document, None if there is none.
+        """
+
+    @abstractmethod
+    async def upsert(self, document: TwitchChannelDocument) -> None:
+        """
+        Store the document of a channel, replacing its earlier one.
+
+        Args:
+            document (TwitchChannelDocument): The document.
+        """
+
+    @abstractmethod
+    async def remove(self, user_id: str) -> None:
+        """
+        Remove the document of a channel.
+
+        Args:
+            user_id (str): Twitch id of the channel.
+        """
+
+    @abstractmethod
+    async def set_streams(
+        self, streams: Sequence[tuple[str, str | None]]
+    ) -> None:
+        """
+        Record the streams of many channels in a single round trip.
+
+        Args:
+            streams (Sequence[tuple[str, str | None]]):
+                Twitch id of the channel and id of its stream, None if it is
+                offline, per channel.
+        """
+
+    @abstractmethod
+    async def upsert_many(
+        self, documents: Sequence[TwitchChannelDocument]
+    ) -> None:
+        """
+        Store documents, replacing the ones of the same channels.
+
+        Args:
+            documents (Sequence[TwitchChannelDocument]): The documents.
+        """
+
+
+class Storage(ABC):
+    """A backend holding every repository."""
+
+    roles: RoleInfoRepository
+    birthdays: BirthdayRepository
+    twitch_channels: TwitchChannelRepository
+
+    @abstractmethod
+    async def prepare(self) -> None:
+        """Connect and create what the repositories need, like indexes."""
+
+    @abstractmethod
+    async def ping(self) -> None:
+        """Do a round trip, raises if the backend is not usable."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close open connections."""
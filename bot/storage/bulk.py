@@ -0,0 +1,510 @@
+"""
+Export and import the stored documents as JSON lines or CSV.
+
+Usage:
+    python -m bot.storage.bulk export birthdays birthdays.jsonl
+    python -m bot.storage.bulk import roles roles.csv
+
+The format follows the file extension. Documents are read from a cursor and
+written in chunks, so memory use does not grow with their amount. Imported
+documents replace the stored ones with the same id, invalid lines are
+skipped and reported. The running bot does not see documents imported
+here until it restarts, use /import to import into a running bot.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import io
+import json
+import pathlib
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from loguru import logger
+
+from bot import constants, timeline
+from bot.storage import create_storage
+from bot.storage.migrate import BACKENDS
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        AsyncIterable,
+        AsyncIterator,
+        Awaitable,
+        Callable,
+        Iterable,
+        Mapping,
+        Sequence,
+        TextIO,
+    )
+
+    from bot.types import (
+        BirthdayDocument,
+        RoleInfoDocument,
+        TwitchChannelDocument,
+    )
+
+FORMATS = ("jsonl", "csv")
+EXTENSIONS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+CHUNK_SIZE = 1000
+# invalid lines past this many are counted but not described.
+MAX_ERRORS = 20
+
+
+def _field(record: Mapping[str, Any], name: str) -> Any:
+    """
+    Get a field of a record that is required.
+
+    Args:
+        record (Mapping[str, Any]): The record.
+        name (str): Name of the field.
+
+    Returns:
+        Any: The value.
+
+    Raises:
+        ValueError: The field is missing or empty.
+    """
+    value = record.get(name)
+    if value is None or value == "":
+        raise ValueError(f"missing {name}")
+    return value
+
+
+def _snowflake(record: Mapping[str, Any], name: str) -> int:
+    """
+    Get a Discord id field of a record.
+
+    Args:
+        record (Mapping[str, Any]): The record.
+        name (str): Name of the field.
+
+    Returns:
+        int: The id.
+
+    Raises:
+        ValueError: The field is missing or not an id.
+    """
+    value = int(_field(record, name))
+    if value <= 0:
+        raise ValueError(f"{name} {value} is not an id")
+    return value
+
+
+def parse_role(record: Mapping[str, Any]) -> RoleInfoDocument:
+    """
+    Validate an imported role info record.
+
+    Args:
+        record (Mapping[str, Any]): The record, with any value types.
+
+    Returns:
+        RoleInfoDocument: The document.
+    """
+    return {
+        "role_id": _snowflake(record, "role_id"),
+        "name": str(_field(record, "name")),
+        "color": str(record.get("color") or ""),
+        "description": str(
+            record.get("description") or constants.DEFAULT_ROLE_DESCRIPTION
+        ),
+    }
+
+
+def parse_birthday(record: Mapping[str, Any]) -> BirthdayDocument:
+    """
+    Validate an imported birthday record.
+
+    The stored date is the next announcement, so it is always computed
+    from the month and day like /birthday does. An imported date, like a
+    date of birth, only gives the month and day when those are missing.
+
+    Args:
+        record (Mapping[str, Any]): The record, with any value types.
+
+    Returns:
+        BirthdayDocument: The document.
+
+    Raises:
+        ValueError: The time zone is unknown.
+    """
+    month = record.get("month")
+    day = record.get("day")
+    if not (month and day):
+        # fromisoformat does not take the Z suffix other tools write.
+        text = str(_field(record, "date")).replace("Z", "+00:00")
+        date = datetime.fromisoformat(text)
+        month = month or date.month
+        day = day or date.day
+
+    month = int(month)
+    day = int(day)
+    # 2000 is a leap year, so the 29th of February is accepted.
+    timeline.birthday_in_year(2000, month, day)
+
+    zone = str(record.get("timezone") or constants.DEFAULT_TIMEZONE)
+    try:
+        ZoneInfo(zone)
+    except ZoneInfoNotFoundError:
+        raise ValueError(f"unknown time zone {zone!r}") from None
+
+    return {
+        "discord_id": _snowflake(record, "discord_id"),
+        "date": timeline.next_birthday(
+            month, day, zone, datetime.now(timezone.utc)
+        ),
+        "month": month,
+        "day": day,
+        "timezone": zone,
+    }
+
+
+def parse_twitch_channel(record: Mapping[str, Any]) -> TwitchChannelDocument:
+    """
+    Validate an imported twitch channel record.
+
+    Args:
+        record (Mapping[str, Any]): The record, with any value types.
+
+    Returns:
+        TwitchChannelDocument: The document.
+
+    Raises:
+        ValueError: The twitch id is not a number.
+    """
+    user_id = str(_field(record, "user_id"))
+    if not user_id.isdigit():
+        raise ValueError(f"user_id {user_id!r} is not a twitch id")
+
+    return {
+        "user_id": user_id,
+        "login": str(_field(record, "login")).lower(),
+        "discord_id": _snowflake(record, "discord_id"),
+        "stream_id": str(record.get("stream_id") or "") or None,
+    }
+
+
+@dataclass(frozen=True)
+class Collection:
+    """A repository of the storage that can be exported and imported."""
+
+    fields: tuple[str, ...]
+    parse: Callable[[Mapping[str, Any]], Any]
+
+
+# keyed by the attribute of the repository on the storage.
+COLLECTIONS = {
+    "roles": Collection(
+        ("role_id", "name", "color", "description"), parse_role
+    ),
+    "birthdays": Collection(
+        ("discord_id", "date", "month", "day", "timezone"), parse_birthday
+    ),
+    "twitch_channels": Collection(
+        ("user_id", "login", "discord_id", "stream_id"), parse_twitch_channel
+    ),
+}
+
+
+@dataclass
+class ImportReport:
+    """Outcome of an import."""
+
+    imported: int = 0
+    invalid: int = 0
+    # line number and reason of the first MAX_ERRORS invalid lines.
+    errors: list[str] = field(default_factory=list)
+
+    def reject(self, line: int, error: Exception) -> None:
+        """
+        Count an invalid line.
+
+        Args:
+            line (int): Number of the line, from 1.
+            error (Exception): Why it is invalid.
+        """
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"line {line}: {error}")
+
+
+def format_of(path: str) -> str:
+    """
+    Get the format of a file from its extension.
+
+    Args:
+        path (str): Path or url of the file.
+
+    Returns:
+        str: One of FORMATS.
+
+    Raises:
+        ValueError: The extension is not of a known format.
+    """
+    suffix = pathlib.PurePosixPath(path).suffix.lower()
+    if suffix not in EXTENSIONS:
+        raise ValueError(
+            f"Unknown file extension {suffix!r}, "
+            f"use one of {', '.join(EXTENSIONS)}"
+        )
+    return EXTENSIONS[suffix]
+
+
+def _serialize(document: Mapping[str, Any]) -> dict[str, Any]:
+    """
+    Turn the values of a document into ones JSON and CSV can hold.
+
+    Args:
+        document (Mapping[str, Any]): The document.
+
+    Returns:
+        dict[str, Any]: The document, with dates in ISO format.
+    """
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in document.items()
+    }
+
+
+async def export(
+    documents: AsyncIterable[Mapping[str, Any]],
+    collection: str,
+    file_format: str,
+    stream: TextIO,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    """
+    Write documents to a stream, chunk_size documents per write.
+
+    The writes run in a thread, so a slow disk does not block the event loop.
+
+    Args:
+        documents (AsyncIterable[Mapping[str, Any]]): The documents.
+        collection (str): Name of their collection in COLLECTIONS.
+        file_format (str): One of FORMATS.
+        stream (TextIO): Stream to write to, opened with newline="".
+        chunk_size (int): Documents per write. Defaults to CHUNK_SIZE.
+
+    Returns:
+        int: The amount of exported documents.
+    """
+    fields = COLLECTIONS[collection].fields
+    buffer = io.StringIO()
+    writer = csv.DictWriter(
+        buffer, fields, extrasaction="ignore", lineterminator="\n"
+    )
+    if file_format == "csv":
+        writer.writeheader()
+
+    exported = 0
+    buffered = 0
+    async for document in documents:
+        row = _serialize(document)
+        if file_format == "csv":
+            writer.writerow(row)
+        else:
+            json.dump({key: row.get(key) for key in fields}, buffer)
+            buffer.write("\n")
+
+        exported += 1
+        buffered += 1
+        if buffered == chunk_size:
+            await asyncio.to_thread(stream.write, buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+            buffered = 0
+
+    await asyncio.to_thread(stream.write, buffer.getvalue())
+    return exported
+
+
+async def _records(
+    lines: AsyncIterable[str], file_format: str
+) -> AsyncIterator[tuple[int, str | dict[str, str]]]:
+    """
+    Split lines into records, a CSV record may span several lines.
+
+    Args:
+        lines (AsyncIterable[str]): The lines of the file.
+        file_format (str): One of FORMATS.
+
+    Yields:
+        tuple[int, str | dict[str, str]]: Number of the line the record
+            starts on, and the line of JSON or the CSV row by column.
+    """
+    header: list[str] | None = None
+    pending = ""
+    start = 0
+    number = 0
+    async for line in lines:
+        number += 1
+        if number == 1:
+            line = line.lstrip("\ufeff")
+        if not pending:
+            if not line.strip():
+                continue
+            start = number
+        pending += line
+
+        if file_format == "jsonl":
+            yield start, pending
+            pending = ""
+        # an odd amount of quotes leaves a quoted field open.
+        elif pending.count('"') % 2 == 0:
+            row = next(csv.reader([pending]))
+            pending = ""
+            if header is None:
+                header = row
+            else:
+                yield start, dict(zip(header, row))
+
+    if pending:
+        yield start, pending if file_format == "jsonl" else {}
+
+
+async def import_documents(
+    lines: AsyncIterable[str],
+    collection: str,
+    file_format: str,
+    upsert_many: Callable[[Sequence[Any]], Awaitable[None]],
+    chunk_size: int = CHUNK_SIZE,
+) -> ImportReport:
+    """
+    Validate records and store them, chunk_size documents per write.
+
+    Args:
+        lines (AsyncIterable[str]): The lines of the file.
+        collection (str): Name of the collection in COLLECTIONS.
+        file_format (str): One of FORMATS.
+        upsert_many (Callable[[Sequence[Any]], Awaitable[None]]):
+            upsert_many of the collection's repository.
+        chunk_size (int): Documents per write. Defaults to CHUNK_SIZE.
+
+    Returns:
+        ImportReport: The amount of imported and invalid records.
+
+    # noqa: DAR401 ValueError
+    """
+    parse = COLLECTIONS[collection].parse
+    report = ImportReport()
+    chunk: list[Any] = []
+
+    async for line, record in _records(lines, file_format):
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+                if not isinstance(record, dict):
+                    raise ValueError("not a JSON object")
+            chunk.append(parse(record))
+        # values of the wrong type, like a list as an id, fail int().
+        except (TypeError, ValueError) as error:
+            report.reject(line, error)
+            continue
+
+        if len(chunk) >= chunk_size:
+            await upsert_many(chunk)
+            report.imported += len(chunk)
+            chunk = []
+
+    await upsert_many(chunk)
+    report.imported += len(chunk)
+    return report
+
+
+async def _lines(stream: Iterable[str]) -> AsyncIterator[str]:
+    """
+    Iterate over the lines of a file.
+
+    Args:
+        stream (Iterable[str]): The file.
+
+    Yields:
+        str: A line.
+    """
+    # yield from is not allowed in an async generator.
+    for line in stream:  # noqa: SIM104
+        yield line
+
+
+async def main() -> None:
+    """Parse the command line and export or import."""
+    parser = argparse.ArgumentParser(
+        prog="python -m bot.storage.bulk",
+        description="Export or import documents as JSON lines or CSV.",
+    )
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("collection", choices=COLLECTIONS)
+    parser.add_argument("path", help='the file, "-" for stdout or stdin')
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        help="format of the file, defaults to the one of its extension",
+    )
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default=constants.STORAGE_BACKEND
+    )
+    args = parser.parse_args()
+
+    try:
+        file_format = args.format or format_of(args.path)
+    except ValueError as error:
+        parser.error(str(error))
+
+    store = create_storage(args.backend)
+    repository = getattr(store, args.collection)
+    try:
+        await store.prepare()
+        if args.action == "export":
+            with contextlib.ExitStack() as stack:
+                stream = (
+                    stack.enter_context(
+                        pathlib.Path(args.path).open(
+                            "w", newline="", encoding="utf-8"
+                        )
+                    )
+                    if args.path != "-"
+                    else sys.stdout
+                )
+                exported = await export(
+                    repository.documents(), args.collection, file_format, stream
+                )
+            logger.info("Exported {} {}", exported, args.collection)
+        else:
+            with contextlib.ExitStack() as stack:
+                stream = (
+                    stack.enter_context(
+                        pathlib.Path(args.path).open(
+                            newline="", encoding="utf-8"
+                        )
+                    )
+                    if args.path != "-"
+                    else sys.stdin
+                )
+                report = await import_documents(
+                    _lines(stream),
+                    args.collection,
+                    file_format,
+                    repository.upsert_many,
+                )
+            logger.info(
+                "Imported {} {}, skipped {} invalid lines",
+                report.imported,
+                args.collection,
+                report.invalid,
+            )
+            for error in report.errors:
+                logger.warning(error)
+    finally:
+        await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""
+Copy every document from one storage backend to another.
+
+Usage: python -m bot.storage.migrate mongo sqlite
+
+Documents already in the target are replaced, other documents are kept,
+so running it twice is safe.
+Mongo is always read from DATABASE_URI and DATABASE_NAME, whatever
+STORAGE_BACKEND is set to.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from bot.storage import create_storage
+
+if TYPE_CHECKING:
+    from typing import AsyncIterator, Awaitable, Callable, Sequence, TypeVar
+
+    from bot.storage import Storage
+
+    T = TypeVar("T")
+
+BACKENDS = ("mongo", "sqlite")
+BATCH_SIZE = 1000
+
+
+async def copy(
+    documents: AsyncIterator[T],
+    upsert_many: Callable[[Sequence[T]], Awaitable[None]],
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """
+    Stream documents into a repository in batches.
+
+    Args:
+        documents (AsyncIterator[T]): Documents of the source repository.
+        upsert_many (Callable[[Sequence[T]], Awaitable[None]]):
+            upsert_many of the target repository.
+        batch_size (int): Documents per write. Defaults to BATCH_SIZE.
+
+    Returns:
+        int: The amount of copied documents.
+    """
+    batch: list[T] = []
+    copied = 0
+
+    async for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            await upsert_many(batch)
+            copied += len(batch)
+            batch = []
+
+    await upsert_many(batch)
+    return copied + len(batch)
+
+
+async def migrate(source: Storage, target: Storage) -> None:
+    """
+    Copy every repository.
+
+    Args:
+        source (Storage): Storage to read from.
+        target (Storage): Storage to write to.
+    """
+    await source.prepare()
+    await target.prepare()
+
+    roles = await copy(source.roles.documents(), target.roles.upsert_many)
+    logger.info("Copied {} role info documents", roles)
+
+    birthdays = await copy(
+        source.birthdays.documents(), target.birthdays.upsert_many
+    )
+    logger.info("Copied {} birthday documents", birthdays)
+
+    channels = await copy(
+        source.twitch_channels.documents(),
+        target.twitch_channels.upsert_many,
+    )
+    logger.info("Copied {} twitch channel documents", channels)
+
+
+async def main() -> None:
+    """Parse the command line and migrate."""
+    parser = argparse.ArgumentParser(
+        prog="python -m bot.storage.migrate",
+        description="Copy every document from one storage backend to another.",
+    )
+    parser.add_argument("source", choices=BACKENDS)
+    parser.add_argument("target", choices=BACKENDS)
+    args = parser.parse_args()
+
+    if args.source == args.target:
+        parser.error("source and target must differ")
+
+    source = create_storage(args.source)
+    target = create_storage(args.target)
+    try:
+        await migrate(source, target)
+    finally:
+        await source.close()
+        await target.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,417 @@
+"""Repositories stored in Mongo."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from motor import motor_asyncio as motor
+from pymongo import DeleteMany, InsertOne, ReplaceOne, UpdateOne
+
+from bot import constants, indexes, metrics
+from bot.profiling import profiler
+from bot.storage.base import (
+    BirthdayRepository,
+    RoleInfoRepository,
+    Storage,
+    TwitchChannelRepository,
+)
+
+if TYPE_CHECKING:
+    from datetime import datetime
+    from typing import Any, AsyncIterator, Sequence
+
+    from bot.storage.base import RoleChanges
+    from bot.types import (
+        BirthdayDocument,
+        RoleInfoDocument,
+        TwitchChannelDocument,
+    )
+
+# documents are handed out without the Mongo specific _id.
+WITHOUT_ID = {"_id": False}
+
+
+class MongoRoleInfoRepository(RoleInfoRepository):
+    """Role info documents in a Mongo collection."""
+
+    def __init__(
+        self, collection: motor.AsyncIOMotorCollection[RoleInfoDocument]
+    ) -> None:
+        """
+        Create the repository.
+
+        Args:
+            collection (motor.AsyncIOMotorCollection[RoleInfoDocument]):
+                Collection to use.
+        """
+        self.collection = collection
+
+    async def documents(self) -> AsyncIterator[RoleInfoDocument]:
+        """
+        Iterate over every document.
+
+        Yields:
+            RoleInfoDocument: A document.
+        """
+        async for document in self.collection.find({}, WITHOUT_ID):
+            yield document
+
+    async def get(self, role_id: int) -> RoleInfoDocument | None:
+        """
+        Get the document of a role.
+
+        Args:
+            role_id (int): Id of the role.
+
+        Returns:
+            RoleInfoDocument | None: The document, None if there is none.
+        """
+        return await self.collection.find_one({"role_id": role_id}, WITHOUT_ID)
+
+    async def add(self, document: RoleInfoDocument) -> None:
+        """
+        Store the document of a new role.
+
+        Args:
+            document (RoleInfoDocument): The document.
+        """
+        # copied, insert_one adds the _id to the document.
+        await self.collection.insert_one(dict(document))
+
+    async def update(self, role_id: int, *, name: str, color: str) -> None:
+        """
+        Update the name and color of a role.
+
+        Args:
+            role_id (int): Id of the role.
+            name (str): The new name.
+            color (str): The new color, as a hex code.
+        """
+        await self.collection.update_one(
+            {"role_id": role_id}, {"$set": {"name": name, "color": color}}
+        )
+
+    async def remove(self, role_id: int) -> None:
+        """
+        Remove the document of a role.
+
+        Args:
+            role_id (int): Id of the role.
+        """
+        await self.collection.delete_one({"role_id": role_id})
+
+    async def apply(self, changes: RoleChanges) -> None:
+        """
+        Write many changes in a single bulk write.
+
+        Args:
+            changes (RoleChanges): The changes.
+        """
+        operations: list[Any] = [
+            InsertOne(dict(document)) for document in changes.inserted
+        ]
+        operations.extend(
+            UpdateOne(
+                {"role_id": document["role_id"]},
+                {
+                    "$set": {
+                        "name": document["name"],
+                        "color": document["color"],
+                    }
+                },
+            )
+            for document in changes.updated
+        )
+        if changes.deleted:
+            operations.append(DeleteMany({"role_id": {"$in": changes.deleted}}))
+
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def upsert_many(self, documents: Sequence[RoleInfoDocument]) -> None:
+        """
+        Store documents in a single bulk write, replacing existing ones.
+
+        Args:
+            documents (Sequence[RoleInfoDocument]): The documents.
+        """
+        if documents:
+            await self.collection.bulk_write(
+                [
+                    ReplaceOne(
+                        {"role_id": document["role_id"]},
+                        dict(document),
+                        upsert=True,
+                    )
+                    for document in documents
+                ],
+                ordered=False,
+            )
+
+
+class MongoBirthdayRepository(BirthdayRepository):
+    """Birthday documents in a Mongo collection."""
+
+    def __init__(
+        self, collection: motor.AsyncIOMotorCollection[BirthdayDocument]
+    ) -> None:
+        """
+        Create the repository.
+
+        Args:
+            collection (motor.AsyncIOMotorCollection[BirthdayDocument]):
+                Collection to use.
+        """
+        self.collection = collection
+
+    async def documents(self) -> AsyncIterator[BirthdayDocument]:
+        """
+        Iterate over every document.
+
+        Yields:
+            BirthdayDocument: A document.
+        """
+        async for document in self.collection.find({}, WITHOUT_ID):
+            yield document
+
+    async def upsert(self, document: BirthdayDocument) -> None:
+        """
+        Store the birthday of a user, replacing their earlier one.
+
+        Args:
+            document (BirthdayDocument): The document.
+        """
+        await self.collection.update_one(
+            {"discord_id": document["discord_id"]},
+            {"$set": dict(document)},
+            upsert=True,
+        )
+
+    async def due(
+        self, discord_ids: Sequence[int], now: datetime
+    ) -> list[BirthdayDocument]:
+        """
+        Get the birthdays of users whose date is not after now.
+
+        Args:
+            discord_ids (Sequence[int]): Ids of the users to check.
+            now (datetime): The aware current time.
+
+        Returns:
+            list[BirthdayDocument]: The documents of the due users.
+        """
+        # streamed from the cursor, not buffered by to_list first.
+        return [
+            document
+            async for document in self.collection.find(
+                {
+                    "discord_id": {"$in": list(discord_ids)},
+                    "date": {"$lte": now},
+                },
+                WITHOUT_ID,
+            )
+        ]
+
+    async def move(
+        self, moves: Sequence[tuple[int, datetime, datetime]]
+    ) -> None:
+        """
+        Move birthdays to a new date in a single bulk write.
+
+        Args:
+            moves (Sequence[tuple[int, datetime, datetime]]):
+                Discord id, old date as read and new date, per user.
+        """
+        if moves:
+            await self.collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"discord_id": discord_id, "date": old_date},
+                        {"$set": {"date": new_date}},
+                    )
+                    for discord_id, old_date, new_date in moves
+                ],
+                ordered=False,
+            )
+
+    async def upsert_many(self, documents: Sequence[BirthdayDocument]) -> None:
+        """
+        Store documents in a single bulk write, replacing existing ones.
+
+        Args:
+            documents (Sequence[BirthdayDocument]): The documents.
+        """
+        if documents:
+            await self.collection.bulk_write(
+                [
+                    ReplaceOne(
+                        {"discord_id": document["discord_id"]},
+                        dict(document),
+                        upsert=True,
+                    )
+                    for document in documents
+                ],
+                ordered=False,
+            )
+
+
+class MongoTwitchChannelRepository(TwitchChannelRepository):
+    """Twitch channel documents in a Mongo collection."""
+
+    def __init__(
+        self, collection: motor.AsyncIOMotorCollection[TwitchChannelDocument]
+    ) -> None:
+        """
+        Create the repository.
+
+        Args:
+            collection (motor.AsyncIOMotorCollection[TwitchChannelDocument]):
+                Collection to use.
+        """
+        self.collection = collection
+
+    async def documents(self) -> AsyncIterator[TwitchChannelDocument]:
+        """
+        Iterate over every document.
+
+        Yields:
+            TwitchChannelDocument: A document.
+        """
+        async for document in self.collection.find({}, WITHOUT_ID):
+            yield document
+
+    async def get(self, user_id: str) -> TwitchChannelDocument | None:
+        """
+        Get the document of a channel.
+
+        Args:
+            user_id (str): Twitch id of the channel.
+
+        Returns:
+            TwitchChannelDocument | None: The document, None if there is none.
+        """
+        return await self.collection.find_one({"user_id": user_id}, WITHOUT_ID)
+
+    async def upsert(self, document: TwitchChannelDocument) -> None:
+        """
+        Store the document of a channel, replacing its earlier one.
+
+        Args:
+            document (TwitchChannelDocument): The document.
+        """
+        await self.collection.update_one(
+            {"user_id": document["user_id"]},
+            {"$set": dict(document)},
+            upsert=True,
+        )
+
+    async def remove(self, user_id: str) -> None:
+        """
+        Remove the document of a channel.
+
+        Args:
+            user_id (str): Twitch id of the channel.
+        """
+        await self.collection.delete_one({"user_id": user_id})
+
+    async def set_streams(
+        self, streams: Sequence[tuple[str, str | None]]
+    ) -> None:
+        """
+        Record the streams of many channels in a single bulk write.
+
+        Args:
+            streams (Sequence[tuple[str, str | None]]):
+                Twitch id of the channel and id of its stream, None if it is
+                offline, per channel.
+        """
+        if streams:
+            await self.collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"user_id": user_id}, {"$set": {"stream_id": stream_id}}
+                    )
+                    for user_id, stream_id in streams
+                ],
+                ordered=False,
+            )
+
+    async def upsert_many(
+        self, documents: Sequence[TwitchChannelDocument]
+    ) -> None:
+        """
+        Store documents in a single bulk write, replacing existing ones.
+
+        Args:
+            documents (Sequence[TwitchChannelDocument]): The documents.
+        """
+        if documents:
+            await self.collection.bulk_write(
+                [
+                    ReplaceOne(
+                        {"user_id": document["user_id"]},
+                        dict(document),
+                        upsert=True,
+                    )
+                    for document in documents
+                ],
+                ordered=False,
+            )
+
+
+class MongoStorage(Storage):
+    """Every repository, in a Mongo database."""
+
+    def __init__(self, uri: str, name: str) -> None:
+        """
+        Create the client, it connects on first use.
+
+        The records of a mongodb+srv uri are not fetched here, injectors
+        prefetches them with dns_cache.prefetch_srv before creating the
+        storage, so the client finds them cached.
+
+        Args:
+            uri (str): Connection string of the server.
+            name (str): Name of the database.
+        """
+        self.client = motor.AsyncIOMotorClient(
+            uri,
+            maxPoolSize=constants.Mongo.MAX_POOL_SIZE,
+            minPoolSize=constants.Mongo.MIN_POOL_SIZE,
+            maxIdleTimeMS=constants.Mongo.MAX_IDLE_TIME,
+            compressors=constants.Mongo.COMPRESSORS,
+            connectTimeoutMS=constants.Mongo.CONNECT_TIMEOUT,
+            serverSelectionTimeoutMS=constants.Mongo.SERVER_SELECTION_TIMEOUT,
+            socketTimeoutMS=constants.Mongo.SOCKET_TIMEOUT,
+            event_listeners=[
+                metrics.MongoCommandListener(),
+                metrics.MONGO_POOL,
+            ],
+        )
+        self.database = self.client[name]
+        self.roles = MongoRoleInfoRepository(self.database["role_info"])
+        self.birthdays = MongoBirthdayRepository(self.database["birthday"])
+        self.twitch_channels = MongoTwitchChannelRepository(
+            self.database["twitch_channel"]
+        )
+
+    async def prepare(self) -> None:
+        """
+        Connect to the db and make sure the indexes exist.
+
+        The ping opens the first pooled connection, the pool then keeps
+        MIN_POOL_SIZE connections open, so commands skip the handshake.
+        """
+        with profiler.phase("mongo ping"):
+            await self.ping()
+
+        with profiler.phase("mongo indexes"):
+            await indexes.ensure_indexes(self.database)
+
+    async def ping(self) -> None:
+        """Ping the server."""
+        await self.database.command("ping")
+
+    async def close(self) -> None:
+        """Close the client."""
+        self.client.close()
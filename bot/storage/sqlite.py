@@ -0,0 +1,585 @@
+"""Repositories stored in an embedded SQLite database."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, TypeVar
+
+from bot import constants, timeline
+from bot.storage.base import (
+    BirthdayRepository,
+    RoleInfoRepository,
+    Storage,
+    TwitchChannelRepository,
+)
+
+if TYPE_CHECKING:
+    from typing import AsyncIterator, Callable, Iterable, Sequence
+
+    from bot.storage.base import RoleChanges
+    from bot.types import (
+        BirthdayDocument,
+        RoleInfoDocument,
+        TwitchChannelDocument,
+    )
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS role_info (
+    role_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    color TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS birthday (
+    discord_id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    month INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    timezone TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS birthday_date ON birthday (date);
+CREATE TABLE IF NOT EXISTS twitch_channel (
+    user_id TEXT PRIMARY KEY,
+    login TEXT NOT NULL,
+    discord_id INTEGER NOT NULL,
+    stream_id TEXT
+);
+"""
+# rows fetched per hop to the database thread when streaming.
+CHUNK_SIZE = 500
+# stays below the bound parameter limit of old SQLite versions.
+MAX_PARAMETERS = 500
+
+
+def _encode_date(moment: datetime) -> str:
+    """
+    Store a moment as fixed width UTC text, so text order is time order.
+
+    Args:
+        moment (datetime): The moment, naive moments are taken as UTC.
+
+    Returns:
+        str: The moment in ISO format.
+    """
+    return timeline.as_utc(moment).isoformat(timespec="microseconds")
+
+
+def _decode_date(text: str) -> datetime:
+    """
+    Read a stored moment.
+
+    Args:
+        text (str): The moment in ISO format.
+
+    Returns:
+        datetime: The aware moment.
+    """
+    return datetime.fromisoformat(text).astimezone(timezone.utc)
+
+
+def _chunks(values: Sequence[T], size: int) -> Iterable[Sequence[T]]:
+    """
+    Split values into chunks.
+
+    Args:
+        values (Sequence[T]): The values.
+        size (int): Most values per chunk.
+
+    Returns:
+        Iterable[Sequence[T]]: The chunks.
+    """
+    return (
+        values[start : start + size] for start in range(0, len(values), size)
+    )
+
+
+class SQLiteStorage(Storage):
+    """
+    Every repository, in a single SQLite file.
+
+    The connection lives on a dedicated thread, every query is handed to it
+    so the event loop never waits on disk. The database is in WAL mode, so
+    a write does not block other readers of the file, like the migrate tool.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Create the storage, the file is opened on first use.
+
+        Args:
+            path (str): Path of the database file.
+        """
+        self.path = path
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="sqlite")
+        self._connection: sqlite3.Connection | None = None
+        self.roles = SQLiteRoleInfoRepository(self)
+        self.birthdays = SQLiteBirthdayRepository(self)
+        self.twitch_channels = SQLiteTwitchChannelRepository(self)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Get the connection, opening it and creating the schema the first time.
+
+        Only call this on the database thread.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode = WAL")
+            # in WAL mode this is still safe from corruption on a crash.
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+
+        return self._connection
+
+    async def run(self, query: Callable[[sqlite3.Connection], T]) -> T:
+        """
+        Run a function with the connection on the database thread.
+
+        Args:
+            query (Callable[[sqlite3.Connection], T]): The function.
+
+        Returns:
+            T: What the function returned.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, lambda: query(self._connect())
+        )
+
+    async def stream(
+        self, sql: str, parameters: Sequence[object] = ()
+    ) -> AsyncIterator[sqlite3.Row]:
+        """
+        Iterate over the rows of a query, fetched in chunks.
+
+        Args:
+            sql (str): The query.
+            parameters (Sequence[object]): Parameters of the query.
+                Defaults to ().
+
+        Yields:
+            sqlite3.Row: A row.
+        """
+        cursor = await self.run(
+            lambda connection: connection.execute(sql, parameters)
+        )
+        while rows := await self.run(lambda _: cursor.fetchmany(CHUNK_SIZE)):
+            # yield from is not allowed in an async generator.
+            for row in rows:  # noqa: SIM104
+                yield row
+
+    async def prepare(self) -> None:
+        """Open the database and create the schema."""
+        await self.ping()
+
+    async def ping(self) -> None:
+        """Run a trivial query."""
+        await self.run(lambda connection: connection.execute("SELECT 1"))
+
+    async def close(self) -> None:
+        """Close the connection and stop the database thread."""
+        if self._connection is not None:
+            await self.run(lambda connection: connection.close())
+            self._connection = None
+        self._executor.shutdown(wait=False)
+
+
+class SQLiteRoleInfoRepository(RoleInfoRepository):
+    """Role info documents in the role_info table."""
+
+    UPSERT = (
+        "INSERT INTO role_info (role_id, name, color, description) "
+        "VALUES (:role_id, :name, :color, :description) "
+        "ON CONFLICT (role_id) DO UPDATE SET "
+        "name = excluded.name, color = excluded.color, "
+        "description = excluded.description"
+    )
+    UPDATE = "UPDATE role_info SET name = :name, color = :color WHERE role_id = :role_id"
+
+    def __init__(self, storage: SQLiteStorage) -> None:
+        """
+        Create the repository.
+
+        Args:
+            storage (SQLiteStorage): Storage to run the queries on.
+        """
+        self.storage = storage
+
+    async def documents(self) -> AsyncIterator[RoleInfoDocument]:
+        """
+        Iterate over every document.
+
+        Yields:
+            RoleInfoDocument: A document.
+        """
+        async for row in self.storage.stream("SELECT * FROM role_info"):
+            yield dict(row)  # type: ignore
+
+    async def get(self, role_id: int) -> RoleInfoDocument | None:
+        """
+        Get the document of a role.
+
+        Args:
+            role_id (int): Id of the role.
+
+        Returns:
+            RoleInfoDocument | None: The document, None if there is none.
+        """
+        row = await self.storage.run(
+            lambda connection: connection.execute(
+                "SELECT * FROM role_info WHERE role_id = ?", (role_id,)
+            ).fetchone()
+        )
+        return None if row is None else dict(row)  # type: ignore
+
+    async def add(self, document: RoleInfoDocument) -> None:
+        """
+        Store the document of a new role.
+
+        Args:
+            document (RoleInfoDocument): The document.
+        """
+        await self.upsert_many([document])
+
+    async def update(self, role_id: int, *, name: str, color: str) -> None:
+        """
+        Update the name and color of a role.
+
+        Args:
+            role_id (int): Id of the role.
+            name (str): The new name.
+            color (str): The new color, as a hex code.
+        """
+
+        def query(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(
+                    self.UPDATE,
+                    {"role_id": role_id, "name": name, "color": color},
+                )
+
+        await self.storage.run(query)
+
+    async def remove(self, role_id: int) -> None:
+        """
+        Remove the document of a role.
+
+        Args:
+            role_id (int): Id of the role.
+        """
+
+        def query(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(
+                    "DELETE FROM role_info WHERE role_id = ?", (role_id,)
+                )
+
+        await self.storage.run(query)
+
+    async def apply(self, changes: RoleChanges) -> None:
+        """
+        Write many changes in a single transaction.
+
+        Args:
+            changes (RoleChanges): The changes.
+        """
+
+        def query(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(self.UPSERT, changes.inserted)
+                connection.executemany(self.UPDATE, changes.updated)
+                connection.executemany(
+                    "DELETE FROM role_info WHERE role_id = ?",
+                    ((role_id,) for role_id in changes.deleted),
+                )
+
+        if changes:
+            await self.storage.run(query)
+
+    async def upsert_many(self, documents: Sequence[RoleInfoDocument]) -> None:
+        """
+        Store documents in a single transaction, replacing existing ones.
+
+        Args:
+            documents (Sequence[RoleInfoDocument]): The documents.
+        """
+
+        def query(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(self.UPSERT, documents)
+
+        if documents:
+            await self.storage.run(query)
+
+
+class SQLiteBirthdayRepository(BirthdayRepository):
+    """Birthday documents in the birthday table."""
+
+    UPSERT = (
+        "INSERT INTO birthday (discord_id, date, month, day, timezone) "
+        "VALUES (:discord_id, :date, :month, :day, :timezone) "
+        "ON CONFLICT (discord_id) DO UPDATE SET "
+        "date = excluded.date, month = excluded.month, day = excluded.day, "
+        "timezone = excluded.timezone"
+    )
+
+    def __init__(self, storage: SQLiteStorage) -> None:
+        """
+        Create the repository.
+
+        Args:
+            storage (SQLiteStorage): Storage to run the queries on.
+        """
+        self.storage = storage
+
+    @staticmethod
+    def _document(row: sqlite3.Row) -> BirthdayDocument:
+        """
+        Turn a row into a document.
+
+        Args:
+            row (sqlite3.Row): The row.
+
+        Returns:
+            BirthdayDocument: The document.
+        """
+        document = dict(row)
+        document["date"] = _decode_date(document["date"])
+        return document  # type: ignore
+
+    @staticmethod
+    def _row(document: BirthdayDocument) -> dict[str, object]:
+        """
+        Turn a document into a row.
+
+        Documents stored before the month, day and time zone were kept, as
+        copied from Mongo, get them from their date like check_birthdays does.
+
+        Args:
+            document (BirthdayDocument): The document.
+
+        Returns:
+            dict[str, object]: The row, with every column.
+        """
+        date = timeline.as_utc(document["date"])
+        return {
+            "discord_id": document["discord_id"],
+            "date": _encode_date(date),
+            "month": document.get("month", date.month),
+            "day": document.get("day", date.day),
+            "timezone": document.get("timezone", constants.DEFAULT_TIMEZONE),
+        }
+
+    async def documents(self) -> AsyncIterator[BirthdayDocument]:
+        """
+        Iterate over every document.
+
+        Yields:
+            BirthdayDocument: A document.
+        """
+        async for row in self.storage.stream("SELECT * FROM birthday"):
+            yield self._document(row)
+
+    async def upsert(self, document: BirthdayDocument) -> None:
+        """
+        Store the birthday of a user, replacing their earlier one.
+
+        Args:
+            document (BirthdayDocument): The document.
+        """
+        await self.upsert_many([document])
+
+    async def due(
+        self, discord_ids: Sequence[int], now: datetime
+    ) -> list[BirthdayDocument]:
+        """
+        Get the birthdays of users whose date is not after now.
+
+        Args:
+            discord_ids (Sequence[int]): Ids of the users to check.
+            now (datetime): The aware current time.
+
+        Returns:
+            list[BirthdayDocument]: The documents of the due users.
+        """
+
+        def query(connection: sqlite3.Connection) -> list[sqlite3.Row]:
+            rows: list[sqlite3.Row] = []
+            for chunk in _chunks(discord_ids, MAX_PARAMETERS):
+                placeholders = ", ".join("?" * len(chunk))
+                rows.extend(
+                    connection.execute(
+                        "SELECT * FROM birthday WHERE date <= ? "  # noqa: S608
+                        f"AND discord_id IN ({placeholders})",
+                        (_encode_date(now), *chunk),
+                    )
+                )
+            return rows
+
+        return [self._document(row) for row in await self.storage.run(query)]
+
+    async def move(
+        self, moves: Sequence[tuple[int, datetime, datetime]]
+    ) -> None:
+        """
+        Move birthdays to a new date in a single transaction.
+
+        Args:
+            moves (Sequence[tuple[int, datetime, datetime]]):
+                Discord id, old date as read and new date, per user.
+        """
+
+        def query(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(
+                    "UPDATE birthday SET date = ? "
+                    "WHERE discord_id = ? AND date = ?",
+                    (
+                        (
+                            _encode_date(new_date),
+                            discord_id,
+                            _encode_date(old_date),
+                        )
+                        for discord_id, old_date, new_date in moves
+                    ),
+                )
+
+        if moves:
+            await self.storage.run(query)
+
+    async def upsert_many(self, documents: Sequence[BirthdayDocument]) -> None:
+        """
+        Store documents in a single transaction, replacing existing ones.
+
+        Args:
+            documents (Sequence[BirthdayDocument]): The documents.
+        """
+        rows = [self._row(document) for document in documents]
+
+        def query(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(self.UPSERT, rows)
+
+        if rows:
+            await self.storage.run(query)
+
+
+class SQLiteTwitchChannelRepository(TwitchChannelRepository):
+    """Twitch channel documents in the twitch_channel table."""
+
+    UPSERT = (
+        "INSERT INTO twitch_channel (user_id, login, discord_id, stream_id) "
+        "VALUES (:user_id, :login, :discord_id, :stream_id) "
+        "ON CONFLICT (user_id) DO UPDATE SET "
+        "login = excluded.login, discord_id = excluded.discord_id, "
+        "stream_id = excluded.stream_id"
+    )
+
+    def __init__(self, storage: SQLiteStorage) -> None:
+        """
+        Create the repository.
+
+        Args:
+            storage (SQLiteStorage): Storage to run the queries on.
+        """
+        self.storage = storage
+
+    async def documents(self) -> AsyncIterator[TwitchChannelDocument]:
+        """
+        Iterate over every document.
+
+        Yields:
+            TwitchChannelDocument: A document.
+        """
+        async for row in self.storage.stream("SELECT * FROM twitch_channel"):
+            yield dict(row)  # type: ignore
+
+    async def get(self, user_id: str) -> TwitchChannelDocument | None:
+        """
+        Get the document of a channel.
+
+        Args:
+            user_id (str): Twitch id of the channel.
+
+        Returns:
+            TwitchChannelDocument | None: The document, None if there is none.
+        """
+        row = await self.storage.run(
+            lambda connection: connection.execute(
+                "SELECT * FROM twitch_channel WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        )
+        return None if row is None else dict(row)  # type: ignore
+
+    async def upsert(self, document: TwitchChannelDocument) -> None:
+        """
+        Store the document of a channel, replacing its earlier one.
+
+        Args:
+            document (TwitchChannelDocument): The document.
+        """
+        await self.upsert_many([document])
+
+    async def remove(self, user_id: str) -> None:
+        """
+        Remove the document of a channel.
+
+        Args:
+            user_id (str): Twitch id of the channel.
+        """
+
+        def query(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(
+                    "DELETE FROM twitch_channel WHERE user_id = ?", (user_id,)
+                )
+
+        await self.storage.run(query)
+
+    async def set_streams(
+        self, streams: Sequence[tuple[str, str | None]]
+    ) -> None:
+        """
+        Record the streams of many channels in a single transaction.
+
+        Args:
+            streams (Sequence[tuple[str, str | None]]):
+                Twitch id of the channel and id of its stream, None if it is
+                offline, per channel.
+        """
+
+        def query(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(
+                    "UPDATE twitch_channel SET stream_id = ? WHERE user_id = ?",
+                    ((stream_id, user_id) for user_id, stream_id in streams),
+                )
+
+        if streams:
+            await self.storage.run(query)
+
+    async def upsert_many(
+        self, documents: Sequence[TwitchChannelDocument]
+    ) -> None:
+        """
+        Store documents in a single transaction, replacing existing ones.
+
+        Args:
+            documents (Sequence[TwitchChannelDocument]): The documents.
+        """
+
+        def query(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(self.UPSERT, documents)
+
+        if documents:
+            await self.storage.run(query)
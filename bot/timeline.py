@@ -0,0 +1,177 @@
+"""Timeline of upcoming birthdays."""
+
+from __future__ import annotations
+
+import calendar
+import heapq
+from datetime import date, datetime, time, timezone
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
+
+if TYPE_CHECKING:
+    from bot.storage import BirthdayRepository
+
+
+def birthday_in_year(year: int, month: int, day: int) -> date:
+    """
+    Get the date a birthday is celebrated on in a year.
+
+    People born on the 29th of February celebrate on the 28th in common years.
+
+    Args:
+        year (int): The year to get the date in.
+        month (int): Month of the birthday.
+        day (int): Day of the birthday.
+
+    Returns:
+        date: The date to celebrate on.
+    """
+    if month == 2 and day == 29 and not calendar.isleap(year):
+        return date(year, 2, 28)
+    return date(year, month, day)
+
+
+def next_birthday(month: int, day: int, tz: str, after: datetime) -> datetime:
+    """
+    Get the first local midnight of a birthday strictly after a moment.
+
+    Args:
+        month (int): Month of the birthday.
+        day (int): Day of the birthday.
+        tz (str): IANA name of the time zone the user lives in.
+        after (datetime): The aware moment the birthday has to come after.
+
+    Returns:
+        datetime: The birthday, as an aware datetime in UTC.
+    """
+    zone = ZoneInfo(tz)
+    local_after = after.astimezone(zone)
+
+    year = local_after.year
+    while True:
+        midnight = datetime.combine(
+            birthday_in_year(year, month, day), time(), tzinfo=zone
+        )
+        if midnight > local_after:
+            return midnight.astimezone(timezone.utc)
+        year += 1
+
+
+def as_utc(moment: datetime) -> datetime:
+    """
+    Make a datetime read from the db aware.
+
+    Mongo stores datetimes in UTC and returns them naive.
+
+    Args:
+        moment (datetime): The datetime, naive in UTC or aware.
+
+    Returns:
+        datetime: The aware datetime.
+    """
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+class BirthdayTimeline:
+    """
+    Min-heap of the next birthday of every user.
+
+    Rescheduling a user leaves the old heap entry in place, it is skipped when
+    it reaches the top since it no longer matches the user's current entry.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty timeline."""
+        self._heap: list[tuple[datetime, int]] = []
+        self._current: dict[int, datetime] = {}
+
+    def __len__(self) -> int:
+        """
+        Get the amount of users on the timeline.
+
+        Returns:
+            int: The amount of users.
+        """
+        return len(self._current)
+
+    def schedule(self, discord_id: int, moment: datetime) -> None:
+        """
+        Add a user, or move them if they already are on the timeline.
+
+        Args:
+            discord_id (int): Id of the user.
+            moment (datetime): The aware moment of their next birthday.
+        """
+        self._current[discord_id] = moment
+        heapq.heappush(self._heap, (moment, discord_id))
+
+        # stop stale entries from piling up when users keep rescheduling.
+        if len(self._heap) > 2 * len(self._current) + 64:
+            self._heap = [(when, user) for user, when in self._current.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, discord_id: int) -> None:
+        """
+        Remove a user from the timeline.
+
+        Args:
+            discord_id (int): Id of the user.
+        """
+        self._current.pop(discord_id, None)
+
+    def _drop_stale(self) -> None:
+        """Pop entries from the top of the heap until it is a current one."""
+        while self._heap:
+            moment, discord_id = self._heap[0]
+            if self._current.get(discord_id) == moment:
+                return
+            heapq.heappop(self._heap)
+
+    def peek(self) -> datetime | None:
+        """
+        Get the moment of the next birthday.
+
+        Returns:
+            datetime | None: The moment, or None if the timeline is empty.
+        """
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> list[int]:
+        """
+        Remove and return every user whose birthday is at or before now.
+
+        Args:
+            now (datetime): The aware current moment.
+
+        Returns:
+            list[int]: Ids of the users who have a birthday.
+        """
+        due: list[int] = []
+
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, discord_id = heapq.heappop(self._heap)
+            del self._current[discord_id]
+            due.append(discord_id)
+            self._drop_stale()
+
+        return due
+
+    async def load(self, repository: BirthdayRepository) -> None:
+        """
+        Replace the timeline content with the birthdays in the db.
+
+        Args:
+            repository (BirthdayRepository): Db to load the birthdays from.
+        """
+        self._current = {}
+        async for birthday in repository.documents():
+            self._current[birthday["discord_id"]] = as_utc(birthday["date"])
+
+        self._heap = [
+            (moment, discord_id) for discord_id, moment in self._current.items()
+        ]
+        heapq.heapify(self._heap)
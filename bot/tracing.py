@@ -0,0 +1,198 @@
+"""Per command latency tracing."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from bot import constants
+
+if TYPE_CHECKING:
+    from typing import Any, Iterator, Literal, Sequence
+
+    import tanjun
+
+    SpanKind = Literal["db", "rest"]
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """
+    Get a percentile with the nearest rank method.
+
+    Args:
+        values (Sequence[float]): The values, in any order.
+        fraction (float): The percentile, as a fraction like 0.95.
+
+    Returns:
+        float: The value at the percentile, 0 if there are no values.
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class Trace:
+    """Timings of a single command invocation."""
+
+    start: float = field(default_factory=time.perf_counter)
+    db: float = 0.0
+    rest: float = 0.0
+
+
+@dataclass(frozen=True)
+class Timing:
+    """Finished timings of a command invocation, in seconds."""
+
+    total: float
+    db: float
+    rest: float
+
+    @property
+    def handler(self) -> float:
+        """
+        Get the time spent outside db and rest calls.
+
+        Returns:
+            float: The handler time.
+        """
+        return max(0.0, self.total - self.db - self.rest)
+
+
+class CommandTracer:
+    """
+    Measure each command end to end, split into db, rest and handler time.
+
+    Client hooks run in their own tasks, so traces are keyed by context and
+    db and rest calls are marked with span(ctx, kind).
+    """
+
+    def __init__(self, window: int = constants.PERF_WINDOW) -> None:
+        """
+        Create a tracer without any timings.
+
+        Args:
+            window (int): Invocations per command to keep percentiles over.
+                Defaults to constants.PERF_WINDOW.
+        """
+        self.window = window
+        self.timings: dict[str, deque[Timing]] = {}
+        self._traces: dict[int, Trace] = {}
+
+    def start(self, ctx: tanjun.abc.Context) -> None:
+        """
+        Start tracing a command, use as a pre execution hook.
+
+        Args:
+            ctx (tanjun.abc.Context): Context of the command.
+        """
+        self._traces[id(ctx)] = Trace()
+
+    @contextmanager
+    def span(self, ctx: tanjun.abc.Context, kind: SpanKind) -> Iterator[None]:
+        """
+        Count the time in the with block as db or rest time.
+
+        Args:
+            ctx (tanjun.abc.Context): Context of the command.
+            kind (SpanKind): "db" or "rest".
+
+        Yields:
+            None: Nothing, the span ends when the block exits.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            trace = self._traces.get(id(ctx))
+            if trace is not None:
+                elapsed = time.perf_counter() - start
+                setattr(trace, kind, getattr(trace, kind) + elapsed)
+
+    def finish(self, ctx: tanjun.abc.Context) -> None:
+        """
+        Stop tracing a command, use as a post execution hook.
+
+        Invocations slower than constants.SLOW_COMMAND_THRESHOLD are logged as
+        warnings, the others are logged at info level and sampled.
+
+        Args:
+            ctx (tanjun.abc.Context): Context of the command.
+        """
+        trace = self._traces.pop(id(ctx), None)
+        if trace is None:
+            return
+
+        timing = Timing(
+            total=time.perf_counter() - trace.start,
+            db=trace.db,
+            rest=trace.rest,
+        )
+        name = ctx.triggering_name
+        if name not in self.timings:
+            self.timings[name] = deque(maxlen=self.window)
+        self.timings[name].append(timing)
+
+        if timing.total > constants.SLOW_COMMAND_THRESHOLD:
+            options: dict[str, Any] = {
+                option_name: option.value
+                for option_name, option in getattr(ctx, "options", {}).items()
+            }
+            logger.warning(
+                "Slow command /{} took {:.0f} ms "
+                "(db {:.0f} ms, rest {:.0f} ms, handler {:.0f} ms) "
+                "by {} with {}",
+                name,
+                timing.total * 1000,
+                timing.db * 1000,
+                timing.rest * 1000,
+                timing.handler * 1000,
+                ctx.author.id,
+                options,
+            )
+        else:
+            logger.bind(
+                sample="interaction",
+                command=name,
+                user_id=ctx.author.id,
+                db_ms=round(timing.db * 1000),
+                rest_ms=round(timing.rest * 1000),
+            ).info("Command /{} took {:.0f} ms", name, timing.total * 1000)
+
+    def percentiles(
+        self, name: str, fractions: Sequence[float] = (0.5, 0.95, 0.99)
+    ) -> dict[str, list[float]]:
+        """
+        Get percentiles of each part of a command's timings.
+
+        Args:
+            name (str): Name of the command.
+            fractions (Sequence[float]): The percentiles to get.
+                Defaults to p50, p95 and p99.
+
+        Returns:
+            dict[str, list[float]]: The percentiles of the total, db, rest
+                and handler time, in seconds.
+        """
+        timings = self.timings.get(name, ())
+        parts = {
+            "total": [timing.total for timing in timings],
+            "db": [timing.db for timing in timings],
+            "rest": [timing.rest for timing in timings],
+            "handler": [timing.handler for timing in timings],
+        }
+        return {
+            part: [percentile(values, fraction) for fraction in fractions]
+            for part, values in parts.items()
+        }
+
+
+tracer = CommandTracer()
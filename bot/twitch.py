@@ -0,0 +1,338 @@
+"""Client of the Twitch helix api."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from bot import caches, constants, metrics
+
+if TYPE_CHECKING:
+    from typing import Any, Iterable, Mapping, Sequence
+
+    from bot.http_client import HttpClient
+    from bot.types import TwitchUserData
+
+
+# what Twitch accepts as a login, anything else is never looked up.
+LOGIN = re.compile(r"^[a-z0-9_]{1,25}$")
+
+
+class TwitchError(Exception):
+    """The Twitch api answered with an error."""
+
+
+def normalize_login(login: str) -> str:
+    """
+    Normalize a login the way Twitch stores them.
+
+    Args:
+        login (str): The login as typed.
+
+    Returns:
+        str: The lowercase login.
+    """
+    return login.strip().lstrip("@").casefold()
+
+
+@dataclass
+class RateLimit:
+    """The app's rate limit bucket, as of the last response."""
+
+    # points the bucket holds, a request costs one and it refills in a minute.
+    limit: int = constants.Twitch.RATE_LIMIT
+    remaining: int = constants.Twitch.RATE_LIMIT
+    # unix time the bucket is full again.
+    reset: float = 0.0
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """
+        Read the bucket from the headers of a response.
+
+        Args:
+            headers (Mapping[str, str]): The headers, missing ones are skipped.
+        """
+        if "Ratelimit-Limit" in headers:
+            self.limit = int(headers["Ratelimit-Limit"])
+        if "Ratelimit-Remaining" in headers:
+            self.remaining = int(headers["Ratelimit-Remaining"])
+        if "Ratelimit-Reset" in headers:
+            self.reset = float(headers["Ratelimit-Reset"])
+
+
+class TwitchClient:
+    """
+    Looks up Twitch users, batching and caching the helix requests.
+
+    Lookups made within BATCH_DELAY of each other are sent as a single
+    request of up to BATCH_SIZE logins. A login that is already being
+    fetched is not requested again, the lookups share the one request.
+    Results, including unknown logins, are cached for a while.
+    """
+
+    def __init__(
+        self,
+        http: HttpClient,
+        client_id: str = constants.Twitch.CLIENT_ID,
+        client_secret: str = constants.Twitch.CLIENT_SECRET,
+        api_url: str = constants.Twitch.API_URL,
+        auth_url: str = constants.Twitch.AUTH_URL,
+    ) -> None:
+        """
+        Create the client, it authenticates on the first request.
+
+        Args:
+            http (HttpClient): Client to make requests with.
+            client_id (str): Id of the Twitch application.
+                Defaults to constants.Twitch.CLIENT_ID.
+            client_secret (str): Secret of the Twitch application.
+                Defaults to constants.Twitch.CLIENT_SECRET.
+            api_url (str): Base url of the helix api.
+                Defaults to constants.Twitch.API_URL.
+            auth_url (str): Base url of the oauth api.
+                Defaults to constants.Twitch.AUTH_URL.
+        """
+        self.http = http
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_url = api_url.rstrip("/")
+        self.auth_url = auth_url.rstrip("/")
+
+        self.users: caches.TTLCache[
+            str, TwitchUserData | None
+        ] = caches.TTLCache(
+            constants.Twitch.CACHE_SIZE, constants.Twitch.CACHE_TTL
+        )
+        self.rate_limit = RateLimit()
+        self._in_flight: dict[str, asyncio.Future[TwitchUserData | None]] = {}
+        self._batch: list[str] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+        self._token: str | None = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+
+    async def get_user(self, login: str) -> TwitchUserData | None:
+        """
+        Look up a user.
+
+        Args:
+            login (str): Login name of the user.
+
+        Returns:
+            TwitchUserData | None: The user, None if there is no such user
+                or the login is invalid.
+        """
+        login = normalize_login(login)
+        return (await self.get_users([login]))[login]
+
+    async def get_users(
+        self, logins: Iterable[str]
+    ) -> dict[str, TwitchUserData | None]:
+        """
+        Look up many users.
+
+        Args:
+            logins (Iterable[str]): Login names of the users.
+
+        Returns:
+            dict[str, TwitchUserData | None]: The users by normalized login,
+                None for logins without a user and invalid logins.
+
+        Raises:
+            TwitchError: The api answered with an error.
+
+        # noqa: DAR402 TwitchError
+        """
+        loop = asyncio.get_running_loop()
+        found: dict[str, TwitchUserData | None] = {}
+        waiting: dict[str, asyncio.Future[TwitchUserData | None]] = {}
+
+        for login in dict.fromkeys(map(normalize_login, logins)):
+            if LOGIN.match(login) is None:
+                found[login] = None
+                continue
+
+            cached, user = self.users.get(login)
+            if cached:
+                found[login] = user
+                continue
+
+            future = self._in_flight.get(login)
+            if future is None:
+                future = self._in_flight[login] = loop.create_future()
+                # a cancelled caller leaves the exception unretrieved.
+                future.add_done_callback(
+                    lambda done: done.cancelled() or done.exception()
+                )
+                self._enqueue(login)
+            waiting[login] = future
+
+        for login, future in waiting.items():
+            # shielded, other lookups may be waiting on the same future.
+            found[login] = await asyncio.shield(future)
+
+        return found
+
+    async def request(
+        self, endpoint: str, params: Sequence[tuple[str, str]]
+    ) -> list[dict[str, Any]]:
+        """
+        Get a helix endpoint, authenticating again if the token expired.
+
+        Args:
+            endpoint (str): The endpoint, like "users".
+            params (Sequence[tuple[str, str]]): Query parameters, keys can
+                repeat.
+
+        Returns:
+            list[dict[str, Any]]: The data of the response.
+
+        Raises:
+            TwitchError: The api answered with an error.
+        """
+        token = await self._access_token()
+        for attempt in range(2):
+            async with self.http.request(
+                "GET",
+                f"{self.api_url}/{endpoint}",
+                params=params,
+                headers={
+                    "Client-Id": self.client_id,
+                    "Authorization": f"Bearer {token}",
+                },
+            ) as response:
+                metrics.TWITCH_REQUESTS.inc(endpoint, str(response.status))
+                self.rate_limit.update(response.headers)
+                if response.status == 401 and attempt == 0:
+                    token = await self._access_token(stale=token)
+                    continue
+                if response.status != 200:
+                    raise TwitchError(
+                        f"GET {endpoint} failed with {response.status}: "
+                        f"{await response.text()}"
+                    )
+                return (await response.json())["data"]
+
+        raise TwitchError(f"GET {endpoint} was not authorized")
+
+    async def close(self) -> None:
+        """Cancel the pending lookups."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._batch.clear()
+
+        for task in self._tasks:
+            task.cancel()
+        for future in self._in_flight.values():
+            future.cancel()
+        self._in_flight.clear()
+
+    def _enqueue(self, login: str) -> None:
+        """
+        Add a login to the next batch, sending it when full.
+
+        Args:
+            login (str): The normalized login.
+        """
+        self._batch.append(login)
+        if len(self._batch) >= constants.Twitch.BATCH_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                constants.Twitch.BATCH_DELAY, self._flush
+            )
+
+    def _flush(self) -> None:
+        """Send the batch of logins."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._batch = self._batch, []
+        task = asyncio.create_task(self._fetch_users(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch_users(self, logins: list[str]) -> None:
+        """
+        Fetch a batch of users, completing the lookups waiting on them.
+
+        Args:
+            logins (list[str]): The normalized logins, at most BATCH_SIZE.
+        """
+        try:
+            data = await self.request(
+                "users", [("login", login) for login in logins]
+            )
+        except Exception as error:  # noqa: B902
+            for login in logins:
+                future = self._in_flight.pop(login, None)
+                if future is not None and not future.done():
+                    future.set_exception(error)
+            return
+
+        users: dict[str, TwitchUserData] = {
+            user["login"]: user for user in data  # type: ignore
+        }
+        for login in logins:
+            user = users.get(login)
+            self.users.set(
+                login,
+                user,
+                None if user is not None else constants.Twitch.MISSING_TTL,
+            )
+            future = self._in_flight.pop(login, None)
+            if future is not None and not future.done():
+                future.set_result(user)
+
+    async def _access_token(self, stale: str | None = None) -> str:
+        """
+        Get an app access token, fetching a new one if needed.
+
+        Args:
+            stale (str | None): A token the api rejected, it is replaced
+                unless another lookup already did. Defaults to None.
+
+        Returns:
+            str: The token.
+
+        Raises:
+            TwitchError: The credentials were rejected.
+        """
+        async with self._token_lock:
+            if (
+                self._token is not None
+                and self._token != stale
+                and time.monotonic() < self._token_expires
+            ):
+                return self._token
+
+            # fetching a token twice is harmless, so it is retried too.
+            async with self.http.request(
+                "POST",
+                f"{self.auth_url}/token",
+                retry=True,
+                params={
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "grant_type": "client_credentials",
+                },
+            ) as response:
+                if response.status != 200:
+                    raise TwitchError(
+                        f"Authenticating failed with {response.status}: "
+                        f"{await response.text()}"
+                    )
+                data = await response.json()
+
+            token: str = data["access_token"]
+            self._token = token
+            # renewed a minute early, so it does not expire mid request.
+            self._token_expires = time.monotonic() + data["expires_in"] - 60
+            return token
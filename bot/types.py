@@ -17,7 +17,7 @@ class MongoDbDocument(TypedDict):
     _id: bson.ObjectId
 
 
-class RoleInfoDocument(MongoDbDocument):
+class RoleInfoDocument(TypedDict):
     """Data describing a role in the db."""
 
     role_id: int
@@ -26,11 +26,14 @@ class RoleInfoDocument(MongoDbDocument):
     name: str
 
 
-class BirthdayDocument(MongoDbDocument):
+class BirthdayDocument(TypedDict):
     """Data describing a birthday in the db."""
 
     discord_id: int
     date: datetime
+    month: int
+    day: int
+    timezone: str
 
 
 # twitch
@@ -39,7 +42,7 @@ class BirthdayDocument(MongoDbDocument):
 class _TwitchUserDataBase(TypedDict):
     """Response from the twitch api."""
 
-    brodcaster_type: Literal["partner", "affiliate", ""]
+    broadcaster_type: Literal["partner", "affiliate", ""]
     description: str
     display_name: str
     login: str
@@ -48,3 +51,36 @@ class _TwitchUserDataBase(TypedDict):
     type: Literal["staff", "admin", "global_mod", ""]  # noqa: A003
     view_count: int
     created_at: str
+
+
+class TwitchUserData(_TwitchUserDataBase):
+    """A user from the helix users endpoint."""
+
+    id: str  # noqa: A003
+
+
+class TwitchStreamData(TypedDict):
+    """A live stream from the helix streams endpoint."""
+
+    id: str  # noqa: A003
+    user_id: str
+    user_login: str
+    user_name: str
+    game_id: str
+    game_name: str
+    type: Literal["live", ""]  # noqa: A003
+    title: str
+    viewer_count: int
+    started_at: str
+    language: str
+    thumbnail_url: str
+
+
+class TwitchChannelDocument(TypedDict):
+    """A Twitch channel a member registered for live notifications."""
+
+    user_id: str
+    login: str
+    discord_id: int
+    # id of the stream last seen live, None while offline.
+    stream_id: str | None
@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
+import resource
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, cast
 
 import hikari
 
-from bot import constants
+from bot import constants, interactions
 
 if TYPE_CHECKING:
     from typing import Awaitable
@@ -15,18 +16,21 @@ if TYPE_CHECKING:
     import tanjun
 
 
-def is_admin(member: hikari.Member) -> bool:
+def memory_usage() -> int:
     """
-    Check if a member is an admin.
-
-    Args:
-        member (hikari.Member): Member to check
+    Get the resident memory of the process.
 
     Returns:
-        bool: If the member is an admin or not
+        int: Resident set size in bytes.
     """
-    roles = member.get_roles()
-    return any(role.id == constants.ADMIN_ROLE_ID for role in roles)
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except OSError:
+        # peak instead of current, but better than nothing.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return pages * resource.getpagesize()
 
 
 async def wait_for_interaction(
@@ -45,27 +49,44 @@ async def wait_for_interaction(
             Defaults to 60*5 (5 minutes).
 
     Returns:
-        hikari.ComponentInteraction:
-        the event, garantied to contain a ComponentInteraction
+        hikari.ComponentInteraction: The first interaction on the message.
+    """
+    return await get_router(ctx).wait_for(
+        message_id=message.id, timeout=timeout
+    )
 
-    Raises:
-        TypeError: ctx.events is None
+
+def _client(ctx: tanjun.abc.Context) -> tanjun.Client:
     """
+    Get the client of a context, with its dependencies.
 
-    def predicate(event: hikari.InteractionCreateEvent) -> bool:
-        inte = event.interaction
-        return (
-            isinstance(inte, hikari.ComponentInteraction)
-            and inte.message.id == message.id
-        )
+    Args:
+        ctx (tanjun.abc.Context): Context to get the client from.
 
-    if ctx.events is None:
-        raise TypeError("ctx.events is None")
+    Returns:
+        tanjun.Client: The client.
+    """
+    # the abc has no dependency lookup, the bot always runs a tanjun.Client.
+    return cast("tanjun.Client", ctx.client)
 
-    event = await ctx.events.wait_for(
-        hikari.InteractionCreateEvent, timeout=timeout, predicate=predicate
-    )
-    return event.interaction  # type: ignore
+
+def get_router(ctx: tanjun.abc.Context) -> interactions.ComponentRouter:
+    """
+    Get the component router of the client.
+
+    Args:
+        ctx (tanjun.abc.Context): Context to get the client from.
+
+    Returns:
+        interactions.ComponentRouter: The router.
+
+    Raises:
+        TypeError: The router is not registered yet.
+    """
+    router = _client(ctx).get_type_dependency(interactions.ComponentRouter)
+    if not isinstance(router, interactions.ComponentRouter):
+        raise TypeError("ComponentRouter is not registered")
+    return router
 
 
 @dataclass(frozen=True)
@@ -99,8 +120,8 @@ async def confirmation_embed(
             The button to cancel the action.
             Defaults to ButtonInfo("Cancel", hikari.ButtonStyle.DANGER).
     """
-    confirm_button_id = "confirm"
-    deny_button_id = "deny"
+    confirm_button_id = interactions.custom_id("confirm")
+    deny_button_id = interactions.custom_id("deny")
 
     buttons = (
         ctx.rest.build_action_row()
@@ -117,7 +138,9 @@ async def confirmation_embed(
     message = await ctx.respond(
         embed=embed, component=buttons, ensure_result=True
     )
-    interaction = await wait_for_interaction(ctx, message)
+    interaction = await get_router(ctx).wait_for(
+        custom_ids=(confirm_button_id, deny_button_id), message_id=message.id
+    )
 
     if embed.title is None:
         embed.title = ""
@@ -9,7 +9,7 @@ from typing import TYPE_CHECKING, Generic, Literal, TypeVar
 
 if TYPE_CHECKING:
     import datetime as dt
-    from typing import Any
+    from typing import Any, AsyncIterator, Mapping
 
     import bson
     import pymongo
@@ -29,9 +29,13 @@ class AsyncIOMotorClient:
         **kwargs: Any
     ) -> None: ...
     def __getitem__(self, key: str) -> AsyncIOMotorDatabase: ...
+    def close(self) -> None: ...
 
 class AsyncIOMotorDatabase:
     def __getitem__(self, key: str) -> AsyncIOMotorCollection[D]: ...
+    async def command(
+        self, command: str | Mapping[str, Any], **kwargs: Any
+    ) -> dict[str, Any]: ...
 
 class AsyncIOMotorCollection(Generic[D]):
     async def delete_one(
@@ -41,15 +45,33 @@ class AsyncIOMotorCollection(Generic[D]):
         hint: ... | None = None,
         session: ... | None = None,
     ) -> ...: ...
-    def find(self, filter: None | JSON = None) -> AsyncIOMotorCursor[D]: ...
-    async def find_one(self, filter: None | JSON = None) -> None | D: ...
-    async def insert_one(self, document: JSON) -> ...: ...
+    def find(
+        self,
+        filter: None | JSON | Mapping[str, Any] = None,
+        projection: None | Mapping[str, Any] = None,
+    ) -> AsyncIOMotorCursor[D]: ...
+    async def find_one(
+        self,
+        filter: None | JSON = None,
+        projection: None | Mapping[str, Any] = None,
+    ) -> None | D: ...
+    async def insert_one(self, document: JSON | Mapping[str, Any]) -> ...: ...
     async def update_one(
-        self, filter: JSON, update: dict[str, JSON], upsert: bool = False
+        self,
+        filter: JSON,
+        update: dict[str, JSON] | Mapping[str, Any],
+        upsert: bool = False,
     ) -> ...: ...
     async def update_many(
         self, filter: JSON, update: JSON, upsert: bool = False
     ) -> ...: ...
+    async def bulk_write(
+        self, requests: list[Any], ordered: bool = True
+    ) -> ...: ...
+    async def index_information(self) -> dict[str, dict[str, Any]]: ...
+    async def create_indexes(
+        self, indexes: list[pymongo.IndexModel]
+    ) -> list[str]: ...
 
 class AsyncIOMotorCursor(Generic[D]):
     def sort(
@@ -57,6 +79,8 @@ class AsyncIOMotorCursor(Generic[D]):
     ) -> AsyncIOMotorCursor[D]: ...
     def limit(self, limit: int) -> AsyncIOMotorCursor[D]: ...
     async def to_list(self, length: None | int) -> list[D]: ...
+    async def explain(self) -> dict[str, Any]: ...
+    def __aiter__(self) -> AsyncIterator[D]: ...
 
 AsyncIOMotorClientSession = ...
 AsyncIOMotorCommandCursor = ...